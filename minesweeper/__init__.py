@@ -7,8 +7,11 @@ BOARD_REGISTRY = {}
 AGENT_REGISTRY = {}
 
 
-def register_board(name, grid_cls):
-    """Decorator to register a new board & grid pair."""
+def register_board(name, grid_cls=None):
+    """
+    Decorator to register a new board & grid pair. The grid (renderer) class can also be registered separately with
+    register_grid(), so that boards can be defined (and run headless) without importing any graphics.
+    """
     
     def register_board_class(cls):
         if name in BOARD_REGISTRY:
@@ -21,6 +24,21 @@ def register_board(name, grid_cls):
     return register_board_class
 
 
+def register_grid(name):
+    """Decorator to register the grid (renderer) class of an already registered board."""
+    
+    def register_grid_class(cls):
+        if name not in BOARD_REGISTRY:
+            raise ValueError(f'Cannot register grid for unknown board {name}')
+        board_cls, grid_cls = BOARD_REGISTRY[name]
+        if grid_cls is not None:
+            raise ValueError(f'Cannot register duplicate grid for board {name}')
+        BOARD_REGISTRY[name] = (board_cls, cls)
+        return cls
+    
+    return register_grid_class
+
+
 def register_agent(name):
     """Decorator to register a new agent."""
     
@@ -36,4 +54,6 @@ def register_agent(name):
 
 
 from .actions import Action, ActionType
-from minesweeper.agents import *
\ No newline at end of file
+
+# the built-in agents are registered on `import minesweeper.agents`; they are kept out of the package import so that
+# headless modules (boards, batch, seeders) do not load torch or pygame
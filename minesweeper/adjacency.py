@@ -0,0 +1,87 @@
+from functools import lru_cache
+from typing import Tuple
+
+import numpy as np
+
+
+# offsets of the 8 adjacent cells, in the same order SquareBoard has always visited them
+ADJACENT_OFFSETS = ((1, 0), (1, 1), (0, 1), (-1, 1), (-1, 0), (-1, -1), (0, -1), (1, -1))
+
+
+class NeighborIndex:
+    """
+    Precomputed (CSR-style) table of the adjacent cells of every cell of a square grid (or of any other tessellation, see
+    from_adjacency), using flat cell indices: the neighbors of cell i are neighbors[offsets[i]:offsets[i + 1]].
+    
+    Instances are shared between all boards of the same size (see neighbor_index()), so the arrays are read-only.
+    """
+    __slots__ = ['size', 'offsets', 'neighbors']
+    
+    def __init__(self, size: Tuple[int, int]):
+        self.size = w, h = tuple(size)
+        
+        xs, ys = np.divmod(np.arange(w * h), h)
+        
+        cells = []
+        neighbors = []
+        for dx, dy in ADJACENT_OFFSETS:
+            adj_xs, adj_ys = xs + dx, ys + dy
+            valid = (0 <= adj_xs) & (adj_xs < w) & (0 <= adj_ys) & (adj_ys < h)
+            cells.append(np.flatnonzero(valid))
+            neighbors.append(adj_xs[valid] * h + adj_ys[valid])
+        
+        # group the neighbors by cell (stable, so the offset order is kept within each cell)
+        cells = np.concatenate(cells)
+        order = np.argsort(cells, kind='stable')
+        
+        self.offsets = np.zeros(w * h + 1, dtype=np.intp)
+        self.offsets[1:] = np.cumsum(np.bincount(cells, minlength=w * h))
+        self.neighbors = np.concatenate(neighbors)[order].astype(np.intp)
+        
+        self.offsets.setflags(write=False)
+        self.neighbors.setflags(write=False)
+    
+    @classmethod
+    def from_adjacency(cls, size: Tuple[int, int], adjacency) -> 'NeighborIndex':
+        """
+        :param size: size of the grid, in cells
+        :param adjacency: (sparse CSR) adjacency matrix over the flat cell indices, e.g. of a tessellation
+        :return: neighbor index of the adjacent cells given by the matrix (in the order of its stored indices)
+        """
+        index = cls.__new__(cls)
+        index.size = tuple(size)
+        index.offsets = adjacency.indptr.astype(np.intp)
+        index.neighbors = adjacency.indices.astype(np.intp)
+        
+        index.offsets.setflags(write=False)
+        index.neighbors.setflags(write=False)
+        return index
+    
+    def of(self, index: int) -> np.ndarray:
+        """
+        :param index: flat index of a cell
+        :return: flat indices of the adjacent cells (a read-only view, not a copy)
+        """
+        return self.neighbors[self.offsets[index]:self.offsets[index + 1]]
+    
+    def of_pos(self, pos) -> np.ndarray:
+        """
+        :param pos: (x, y) position of a cell
+        :return: flat indices of the adjacent cells (a read-only view, not a copy)
+        """
+        return self.of(self.index_of(pos))
+    
+    def index_of(self, pos) -> int:
+        return pos[0] * self.size[1] + pos[1]
+    
+    def pos_of(self, index: int) -> Tuple[int, int]:
+        return divmod(int(index), self.size[1])
+
+
+@lru_cache(maxsize=16)
+def neighbor_index(size: Tuple[int, int]) -> NeighborIndex:
+    """
+    :param size: size of the grid, in cells
+    :return: the (cached, shared) neighbor index for grids of the given size
+    """
+    return NeighborIndex(tuple(int(length) for length in size))
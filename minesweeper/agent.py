@@ -2,6 +2,7 @@ from abc import abstractmethod, ABC
 
 from minesweeper.board import HiddenBoardState
 from minesweeper.actions import Action
+from minesweeper.utils import TickRepeater
 
 from typing import Sequence
 
@@ -49,3 +50,19 @@ class Agent(ABC):
         :param status: status indicators for the game and board
         """
         pass
+
+
+def pacer(config, repeat_ms: int, initial_delay_ms: int = 0) -> TickRepeater:
+    """
+    Paces an agent's actions: at the given (watchable) rate, or on every tick if the config turns pacing off (e.g. for
+    headless simulations or in turbo mode).
+    
+    :param config: game or agent config
+    :param repeat_ms: time to wait between actions
+    :param initial_delay_ms: time to wait before the first action
+    :return: tick repeater to check before acting
+    """
+    if not getattr(config, 'agent_pacing', True) or getattr(config, 'turbo', False):
+        return TickRepeater(1)
+    
+    return TickRepeater(repeat_ms, initial_delay_ms, time_based=True)
@@ -6,7 +6,7 @@ from minesweeper.board import HiddenBoardState
 from minesweeper import register_agent
 from minesweeper.actions import Action
 from minesweeper import Agent
-from minesweeper.utils import TickRepeater
+from minesweeper.agent import pacer
 
 from typing import Sequence
 
@@ -24,7 +24,7 @@ class RandomAgent(Agent):
     __slots__ = ['_ticker']
     
     def start(self, grid_size, config):
-        self._ticker = TickRepeater(1000, 2000, time_based=True)
+        self._ticker = pacer(config, 1000, 2000)
     
     def act(self, state: HiddenBoardState) -> Sequence[Action]:
         possible_coords = np.argwhere(state.openable_layout)
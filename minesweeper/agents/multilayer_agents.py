@@ -24,7 +24,8 @@ class DirectModel(nn.Module):
         self.conv4 = nn.Conv2d(16, 1, 1, padding=1)
     
     def forward(self, x) -> torch.Tensor:
-        x = self.conv1(x.unsqueeze(0))
+        # a single (2, W, H) input or an (N, 2, W, H) batch
+        x = self.conv1(x.unsqueeze(0) if x.dim() == 3 else x)
         x = self.conv2(x)
         x = self.conv3(x)
         x = self.conv4(x)
@@ -1,3 +1,4 @@
+from functools import partial
 from typing import Sequence, Optional, Iterable, Callable
 
 import numpy as np
@@ -8,7 +9,10 @@ from minesweeper.board import HiddenBoardState, neighbors
 from minesweeper import register_agent
 from minesweeper.actions import Action
 from minesweeper import Agent
+from minesweeper.agent import pacer
 from minesweeper.utils import TickRepeater
+from minesweeper.patterns import PatternTable
+from minesweeper.solvers import FrontierSolver
 
 __all__ = ['RulesBasedAgent']
 
@@ -45,19 +49,40 @@ def flag_all_obvious(state: HiddenBoardState):
     return [Action.flag(tuple(pos)) for pos in np.argwhere(openable_cells & ~state.flag_layout)]
 
 
-def handle_adjoints(state: HiddenBoardState):
-    # remaining neighbors for each cell
-    remaining_neighbors = state.proximity_matrix - neighbors(state.flag_layout)
+def match_patterns(state: HiddenBoardState, patterns: PatternTable):
+    # conclusions from the local window of every frontier cell (cached, common patterns are only solved once)
+    safe, mines = patterns.deduce(state)
     
-    return []
+    return [Action.select(tuple(pos)) for pos in np.argwhere(safe)] + \
+           [Action.flag(tuple(pos)) for pos in np.argwhere(mines)]
 
 
-def make_random_decision(state: HiddenBoardState):
+def deduce_linear(state: HiddenBoardState, solver: FrontierSolver):
+    # polynomial-time deductions (integer gaussian elimination over the frontier), before any enumeration
+    safe, mines = solver.deduce(state)
+    
+    return [Action.select(tuple(pos)) for pos in np.argwhere(safe & state.openable_layout)] + \
+           [Action.flag(tuple(pos)) for pos in np.argwhere(mines & state.openable_layout)]
+
+
+def handle_adjoints(state: HiddenBoardState, solver: FrontierSolver):
+    # exact mine probabilities of the frontier, from all consistent assignments of each independent component
+    solution = solver.solve(state)
+    
+    # open cells that can never be mines, flag cells that are always mines
+    return [Action.select(tuple(pos)) for pos in np.argwhere(solution.safe & state.openable_layout)] + \
+           [Action.flag(tuple(pos)) for pos in np.argwhere(solution.mines & state.openable_layout)]
+
+
+def make_random_decision(state: HiddenBoardState, solver: FrontierSolver):
     # find ambiguous spots
+    probabilities = solver.solve(state).probabilities
     
-    # open single, highest probability cell
+    # open single, highest probability cell (least likely to be a mine)
+    if np.all(np.isnan(probabilities)):
+        return choose_random(state) if np.any(state.openable_layout) else []
     
-    return []
+    return [Action.select(np.unravel_index(np.nanargmin(probabilities), probabilities.shape))]
 
 
 def choose_random(state: HiddenBoardState):
@@ -70,16 +95,21 @@ def choose_random(state: HiddenBoardState):
 class RulesBasedAgent(Agent):
     def __init__(self):
         self._tick: Optional[TickRepeater] = None
+        self.solver = FrontierSolver()
+        self.patterns = PatternTable()
         self.rules: Sequence[Callable[[HiddenBoardState], Iterable[Action]]] = [
             flag_all_obvious,
             superchord_once,
-            handle_adjoints,
-            make_random_decision,
+            partial(match_patterns, patterns=self.patterns),
+            partial(deduce_linear, solver=self.solver),
+            partial(handle_adjoints, solver=self.solver),
+            partial(make_random_decision, solver=self.solver),
             # choose_random
         ]
     
     def start(self, grid_size, config):
-        self._tick = TickRepeater(400, 1000, time_based=True)
+        self._tick = pacer(config, 400, 1000)
+        self.solver.workers = getattr(config, 'solver_workers', self.solver.workers)
 
     def act(self, state: HiddenBoardState) -> Sequence[Action]:
         actions = []
@@ -88,7 +118,7 @@ class RulesBasedAgent(Agent):
             for rule in self.rules:
                 actions.extend(rule(state))
                 if len(actions) != 0:
-                    log.debug(f'Applying rule: {rule.__name__}')
+                    log.debug(f'Applying rule: {getattr(rule, "func", rule).__name__}')
                     break
             
         return actions
@@ -0,0 +1,257 @@
+from typing import Callable, Tuple
+
+import numpy as np
+
+from minesweeper.kernels import proximity
+
+
+def _pad(layers: np.ndarray, value=0) -> np.ndarray:
+    return np.pad(layers, ((0, 0), (1, 1), (1, 1)), constant_values=value)
+
+
+def _dilate(layers: np.ndarray) -> np.ndarray:
+    """Boolean 3x3 dilation of a stack of (N, W, H) layers."""
+    padded = _pad(layers, False)
+    _, w, h = layers.shape
+
+    dilated = layers.copy()
+    for dx in range(3):
+        for dy in range(3):
+            dilated |= padded[:, dx:dx + w, dy:dy + h]
+
+    return dilated
+
+
+def batch_neighbors(mines: np.ndarray, out: np.ndarray = None) -> np.ndarray:
+    """
+    Batched equivalent of minesweeper.board.neighbors for a stack of (N, W, H) mine layouts.
+
+    :param out: (N, W, H) int8 output buffer, or None to allocate one
+    """
+    return proximity(mines, out)
+
+
+class BatchSquareBoard:
+    """
+    A headless stack of N independent square boards of the same size, stored as (N, W, H) arrays. Every action is
+    applied to all boards (or the boards selected by a mask) in a single vectorized call.
+
+    Positions are always given as an (N, 2) integer array, with one (x, y) position per board, even when a mask
+    restricts an action to some of the boards (the positions of unselected boards are ignored). Board statistics are
+    returned per board, e.g. completed is an (N,) boolean array with the same meaning as SquareBoard.completed.
+    
+    Only numpy and scipy are needed: the module deliberately avoids importing any seeders, rendering or agents (torch
+    is only used for the neighbor counts once it was loaded anyway, see minesweeper.kernels).
+    """
+
+    def __init__(self, size: Tuple[int, int], count: int, seeder: Callable[..., np.ndarray], config):
+        """
+        :param size: size of each board, in cells
+        :param count: number of boards (N)
+        :param seeder: seeder used to generate the mine layouts (called with batch=number of boards to reset)
+        :param config: game config (only forgiveness is used)
+        """
+        self._size = tuple(size)
+        self._count = count
+        self._seeder = seeder
+        self._config = config
+
+        self._mines = np.zeros((count, *self._size), dtype=bool)
+        self._proximity = np.zeros((count, *self._size), dtype=np.int8)
+        self._open = np.zeros((count, *self._size), dtype=bool)
+        self._flags = np.zeros((count, *self._size), dtype=bool)
+
+        self.reset()
+
+    def reset(self, mask: np.ndarray = None):
+        """
+        Starts new games on the boards selected by mask (or on all boards).
+
+        :param mask: (N,) boolean array of boards to reset
+        """
+        indices = self._indices(mask)
+
+        self._mines[indices] = self._seeder(self._size, batch=len(indices)) if len(indices) > 0 else False
+        self._proximity[indices] = batch_neighbors(self._mines[indices])
+        self._open[indices] = False
+        self._flags[indices] = False
+
+    ############################################################################
+    #                                 Actions                                  #
+    ############################################################################
+
+    def first_select(self, positions: np.ndarray, mask: np.ndarray = None):
+        """Clears the mines around the given positions before selecting them (one position per board)."""
+        indices = self._indices(mask)
+        xs, ys = self._split(positions, indices)
+
+        cleared = np.zeros((len(indices), *self._size), dtype=bool)
+        cleared[np.arange(len(indices)), xs, ys] = True
+        cleared = _dilate(cleared)
+
+        self._mines[indices] &= ~cleared
+        self._proximity[indices] = batch_neighbors(self._mines[indices])
+
+        self.select(positions, mask)
+
+    def select(self, positions: np.ndarray, mask: np.ndarray = None, propagate=True):
+        indices = self._indices(mask)
+        xs, ys = self._split(positions, indices)
+
+        seeds = np.zeros((len(indices), *self._size), dtype=bool)
+        seeds[np.arange(len(indices)), xs, ys] = True
+
+        self._open_from(indices, seeds, propagate)
+
+    def toggle_flag(self, positions: np.ndarray, mask: np.ndarray = None):
+        indices = self._indices(mask)
+        xs, ys = self._split(positions, indices)
+
+        self._flags[indices, xs, ys] = ~self._open[indices, xs, ys] & ~self._flags[indices, xs, ys]
+
+    def chord(self, positions: np.ndarray, mask: np.ndarray = None):
+        indices = self._indices(mask)
+        xs, ys = self._split(positions, indices)
+
+        # only chord on open cells
+        chordable = self._open[indices, xs, ys]
+        indices, xs, ys = indices[chordable], xs[chordable], ys[chordable]
+
+        # adjacent cells of each chorded cell
+        adjacent = np.zeros((len(indices), *self._size), dtype=bool)
+        adjacent[np.arange(len(indices)), xs, ys] = True
+        adjacent = _dilate(adjacent)
+        adjacent[np.arange(len(indices)), xs, ys] = False
+
+        # number of adjacent known mines (flags or open mines) must match the number in the cell
+        known = self._flags[indices] | (self._open[indices] & self._mines[indices])
+        known_adjacent = np.sum(known & adjacent, axis=(1, 2))
+        matching = known_adjacent == self._proximity[indices, xs, ys]
+
+        self._open_from(indices[matching], adjacent[matching], propagate=True)
+
+    def superchord(self, mask: np.ndarray = None):
+        """Selects all cells that can reasonably be selected, on every selected board."""
+        indices = self._indices(mask)
+
+        # the counts of every round are written into the same buffers (the first boards' part, as boards drop out)
+        known_buffer = np.empty((len(indices), *self._size), dtype=np.int8)
+        openable_buffer = np.empty((len(indices), *self._size), dtype=np.int8)
+
+        while len(indices) > 0:
+            open_cells = np.sum(self._open[indices], axis=(1, 2))
+
+            # cells that are flagged or are open mines
+            known = self._flags[indices] | (self._mines[indices] & self._open[indices])
+
+            # number of adjacent known mines for each cell
+            known_neighbors = batch_neighbors(known, known_buffer[:len(indices)])
+
+            # positions for which it is okay to open all adjacent cells
+            openable_adjacent_cells = (known_neighbors == self._proximity[indices]) & self._open[indices]
+
+            # cells that are adjacent to at least one cell that is "complete"
+            openable_cells = batch_neighbors(openable_adjacent_cells, openable_buffer[:len(indices)]) > 0
+
+            self._open_from(indices, openable_cells, propagate=True)
+
+            # only keep superchording boards that changed
+            indices = indices[np.sum(self._open[indices], axis=(1, 2)) != open_cells]
+
+    def _open_from(self, indices: np.ndarray, seeds: np.ndarray, propagate: bool):
+        """
+        Opens the seed cells of the given boards, flood filling from any (not yet open) empty cells reached.
+
+        :param indices: (M,) indices of the boards to open cells on
+        :param seeds: (M, W, H) cells to select on each of those boards
+        :param propagate: whether to flood fill from empty cells
+        """
+        if len(indices) == 0:
+            return
+
+        was_open = self._open[indices]
+        reached = seeds
+
+        if propagate:
+            expandable = (self._proximity[indices] == 0) & ~was_open
+
+            expanding = reached & expandable
+            while np.any(expanding):
+                newly_reached = _dilate(expanding) & ~reached
+                reached = reached | newly_reached
+                expanding = newly_reached & expandable
+
+        self._open[indices] = was_open | (reached & ~self._flags[indices])
+
+    def _indices(self, mask: np.ndarray = None) -> np.ndarray:
+        return np.arange(self._count) if mask is None else np.flatnonzero(mask)
+
+    def _split(self, positions: np.ndarray, indices: np.ndarray):
+        positions = np.asarray(positions, dtype=np.intp)
+        if positions.shape != (self._count, 2):
+            raise ValueError(f'Expected positions of shape {(self._count, 2)}, got {positions.shape}')
+        
+        return positions[indices, 0], positions[indices, 1]
+
+    ############################################################################
+    #                          Board Representations                           #
+    ############################################################################
+
+    @property
+    def size(self):
+        return self._size
+
+    @property
+    def count(self):
+        return self._count
+
+    @property
+    def proximity_matrix(self):
+        return self._proximity
+
+    @property
+    def mine_layout(self):
+        return self._mines
+
+    @property
+    def flag_layout(self):
+        return self._flags
+
+    @property
+    def hidden_layout(self):
+        return ~self._open
+
+    @property
+    def open_layout(self):
+        return self._open
+
+    ############################################################################
+    #                             Board Statistics                             #
+    ############################################################################
+
+    @property
+    def flags(self) -> np.ndarray:
+        return np.sum(self._flags, axis=(1, 2))
+
+    @property
+    def mines(self) -> np.ndarray:
+        return np.sum(self._mines, axis=(1, 2))
+
+    @property
+    def open_mines(self) -> np.ndarray:
+        return np.sum(self._mines & self._open, axis=(1, 2))
+
+    @property
+    def open_cells(self) -> np.ndarray:
+        return np.sum(self._open, axis=(1, 2))
+
+    @property
+    def completed(self) -> np.ndarray:
+        # case 1: all non-mines are open
+        # case 2: flags exactly mark all mines
+        return np.all(self._mines | self._open, axis=(1, 2)) | \
+               np.all(self._mines == self._flags, axis=(1, 2))
+
+    @property
+    def failed(self) -> np.ndarray:
+        return self.open_mines > self._config.forgiveness
@@ -1,30 +1,32 @@
 from dataclasses import dataclass
 from abc import abstractmethod, ABC
-from typing import Sequence
+from typing import Sequence, TYPE_CHECKING
 
 import numpy as np
-import pygame
 
+from minesweeper.actions import Action, ActionType
+from minesweeper.kernels import proximity
 
-def neighbors(mines: np.ndarray) -> np.ndarray:
-    from scipy.signal import convolve2d
+if TYPE_CHECKING:
+    import pygame
 
-    neighbors = convolve2d(mines, np.array([[1, 1, 1],
-                                            [1, 0, 1],
-                                            [1, 1, 1]]),
-                           mode='same', boundary='fill')
-    
-    return neighbors * (1 - mines) - mines
+
+def neighbors(mines: np.ndarray) -> np.ndarray:
+    """
+    :return: proximity matrix of a mine layout as int8: the number of adjacent mines of every cell, -1 for mines (see
+             minesweeper.kernels for the backends)
+    """
+    return proximity(mines)
 
 
 class OnScreen(ABC):
     
     @abstractmethod
-    def realign(self, screen: pygame.Surface, rect: pygame.Rect):
+    def realign(self, screen: 'pygame.Surface', rect: 'pygame.Rect'):
         pass
     
     @abstractmethod
-    def resize(self, screen: pygame.Surface, rect: pygame.Rect):
+    def resize(self, screen: 'pygame.Surface', rect: 'pygame.Rect'):
         pass
     
     @property
@@ -33,11 +35,12 @@ class OnScreen(ABC):
         pass
     
     @abstractmethod
-    def redraw(self) -> Sequence[pygame.Rect]:
+    def redraw(self) -> Sequence['pygame.Rect']:
         pass
 
 
 class Grid(ABC):
+    """Headless state of a grid of cells (which cells are open or flagged), without any rendering."""
     
     ############################################################################
     #                                 Actions                                  #
@@ -60,7 +63,11 @@ class Grid(ABC):
         pass
     
     @abstractmethod
-    def shift(self, dx, dy):
+    def add_listener(self, listener: 'GridListener'):
+        pass
+    
+    @abstractmethod
+    def remove_listener(self, listener: 'GridListener'):
         pass
     
     ############################################################################
@@ -73,20 +80,77 @@ class Grid(ABC):
         pass
     
     @abstractmethod
-    def pos_of(self, coords):
+    def is_flagged(self, pos):
         pass
     
     @abstractmethod
-    def is_flagged(self, pos):
+    def is_open(self, pos):
+        pass
+
+
+class GridListener(ABC):
+    """Receives notifications about changes to a grid's state (e.g. to render them)."""
+    
+    @abstractmethod
+    def cells_changed(self, positions):
         pass
     
     @abstractmethod
-    def is_open(self, pos):
+    def grid_refilled(self):
         pass
 
 
+class GridRenderer(OnScreen, GridListener):
+    """Draws a (headless) Grid on screen, redrawing the cells the grid reports as changed."""
+    
+    @abstractmethod
+    def attach(self, grid: Grid):
+        pass
+    
+    @abstractmethod
+    def shift(self, dx, dy):
+        pass
+    
+    @property
+    @abstractmethod
+    def size(self):
+        pass
+    
+    @abstractmethod
+    def pos_of(self, coords):
+        pass
+    
+    def zoom(self, level: int):
+        """Zooms out to the given level (renderers that cannot zoom out always stay at level 0)."""
+        pass
+    
+    @property
+    def zoom_level(self) -> int:
+        return 0
+    
+    @property
+    def block_size(self) -> int:
+        """Number of cells per side of the drawn units (1 unless zoomed out)."""
+        return 1
+
+
 class Board(ABC):
     
+    @classmethod
+    @abstractmethod
+    def create(cls, size: (int, int), mine_prob: float, config) -> 'Board':
+        """
+        :param size: size of the board, in cells
+        :param mine_prob: probability of every cell to be a mine
+        :return: a new board of the given size on a fresh grid state, with uniformly random mines
+        """
+        pass
+    
+    @property
+    @abstractmethod
+    def grid(self) -> Grid:
+        pass
+    
     @abstractmethod
     def first_select(self, pos):
         pass
@@ -107,10 +171,42 @@ class Board(ABC):
     def superchord(self):
         pass
     
+    def apply(self, action: Action):
+        """
+        Applies a single (positional or board-wide) action to the board; surrendering is left to the caller.
+        
+        :param action: action to apply
+        :return: whether the action was applied
+        """
+        if action.type == ActionType.SELECT:
+            self.select(action.pos)
+        elif action.type == ActionType.FLAG:
+            self.toggle_flag(action.pos)
+        elif action.type == ActionType.CHORD:
+            self.chord(action.pos)
+        elif action.type == ActionType.SUPERCHORD:
+            self.superchord()
+        else:
+            return False
+        
+        return True
+    
     ############################################################################
     #                          Board Representations                           #
     ############################################################################
     
+    def hidden_state(self) -> 'HiddenBoardState':
+        """
+        :return: the state of the board as seen by a player (proximity of hidden cells masked out)
+        """
+        masked_proximity = self.proximity_matrix.copy()
+        masked_proximity[~self.open_layout] = 0
+        return HiddenBoardState(
+                openable_layout=~self.open_layout & ~self.flag_layout,
+                flag_layout=self.flag_layout,
+                proximity_matrix=masked_proximity,
+                mine_count=self.mines)
+    
     @property
     @abstractmethod
     def proximity_matrix(self):
@@ -177,6 +273,7 @@ class HiddenBoardState:
     flag_layout: np.ndarray
     proximity_matrix: np.ndarray
     last_state: 'HiddenBoardState' = None
+    mine_count: int = None  # total number of mines on the board (the usual mine counter), if known
     
     last_state_stored = None
     
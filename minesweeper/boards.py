@@ -1,67 +1,44 @@
 from collections import deque
+from functools import lru_cache
+from typing import Callable, List, Optional, Tuple
 
 import numpy as np
-import os
-import pygame
-from pygame import Rect
 
-from scipy.signal import convolve2d
+from scipy.sparse import csr_matrix
 
 from minesweeper import register_board
-from minesweeper.board import Board, Grid
-from minesweeper.seeders import Seeder
+from minesweeper.adjacency import ADJACENT_OFFSETS, NeighborIndex, neighbor_index
+from minesweeper.board import Board, Grid, GridListener, HiddenBoardState, neighbors
+from minesweeper.chunks import CHUNK_SIZE, ChunkedArray
+from minesweeper.kernels import count_neighbors, proximity
+from minesweeper.regions import ZeroRegions
+from minesweeper.seeders import ChunkSeeder, Seeder, hashed_uniform_random, uniform_random
+from minesweeper.tessellations import hex_adjacency, torus_adjacency, triangle_adjacency
 
 
 ################################################################################
 #                                    Square                                    #
 ################################################################################
 
-class SquareGrid(Grid):
+class SquareGridState(Grid):
+    """
+    Headless state of a square grid: only the open and flag layouts (and the proximity matrix to show), without any
+    rendering. Listeners (e.g. a SquareGrid) are notified of every change.
+    """
+    
+    def __init__(self, size: (int, int)):
+        self._size = tuple(size)
+        self._listeners: List[GridListener] = []
+        
+        self.flags = np.zeros(self._size, dtype=bool)
+        self.open = np.zeros(self._size, dtype=bool)
+        self.proximity = np.zeros(self._size, dtype=np.int8)
     
-    def __init__(self, screen: pygame.Surface, available_rect: pygame.Rect, config):
-        # save parameters and pre-load assets/resources
-        self._screen = screen
-        self._config = config
-        self._load_cells()
-
-        self.resize(screen, available_rect)
+    def add_listener(self, listener: GridListener):
+        self._listeners.append(listener)
     
-    def _load_cells(self):
-        from pygame.transform import smoothscale
-        
-        load_image = pygame.image.load
-        
-        font = pygame.font.Font(pygame.font.match_font('arial', bold=True), 24)
-        
-        self.cell_size = np.array(self._config.cell_size)
-        center = self.cell_size // 2
-        
-        hidden_base_file = os.path.join(self._config.res_dir, self._config.hidden_cell_file)
-        open_base_file = os.path.join(self._config.res_dir, self._config.open_cell_file)
-        
-        hidden_base = smoothscale(load_image(hidden_base_file).convert_alpha(), self.cell_size)
-        open_base = smoothscale(load_image(open_base_file).convert_alpha(), self.cell_size)
-        
-        self._hidden_image = hidden_base.copy()
-        
-        self._flag_image = hidden_base.copy()
-        flag = font.render('F', True, (255, 0, 0))
-        flag_rect = flag.get_rect()
-        flag_rect.center = center
-        self._flag_image.blit(flag, flag_rect)
-        
-        self._open_images = [open_base.copy() for _ in range(10)]
-        for num in range(1, 9):
-            text = font.render(str(num), True, (255, 0, 0))
-            text_rect = text.get_rect()
-            text_rect.center = center
-            
-            self._open_images[num].blit(text, text_rect)
-        
-        mine = font.render('*', True, (255, 0, 0))
-        mine_rect = mine.get_rect()
-        mine_rect.center = center
-        self._open_images[-1].blit(mine, mine_rect)
+    def remove_listener(self, listener: GridListener):
+        self._listeners.remove(listener)
     
     ############################################################################
     #                                 Actions                                  #
@@ -69,61 +46,42 @@ class SquareGrid(Grid):
     
     def select(self, pos: (int, int)):
         self.open[pos] = ~self.flags[pos]
-        self._changelist.append(pos)
+        self._cells_changed([pos])
     
     def toggle_flag(self, pos: (int, int)):
         self.flags[pos] = ~self.open[pos] & ~self.flags[pos]
-        self._changelist.append(pos)
+        self._cells_changed([pos])
     
-    ############################################################################
-    #                            Grid-Wide Changes                             #
-    ############################################################################
-    
-    def realign(self, screen, available_rect: Rect):
-        self._screen = screen
-        self._available_rect = available_rect
-        self._used_rect.center = available_rect.center
-
-        ref_x, ref_y = self._used_rect.topleft
-        cell_x, cell_y = self.cell_size
+    def update_proximity(self, window, proximity: np.ndarray):
+        """Updates the proximity matrix inside a window (a tuple of slices) without refilling the whole grid."""
+        self.proximity[window] = proximity
         
-        for x, y in np.ndindex(self._size):
-            self._subrects[x, y] = Rect(ref_x + x * cell_x, ref_y + y * cell_y, cell_x, cell_y)
-
-        self._changelist.extend(np.ndindex(self._size))
+        if len(self._listeners) > 0:
+            xs, ys = (range(*bounds.indices(length)) for bounds, length in zip(window, self._size))
+            self._cells_changed([(x, y) for x in xs for y in ys])
     
-    def resize(self, screen, available_rect: Rect):
-        self._screen = screen
-        self._available_rect = available_rect
+    def select_all(self, flat_indices: np.ndarray) -> np.ndarray:
+        """
+        Selects all (non-flagged) cells at the given flat indices in one vectorized assignment.
         
-        self._changelist = []
-
-        cell_x, cell_y = self.cell_size
-    
-        # calculate used area of available screen real estate
-        self._size = grid_size = available_rect.w // cell_x, \
-                                 available_rect.h // cell_y
-        grid_screen_size = grid_size[0] * cell_x, grid_size[1] * cell_y
-        self._used_rect = Rect((0, 0), grid_screen_size)
-        self._used_rect.center = available_rect.center
-    
-        ref_x, ref_y = self._used_rect.topleft
-    
-        # initialize all board state arrays
-        self.flags = np.zeros(grid_size, dtype=bool)
-        self.open = np.zeros(grid_size, dtype=bool)
-        self._proximity = np.zeros(grid_size, dtype=np.int8)
-        self._subrects = np.empty(grid_size, dtype=pygame.Rect)
-        for x, y in np.ndindex(grid_size):
-            self._subrects[x, y] = Rect(ref_x + x * cell_x, ref_y + y * cell_y, cell_x, cell_y)
+        :return: flat indices of the cells that were newly opened
+        """
+        opened = flat_indices[~self.open.flat[flat_indices] & ~self.flags.flat[flat_indices]]
+        self.open.flat[opened] = True
+        
+        if len(self._listeners) > 0:
+            self._cells_changed(list(zip(*np.unravel_index(opened, self._size))))
+        
+        return opened
     
-        # force an initial draw of the grid
-        self._changelist.extend(np.ndindex(self._size))
+    ############################################################################
+    #                            Grid-Wide Changes                             #
+    ############################################################################
     
     def refill(self, proximity: np.ndarray, open_layout: np.ndarray = None):
-        assert proximity.shape == self._proximity.shape
+        assert proximity.shape == self._size
         
-        self._proximity = proximity
+        self.proximity = proximity
         
         self.flags.fill(False)
         
@@ -131,10 +89,12 @@ class SquareGrid(Grid):
         if open_layout is not None:
             self.open[open_layout] = True
         
-        self._changelist.extend(np.ndindex(self._size))
+        for listener in self._listeners:
+            listener.grid_refilled()
     
-    def shift(self, dx, dy):
-        pass
+    def _cells_changed(self, positions):
+        for listener in self._listeners:
+            listener.cells_changed(positions)
     
     ############################################################################
     #                                 Queries                                  #
@@ -144,120 +104,170 @@ class SquareGrid(Grid):
     def size(self):
         return self._size
     
-    def pos_of(self, coords):
-        return (coords[0] - self._used_rect.left) // self.cell_size[0], (coords[1] - self._used_rect.top) // self.cell_size[1]
-    
     def is_flagged(self, pos):
         return self.flags[pos]
     
     def is_open(self, pos):
         return self.open[pos]
     
-    ############################################################################
-    #                                 Graphics                                 #
-    ############################################################################
-    
-    def _cell_image(self, pos):
-        if self.open[pos]:
-            return self._open_images[self._proximity[pos]]
-        else:
-            return self._flag_image if self.flags[pos] else self._hidden_image
-    
-    def redraw(self):
-        if len(self._changelist) > 0:
-            for pos in self._changelist:
-                self._screen.blit(self._cell_image(pos), self._subrects[pos])
-        
-        updated_rectangles = [self._subrects[pos] for pos in self._changelist]
-        self._changelist = []
-        return updated_rectangles
+    def marked_positions(self) -> np.ndarray:
+        """
+        :return: (N, 2) positions of all open or flagged cells
+        """
+        return np.argwhere(self.open | self.flags)
 
 
-@register_board('square', SquareGrid)
+@register_board('square')
 class SquareBoard(Board):
-
-    def __init__(self, grid: SquareGrid, seeder: Seeder, config, open_layout: np.ndarray = None):
+    """
+    Square Minesweeper board, played on a (headless) SquareGridState. To show the board, attach a renderer (e.g.
+    minesweeper.graphics.SquareGrid) to the grid; the board itself never needs pygame.
+    """
+    
+    def __init__(self, grid: SquareGridState, seeder: Seeder, config, open_layout: np.ndarray = None):
         self._grid = grid
         self._seeder = seeder
         self._config = config
+        self._adjacency = self._neighbor_index(grid.size)
         
         self._mine_layout = seeder(grid.size)
-        self._proximity = SquareBoard.add_neighbors(self._mine_layout)
+        
+        # number of adjacent mines/known mines (flags or open mines) of every cell, kept up to date incrementally
+        self._mine_counts = self._count_adjacent(self._mine_layout)
+        self._proximity = np.where(self._mine_layout, -1, self._mine_counts).astype(np.int8)
+        self._regions = self._zero_regions(self._proximity)
         
         self._grid.refill(self._proximity, open_layout)
+        self._known_counts = self._count_adjacent(self._grid.open & self._mine_layout)
+    
+    @classmethod
+    def create(cls, size: (int, int), mine_prob: float, config) -> 'SquareBoard':
+        return cls(SquareGridState(size), uniform_random(mine_prob), config)
+    
+    ############################################################################
+    #                                 Topology                                 #
+    ############################################################################
+    
+    def _neighbor_index(self, size) -> NeighborIndex:
+        return neighbor_index(size)
+    
+    def _count_adjacent(self, layout: np.ndarray) -> np.ndarray:
+        """
+        :return: number of adjacent cells set in the layout, for every cell (int8)
+        """
+        return SquareBoard.count_neighbors(layout)
+    
+    def _zero_regions(self, proximity: np.ndarray) -> ZeroRegions:
+        return ZeroRegions(proximity)
+    
+    def _proximity_window(self, pos) -> Tuple[slice, slice]:
+        """
+        :return: window (a tuple of slices) of all cells whose proximity can change when the mines around pos are removed
+        """
+        # only proximities within two cells of the selected cell can have changed
+        return tuple(slice(max(0, coord - 2), coord + 3) for coord in pos)
+    
+    ############################################################################
+    #                                 Actions                                  #
+    ############################################################################
     
     def first_select(self, pos):
-        self._mine_layout[pos] = False
-        for adj_pos in self._adjacents(*pos):
-            self._mine_layout[adj_pos] = False
-            
-        self._proximity = SquareBoard.add_neighbors(self._mine_layout)
-        self._grid.refill(self._proximity)
+        # remove the mines under and around the selected cell, updating the adjacent counts of each removed mine
+        cleared = np.append(self._adjacency.of_pos(pos), self._adjacency.index_of(pos))
+        for index in cleared[self._mine_layout.flat[cleared]]:
+            self._mine_layout.flat[index] = False
+            self._mine_counts.flat[self._adjacency.of(index)] -= 1
+        
+        window = self._proximity_window(pos)
+        self._grid.update_proximity(window, np.where(self._mine_layout[window], -1, self._mine_counts[window]))
+        self._regions = self._zero_regions(self._proximity)
+        
         # FIXME: when clicking on edge, two sides are opened
         self.select(pos)
     
     def select(self, pos, propagate=True):
-        if propagate and self._proximity[pos] == 0:
-            candidates = deque([pos])
-            
-            while len(candidates) != 0:
-                next_empty = candidates.popleft()
-                
-                if self._proximity[next_empty] == 0 and not self._grid.is_open(next_empty):
-                    for adj_cell in self._adjacents(*next_empty):
-                        candidates.append(adj_cell)
-                
-                self._grid.select(next_empty)
+        self._select(pos, propagate)
+    
+    def _select(self, pos, propagate=True) -> np.ndarray:
+        """Selects the cell at pos and returns the flat indices of all newly opened cells."""
+        if propagate and self._proximity[pos] == 0 and not self._grid.is_open(pos):
+            # open the whole (precomputed) region of empty cells and its border at once
+            return self._grid.select_all(self._regions.cells_of(self._regions.region_of(pos)))
         
+        was_open = self._grid.is_open(pos)
         self._grid.select(pos)
+        
+        if was_open or not self._grid.is_open(pos):
+            return np.empty(0, dtype=np.intp)
+        
+        if self._mine_layout[pos]:
+            self._known_counts.flat[self._adjacency.of_pos(pos)] += 1
+        
+        return np.array([self._adjacency.index_of(pos)], dtype=np.intp)
     
     def toggle_flag(self, pos):
-        return self._grid.toggle_flag(pos)
+        was_flagged = self._grid.is_flagged(pos)
+        self._grid.toggle_flag(pos)
+        
+        if was_flagged != self._grid.is_flagged(pos):
+            self._known_counts.flat[self._adjacency.of_pos(pos)] += -1 if was_flagged else 1
     
     def chord(self, pos):
         if not self._grid.is_open(pos):
             return
         
-        flagged_cells = 0
-        for adj_pos in self._adjacents(*pos):
-            if self._grid.is_flagged(adj_pos) or (self._grid.is_open(adj_pos) and self._mine_layout[adj_pos]):
-                flagged_cells += 1
-        
-        if flagged_cells == self._proximity[pos]:
-            for adj_pos in self._adjacents(*pos):
-                self.select(adj_pos)
+        if self._known_counts[pos] == self._proximity[pos]:
+            for adj_index in self._adjacency.of_pos(pos):
+                self.select(self._adjacency.pos_of(adj_index))
     
     def superchord(self):
-        """Selects all cells that can reasonably be selected."""
+        """
+        Selects all cells that can reasonably be selected, i.e. repeatedly opens all cells adjacent to a "complete" open
+        cell (one with as many adjacent known mines as its number). Only cells whose neighborhood changed are revisited.
+        """
+        proximity = self._proximity.ravel()
+        known_counts = self._known_counts.ravel()
+        mines = self._mine_layout.ravel()
+        opened = self._grid.open.ravel()
         
-        while True:
-            # keep track of the number of open cells from before
-            open_cells = self.open_cells
-            
-            # cells where flagged or are open mines
-            known_mine_layout = self.flag_layout | (self.mine_layout & self.open_layout)
-            
-            # number of adjacent known mines for each cell
-            known_neighbors = SquareBoard.add_neighbors(known_mine_layout)
-            
-            # positions for which it is okay to open all adjacent cells
-            openable_adjacent_cells = (known_neighbors == self._proximity) & self.open_layout
-            
-            # cells that are adjacent to at least one cell that is "complete" (has known neighbors == neighbors)
-            openable_cells = SquareBoard.add_neighbors(openable_adjacent_cells) > 0
-            
-            # open cells
-            for pos in np.argwhere(openable_cells):
-                self.select(tuple(pos))
+        def complete(index):
+            # open mines are always "complete"
+            return opened[index] and (mines[index] or known_counts[index] == proximity[index])
+        
+        queue = deque(np.flatnonzero(opened & (mines | (known_counts == proximity))))
+        processed = np.zeros(opened.shape, dtype=bool)
+        
+        while len(queue) != 0:
+            index = queue.popleft()
+            if processed[index]:
+                continue
+            processed[index] = True
             
-            # stop superchording if no change
-            if open_cells == self.open_cells:
-                break
+            for adj_index in self._adjacency.of(index):
+                if opened[adj_index]:
+                    continue
+                
+                for opened_index in self._select(self._adjacency.pos_of(adj_index)):
+                    if complete(opened_index):
+                        queue.append(opened_index)
+                    
+                    # an opened mine changes the known mine counts of its neighbors
+                    if mines[opened_index]:
+                        queue.extend(filter(complete, self._adjacency.of(opened_index)))
     
     ############################################################################
     #                          Board Representations                           #
     ############################################################################
     
+    @property
+    def grid(self) -> SquareGridState:
+        return self._grid
+    
+    @property
+    def adjacency(self) -> NeighborIndex:
+        """Shared neighbor index of the board's grid size (see minesweeper.adjacency)."""
+        return self._adjacency
+    
     @property
     def proximity_matrix(self):
         return self._proximity
@@ -266,6 +276,11 @@ class SquareBoard(Board):
     def mine_layout(self):
         return self._mine_layout
     
+    @property
+    def known_mine_counts(self):
+        """Number of known mines (flags or open mines) adjacent to each cell."""
+        return self._known_counts
+    
     @property
     def flag_layout(self):
         return self._grid.flags
@@ -309,22 +324,461 @@ class SquareBoard(Board):
     def failed(self) -> bool:
         return self.open_mines > self._config.forgiveness
     
-    def _adjacents(self, x, y):
-        return filter(lambda pos: 0 <= pos[0] < self._grid.size[0] and 0 <= pos[1] < self._grid.size[1],
-                      [(x + 1, y),
-                       (x + 1, y + 1),
-                       (x, y + 1),
-                       (x - 1, y + 1),
-                       (x - 1, y),
-                       (x - 1, y - 1),
-                       (x, y - 1),
-                       (x + 1, y - 1)])
+    @staticmethod
+    def count_neighbors(mines: np.ndarray) -> np.ndarray:
+        # counts (0-8) are the same in uint8 and int8, so they are only reinterpreted
+        return count_neighbors(mines).view(np.int8)
     
     @staticmethod
     def add_neighbors(mines: np.ndarray) -> np.ndarray:
-        neighbors = convolve2d(mines, np.array([[1, 1, 1],
-                                                [1, 0, 1],
-                                                [1, 1, 1]]),
-                               mode='same', boundary='fill')
+        return proximity(mines)
+
+
+################################################################################
+#                                    Graph                                     #
+################################################################################
+
+@lru_cache(maxsize=16)
+def graph_topology(adjacency_of: Callable[[Tuple[int, int]], csr_matrix], size: Tuple[int, int]) \
+        -> Tuple[csr_matrix, NeighborIndex]:
+    """
+    :param adjacency_of: function returning the adjacency matrix of a tessellation of the given size
+    :param size: size of the grid, in cells
+    :return: the (cached, shared) adjacency matrix and the neighbor index for grids of the given size
+    """
+    adjacency = adjacency_of(tuple(int(length) for length in size))
+    return adjacency, NeighborIndex.from_adjacency(size, adjacency)
+
+
+class GraphBoard(SquareBoard):
+    """
+    Minesweeper board on any tessellation (hexagons, triangles, a torus, ...), defined by a sparse adjacency matrix A
+    over the flat cell indices. The cells are still laid out on a (W, H) SquareGridState, so only the topology differs:
+    proximities are A @ mines, and flood fills, chords and superchords follow the CSR neighbor lists of A.
+    
+    Subclasses only give the adjacency matrix of their tessellation (see minesweeper.tessellations).
+    """
+    adjacency_of: Callable[[Tuple[int, int]], csr_matrix] = None
+    
+    def __init__(self, grid: SquareGridState, seeder: Seeder, config, open_layout: np.ndarray = None):
+        self._matrix = graph_topology(type(self).adjacency_of, tuple(grid.size))[0]
+        super().__init__(grid, seeder, config, open_layout)
+    
+    def _neighbor_index(self, size) -> NeighborIndex:
+        return graph_topology(type(self).adjacency_of, tuple(size))[1]
+    
+    def _count_adjacent(self, layout: np.ndarray) -> np.ndarray:
+        return (self._matrix @ layout.ravel().astype(np.int8)).reshape(layout.shape).astype(np.int8)
+    
+    def _zero_regions(self, proximity: np.ndarray) -> ZeroRegions:
+        return ZeroRegions(proximity, self._matrix)
+    
+    def _proximity_window(self, pos) -> Tuple[slice, slice]:
+        # the neighbors of a cell are not necessarily close to it on the grid (e.g. on a torus)
+        return slice(None), slice(None)
+    
+    @property
+    def adjacency_matrix(self) -> csr_matrix:
+        """Shared (sparse CSR) adjacency matrix of the board's cells, over their flat indices."""
+        return self._matrix
+
+
+@register_board('hex')
+class HexBoard(GraphBoard):
+    """Board of hexagonal cells with 6 neighbors each, in rows that are alternately shifted by half a cell."""
+    adjacency_of = staticmethod(hex_adjacency)
+
+
+@register_board('triangle')
+class TriangleBoard(GraphBoard):
+    """Board of alternately upwards and downwards pointing triangles, each touching 12 others (by an edge or corner)."""
+    adjacency_of = staticmethod(triangle_adjacency)
+
+
+@register_board('torus')
+class TorusBoard(GraphBoard):
+    """Square board that wraps around at its edges, so that every cell has 8 neighbors."""
+    adjacency_of = staticmethod(torus_adjacency)
+
+
+################################################################################
+#                                   Chunked                                    #
+################################################################################
+
+class ChunkedGridState(Grid):
+    """
+    Headless state of a square grid stored in chunks (see minesweeper.chunks): only the chunks with open or flagged
+    cells are allocated. The proximity shown is the (lazily generated) proximity of the board the grid is refilled with.
+    """
+    
+    def __init__(self, size: (int, int), chunk_size: int = CHUNK_SIZE):
+        self._size = tuple(size)
+        self._listeners: List[GridListener] = []
+        
+        self.chunk_size = chunk_size
+        self.flags = ChunkedArray(self._size, dtype=bool, chunk_size=chunk_size)
+        self.open = ChunkedArray(self._size, dtype=bool, chunk_size=chunk_size)
+        self.proximity = ChunkedArray(self._size, dtype=np.int8, chunk_size=chunk_size)
+    
+    def add_listener(self, listener: GridListener):
+        self._listeners.append(listener)
+    
+    def remove_listener(self, listener: GridListener):
+        self._listeners.remove(listener)
+    
+    ############################################################################
+    #                                 Actions                                  #
+    ############################################################################
+    
+    def select(self, pos: (int, int)):
+        if not self.flags[pos]:
+            self.open[pos] = True
+        self._cells_changed([pos])
+    
+    def toggle_flag(self, pos: (int, int)):
+        if not self.open[pos]:
+            self.flags[pos] = not self.flags[pos]
+        self._cells_changed([pos])
+    
+    def select_all(self, positions: List[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Selects all (non-flagged) cells at the given positions, with one vectorized assignment per chunk.
+        
+        :return: positions of the cells that were newly opened
+        """
+        xs, ys = np.array(positions, dtype=np.intp).reshape(-1, 2).T
+        selectable = ~self.open[xs, ys] & ~self.flags[xs, ys]
+        xs, ys = xs[selectable], ys[selectable]
+        self.open[xs, ys] = True
         
-        return neighbors * (1 - mines) - mines
+        opened = list(zip(xs.tolist(), ys.tolist()))
+        self._cells_changed(opened)
+        return opened
+    
+    def proximity_changed(self, window):
+        """Notifies the listeners that the proximity inside a window (a tuple of slices) changed."""
+        if len(self._listeners) > 0:
+            xs, ys = (range(*bounds.indices(length)) for bounds, length in zip(window, self._size))
+            self._cells_changed([(x, y) for x in xs for y in ys])
+    
+    ############################################################################
+    #                            Grid-Wide Changes                             #
+    ############################################################################
+    
+    def refill(self, proximity: ChunkedArray, open_layout: np.ndarray = None):
+        assert proximity.size == self._size
+        
+        self.proximity = proximity
+        
+        self.flags = ChunkedArray(self._size, dtype=bool, chunk_size=self.chunk_size)
+        
+        self.open = ChunkedArray(self._size, dtype=bool, chunk_size=self.chunk_size)
+        if open_layout is not None:
+            self.open[np.nonzero(open_layout)] = True
+        
+        for listener in self._listeners:
+            listener.grid_refilled()
+    
+    def _cells_changed(self, positions):
+        for listener in self._listeners:
+            listener.cells_changed(positions)
+    
+    ############################################################################
+    #                                 Queries                                  #
+    ############################################################################
+    
+    @property
+    def size(self):
+        return self._size
+    
+    def is_flagged(self, pos):
+        return self.flags[pos]
+    
+    def is_open(self, pos):
+        return self.open[pos]
+    
+    def marked_positions(self) -> np.ndarray:
+        """
+        :return: (N, 2) positions of all open or flagged cells (found in the allocated chunks only)
+        """
+        positions = [np.empty((0, 2), dtype=np.intp)]
+        for key in set(self.open.chunks) | set(self.flags.chunks):
+            origin = np.array(key) * self.chunk_size
+            marked = self.open[self._chunk_window(key)] | self.flags[self._chunk_window(key)]
+            positions.append(np.argwhere(marked) + origin)
+        return np.concatenate(positions)
+    
+    def _chunk_window(self, key) -> Tuple[slice, slice]:
+        return tuple(slice(coord * self.chunk_size, (coord + 1) * self.chunk_size) for coord in key)
+
+
+@register_board('chunked')
+class ChunkedBoard(Board):
+    """
+    Square Minesweeper board for huge (effectively unbounded) grids, played on a ChunkedGridState. Mines are generated
+    chunk by chunk, from a hash of the board's seed and the chunk's key, when a chunk is first needed; proximities are
+    computed per chunk (with the bordering cells of the adjacent chunks) when first needed. Memory therefore grows with
+    the part of the board that is played or looked at, not with its area.
+    
+    The dense layouts (mine_layout, open_layout, ...) are still available, but copy (and generate) the whole board.
+    """
+    
+    def __init__(self, grid: ChunkedGridState, seeder: ChunkSeeder, config):
+        self._grid = grid
+        self._seeder = seeder
+        self._config = config
+        
+        # board statistics, kept up to date incrementally (the total number of mines is only counted when needed, but
+        # the mines of the generated chunks are counted as they are generated)
+        self._mine_count = None
+        self._generated_cells = self._generated_mines = 0
+        self._open_cells = self._open_mines = 0
+        self._flags = self._flagged_mines = 0
+        
+        chunk_size = grid.chunk_size
+        self._mines = ChunkedArray(grid.size, dtype=bool, chunk_size=chunk_size, generate=self._generate_mines)
+        self._chunk_count = int(np.prod([-(-length // chunk_size) for length in grid.size]))
+        self._proximity = ChunkedArray(grid.size, dtype=np.int8, chunk_size=chunk_size,
+                                       generate=self._chunk_proximity)
+        
+        # number of adjacent known mines (flags or open mines) of every cell, kept up to date incrementally
+        self._known_counts = ChunkedArray(grid.size, dtype=np.int8, chunk_size=chunk_size)
+        
+        self._grid.refill(self._proximity)
+    
+    @classmethod
+    def create(cls, size: (int, int), mine_prob: float, config) -> 'ChunkedBoard':
+        return cls(ChunkedGridState(size), hashed_uniform_random(mine_prob), config)
+    
+    def _generate_mines(self, key) -> np.ndarray:
+        mines = self._seeder(key, self._mines.chunk_shape(key))
+        self._generated_cells += mines.size
+        self._generated_mines += int(np.count_nonzero(mines))
+        return mines
+    
+    def _chunk_proximity(self, key) -> np.ndarray:
+        (width, height), (chunk_w, chunk_h) = self._grid.size, self._mines.chunk_shape(key)
+        x0, y0 = key[0] * self._grid.chunk_size, key[1] * self._grid.chunk_size
+        
+        # the chunk's mines with a border of the adjacent chunks' mines (generated as needed), empty outside the board
+        window = slice(max(0, x0 - 1), x0 + chunk_w + 1), slice(max(0, y0 - 1), y0 + chunk_h + 1)
+        padding = (int(x0 == 0), int(x0 + chunk_w == width)), (int(y0 == 0), int(y0 + chunk_h == height))
+        mines = np.pad(self._mines[window].astype(np.int8), padding)
+        
+        return neighbors(mines)[1:-1, 1:-1].astype(np.int8)
+    
+    def _adjacent(self, pos) -> List[Tuple[int, int]]:
+        (width, height), (x, y) = self._grid.size, pos
+        return [(x + dx, y + dy) for dx, dy in ADJACENT_OFFSETS if 0 <= x + dx < width and 0 <= y + dy < height]
+    
+    ############################################################################
+    #                                 Actions                                  #
+    ############################################################################
+    
+    def first_select(self, pos):
+        # remove the mines under and around the selected cell
+        window = tuple(slice(max(0, coord - 1), min(length, coord + 2)) for coord, length in zip(pos, self._grid.size))
+        removed = int(np.count_nonzero(self._mines[window]))
+        xs, ys = np.mgrid[window]
+        self._mines[xs.ravel(), ys.ravel()] = False
+        self._generated_mines -= removed
+        if self._mine_count is not None:
+            self._mine_count -= removed
+        
+        # only proximities within two cells of the selected cell can have changed: their chunks are regenerated
+        window = tuple(slice(max(0, coord - 2), coord + 3) for coord in pos)
+        self._proximity.discard(window)
+        self._grid.proximity_changed(window)
+        
+        self.select(pos)
+    
+    def select(self, pos, propagate=True):
+        self._select(pos, propagate)
+    
+    def _select(self, pos, propagate=True) -> List[Tuple[int, int]]:
+        """Selects the cell at pos and returns the positions of all newly opened cells."""
+        grid = self._grid
+        if grid.is_open(pos):
+            return []
+        
+        region = [pos]
+        if propagate and self._proximity[pos] == 0:
+            # flood fill the empty cells (and their border) across chunk borders; like the regions of a square board,
+            # the fill spreads past flagged cells, which are just not opened
+            queue, seen = deque([pos]), {pos}
+            while len(queue) > 0:
+                cell = queue.popleft()
+                if self._proximity[cell] != 0:
+                    continue
+                
+                for adj in self._adjacent(cell):
+                    if adj not in seen and not grid.is_open(adj):
+                        seen.add(adj)
+                        region.append(adj)
+                        queue.append(adj)
+        
+        opened = grid.select_all(region)
+        
+        xs, ys = np.array(opened, dtype=np.intp).reshape(-1, 2).T
+        opened_mines = self._mines[xs, ys]
+        self._open_cells += len(opened)
+        self._open_mines += int(np.count_nonzero(opened_mines))
+        
+        for mine in np.array(opened)[opened_mines].tolist():
+            self._add_known(tuple(mine), 1)
+        
+        return opened
+    
+    def toggle_flag(self, pos):
+        was_flagged = self._grid.is_flagged(pos)
+        self._grid.toggle_flag(pos)
+        
+        if was_flagged != self._grid.is_flagged(pos):
+            change = -1 if was_flagged else 1
+            self._add_known(pos, change)
+            self._flags += change
+            if self._mines[pos]:
+                self._flagged_mines += change
+    
+    def _add_known(self, pos, change: int):
+        for adj in self._adjacent(pos):
+            self._known_counts[adj] += change
+    
+    def chord(self, pos):
+        if not self._grid.is_open(pos):
+            return
+        
+        if self._known_counts[pos] == self._proximity[pos]:
+            for adj in self._adjacent(pos):
+                self.select(adj)
+    
+    def superchord(self):
+        """
+        Selects all cells that can reasonably be selected, i.e. repeatedly opens all cells adjacent to a "complete" open
+        cell (one with as many adjacent known mines as its number). Only cells whose neighborhood changed are revisited.
+        """
+        grid, mines = self._grid, self._mines
+        
+        def complete(pos):
+            # open mines are always "complete"
+            return grid.is_open(pos) and (mines[pos] or self._known_counts[pos] == self._proximity[pos])
+        
+        # the initially complete cells are found chunk by chunk, vectorized
+        queue = deque()
+        chunk_size = grid.chunk_size
+        for key, opened in list(grid.open.chunks.items()):
+            known_counts = self._known_counts.chunks.get(key, 0)
+            complete_cells = opened & (mines.chunk(key) | (known_counts == self._proximity.chunk(key)))
+            queue.extend((key[0] * chunk_size + x, key[1] * chunk_size + y)
+                         for x, y in np.argwhere(complete_cells).tolist())
+        
+        processed = set()
+        
+        while len(queue) != 0:
+            pos = queue.popleft()
+            if pos in processed:
+                continue
+            processed.add(pos)
+            
+            for adj in self._adjacent(pos):
+                if grid.is_open(adj):
+                    continue
+                
+                for opened in self._select(adj):
+                    if complete(opened):
+                        queue.append(opened)
+                    
+                    # an opened mine changes the known mine counts of its neighbors
+                    if mines[opened]:
+                        queue.extend(filter(complete, self._adjacent(opened)))
+    
+    ############################################################################
+    #                          Board Representations                           #
+    ############################################################################
+    
+    def hidden_state(self) -> HiddenBoardState:
+        # only the proximities of the open cells are needed, so no further chunks are generated
+        masked_proximity = np.zeros(self._grid.size, dtype=np.int8)
+        chunk_size = self._grid.chunk_size
+        for (cx, cy), opened in self._grid.open.chunks.items():
+            window = slice(cx * chunk_size, cx * chunk_size + opened.shape[0]), \
+                     slice(cy * chunk_size, cy * chunk_size + opened.shape[1])
+            masked_proximity[window] = np.where(opened, self._proximity.chunk((cx, cy)), 0)
+        
+        # (the mine count is only given if it is known without generating the remaining chunks)
+        flag_layout = self.flag_layout
+        return HiddenBoardState(
+                openable_layout=~self.open_layout & ~flag_layout,
+                flag_layout=flag_layout,
+                proximity_matrix=masked_proximity,
+                mine_count=self._counted_mines())
+    
+    @property
+    def grid(self) -> ChunkedGridState:
+        return self._grid
+    
+    @property
+    def proximity_matrix(self):
+        return self._proximity.dense()
+    
+    @property
+    def mine_layout(self):
+        return self._mines.dense()
+    
+    @property
+    def flag_layout(self):
+        return self._grid.flags.dense()
+    
+    @property
+    def hidden_layout(self):
+        return ~self._grid.open.dense()
+    
+    @property
+    def open_layout(self):
+        return self._grid.open.dense()
+    
+    ############################################################################
+    #                             Board Statistics                             #
+    ############################################################################
+    
+    @property
+    def flags(self) -> int:
+        return self._flags
+    
+    @property
+    def mines(self) -> int:
+        if self._counted_mines() is None:
+            # chunks that were never needed are generated only to be counted (they are not kept)
+            self._mine_count = self._generated_mines + \
+                               sum(int(np.count_nonzero(self._seeder(key, self._mines.chunk_shape(key))))
+                                   for key in self._mines.keys() if key not in self._mines.chunks)
+        return self._mine_count
+    
+    def _counted_mines(self) -> Optional[int]:
+        # the total number of mines, if known without generating any chunks (e.g. once all of them were generated)
+        if self._mine_count is None and len(self._mines.chunks) == self._chunk_count:
+            self._mine_count = self._generated_mines
+        return self._mine_count
+    
+    @property
+    def open_mines(self) -> int:
+        return self._open_mines
+    
+    @property
+    def open_cells(self) -> int:
+        return self._open_cells
+    
+    @property
+    def completed(self) -> bool:
+        # case 1: all non-mines are open
+        # case 2: flags exactly mark all mines
+        # chunks that were never generated have no open or flagged cells, so both cases are first checked on the
+        # generated chunks alone; only then do the other chunks (which must then hold only mines, or none) count
+        sites = self._grid.size[0] * self._grid.size[1]
+        generated_safe = self._generated_cells - self._generated_mines
+        return (self._open_cells - self._open_mines == generated_safe and sites - self.mines == generated_safe) or \
+               (self._flags == self._flagged_mines == self._generated_mines and self.mines == self._generated_mines)
+    
+    @property
+    def failed(self) -> bool:
+        return self._open_mines > self._config.forgiveness
@@ -0,0 +1,173 @@
+from typing import Callable, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+
+ChunkKey = Tuple[int, int]
+
+CHUNK_SIZE = 64
+
+
+class ChunkedArray:
+    """
+    A 2D array stored as fixed-size square chunks, of which only the touched ones are allocated: memory grows with the
+    number of touched chunks rather than with the total area, so the array can be far larger than could ever be stored
+    densely. Chunks at the far edges are cut to the size of the array.
+    
+    Chunks are either filled with a constant when they are first written to, or generated by a function of their key
+    (chunk coordinates) when they are first read; generated chunks are kept, so they can be modified afterwards.
+    
+    Cells are indexed like a dense array, by an (x, y) position, by a pair of slices (copied into a dense array) or by a
+    pair of coordinate arrays.
+    """
+    
+    def __init__(self, size: Tuple[int, int], dtype=bool, fill=0, chunk_size: int = CHUNK_SIZE,
+                 generate: Optional[Callable[[ChunkKey], np.ndarray]] = None):
+        """
+        :param size: size of the array, in cells
+        :param dtype: data type of the cells
+        :param fill: value of the cells of chunks that were never written to (if not generated)
+        :param chunk_size: side length of the chunks, in cells
+        :param generate: function generating the chunk with the given key (of shape chunk_shape(key))
+        """
+        self.size = tuple(int(length) for length in size)
+        self.shape = self.size
+        self.dtype = np.dtype(dtype)
+        self.fill = fill
+        self.chunk_size = chunk_size
+        self.chunks: Dict[ChunkKey, np.ndarray] = {}
+        
+        self._generate = generate
+    
+    ############################################################################
+    #                                  Chunks                                  #
+    ############################################################################
+    
+    def chunk_shape(self, key: ChunkKey) -> Tuple[int, int]:
+        return tuple(min(self.chunk_size, length - coord * self.chunk_size) for coord, length in zip(key, self.size))
+    
+    def chunk(self, key: ChunkKey) -> np.ndarray:
+        """
+        :return: the (writable) chunk with the given key, allocated or generated if needed
+        """
+        chunk = self.chunks.get(key)
+        if chunk is None:
+            chunk = self.chunks[key] = self._new_chunk(key)
+        return chunk
+    
+    def peek(self, key: ChunkKey) -> Optional[np.ndarray]:
+        """
+        :return: the chunk with the given key if it has any content (generated chunks are generated), None otherwise
+        """
+        return self.chunk(key) if self._generate is not None else self.chunks.get(key)
+    
+    def discard(self, window: Tuple[slice, slice]):
+        """Drops all stored chunks overlapping the window, so that they are refilled (or regenerated) when needed."""
+        for key in self._keys_of(self._bounds(*window)):
+            self.chunks.pop(key, None)
+    
+    def keys(self) -> Iterator[ChunkKey]:
+        """
+        :return: keys of all chunks of the array (touched or not)
+        """
+        return np.ndindex(*(-(-length // self.chunk_size) for length in self.size))
+    
+    def _new_chunk(self, key: ChunkKey) -> np.ndarray:
+        if self._generate is not None:
+            return np.asarray(self._generate(key), dtype=self.dtype)
+        return np.full(self.chunk_shape(key), self.fill, dtype=self.dtype)
+    
+    def _keys_of(self, window: Tuple[slice, slice]) -> Iterator[ChunkKey]:
+        (x0, x1), (y0, y1) = ((bounds.start, bounds.stop) for bounds in window)
+        size = self.chunk_size
+        for cx in range(x0 // size, (x1 - 1) // size + 1):
+            for cy in range(y0 // size, (y1 - 1) // size + 1):
+                yield cx, cy
+    
+    ############################################################################
+    #                                 Indexing                                 #
+    ############################################################################
+    
+    def __getitem__(self, index):
+        xs, ys = index
+        if isinstance(xs, (int, np.integer)):
+            # single cells are the most frequent (e.g. in flood fills), so they take the shortest path
+            (cx, x), (cy, y) = divmod(int(xs), self.chunk_size), divmod(int(ys), self.chunk_size)
+            chunk = self.chunks.get((cx, cy))
+            if chunk is None:
+                if self._generate is None:
+                    return self.dtype.type(self.fill)
+                chunk = self.chunk((cx, cy))
+            return chunk[x, y]
+        if isinstance(xs, slice):
+            return self._window(self._bounds(xs, ys))
+        return self._gather(np.asarray(xs), np.asarray(ys))
+    
+    def __setitem__(self, index, value):
+        xs, ys = index
+        if isinstance(xs, (int, np.integer)):
+            (cx, x), (cy, y) = divmod(int(xs), self.chunk_size), divmod(int(ys), self.chunk_size)
+            self.chunk((cx, cy))[x, y] = value
+            return
+        
+        xs, ys = np.broadcast_arrays(np.asarray(xs), np.asarray(ys))
+        values = np.broadcast_to(np.asarray(value, dtype=self.dtype), xs.shape)
+        for key, selected, local_xs, local_ys in self._group(xs, ys):
+            self.chunk(key)[local_xs, local_ys] = values[selected]
+    
+    def _bounds(self, xs: slice, ys: slice) -> Tuple[slice, slice]:
+        return tuple(slice(*bounds.indices(length)[:2]) for bounds, length in zip((xs, ys), self.size))
+    
+    def _window(self, window: Tuple[slice, slice]) -> np.ndarray:
+        (x0, x1), (y0, y1) = ((bounds.start, bounds.stop) for bounds in window)
+        dense = np.full((max(0, x1 - x0), max(0, y1 - y0)), self.fill, dtype=self.dtype)
+        if dense.size == 0:
+            return dense
+        
+        size = self.chunk_size
+        for key in self._keys_of(window):
+            chunk = self.peek(key)
+            if chunk is None:
+                continue
+            
+            # overlap of the chunk and the window, in array coordinates
+            left, top = max(x0, key[0] * size), max(y0, key[1] * size)
+            right, bottom = min(x1, key[0] * size + chunk.shape[0]), min(y1, key[1] * size + chunk.shape[1])
+            dense[left - x0:right - x0, top - y0:bottom - y0] = \
+                chunk[left - key[0] * size:right - key[0] * size, top - key[1] * size:bottom - key[1] * size]
+        
+        return dense
+    
+    def _gather(self, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        xs, ys = np.broadcast_arrays(xs, ys)
+        values = np.full(xs.shape, self.fill, dtype=self.dtype)
+        for key, selected, local_xs, local_ys in self._group(xs, ys):
+            chunk = self.peek(key)
+            if chunk is not None:
+                values[selected] = chunk[local_xs, local_ys]
+        return values
+    
+    def _group(self, xs: np.ndarray, ys: np.ndarray):
+        # the cells of every chunk in one vectorized step per chunk (not per cell)
+        (cxs, local_xs), (cys, local_ys) = np.divmod(xs, self.chunk_size), np.divmod(ys, self.chunk_size)
+        for cx, cy in set(zip(cxs.ravel().tolist(), cys.ravel().tolist())):
+            selected = (cxs == cx) & (cys == cy)
+            yield (cx, cy), selected, local_xs[selected], local_ys[selected]
+    
+    ############################################################################
+    #                                 Queries                                  #
+    ############################################################################
+    
+    def dense(self) -> np.ndarray:
+        """
+        :return: a dense copy of the whole array (generating every chunk, if generated)
+        """
+        return self[:, :]
+    
+    def __array__(self, dtype=None, copy=None):
+        return self.dense() if dtype is None else self.dense().astype(dtype)
+    
+    @property
+    def nbytes(self) -> int:
+        """Number of bytes of the stored chunks."""
+        return sum(chunk.nbytes for chunk in self.chunks.values())
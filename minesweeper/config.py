@@ -168,11 +168,30 @@ class Config(metaclass=ConfigMeta):
         window_size = SizeConfigItem(1280, 780)
         cell_size = SizeConfigItem(32, 32)
         fps = ConfigItem(default=60, type=int)
+        turbo = ConfigItem(
+                action='store_true',
+                help='run games as fast as possible: no frame pacing, agents act on every tick, games restart by '
+                     'themselves')
+        render_every = ConfigItem(
+                default=100,
+                type=int,
+                metavar='TICKS',
+                help='in turbo mode, only redraw every this many ticks (0: never)')
     
     with Group('gameplay'):
         good_first_select = ConfigItem(
                 action='store_true',
                 help='guarantee that the first select will be on an empty cell (no neighbors)')
+        no_guess = ConfigItem(
+                action='store_true',
+                help='only play boards that can be solved without guessing (opened at their start cell)')
+        board_size = ConfigItem(
+                default=None,
+                type=int,
+                nargs=2,
+                metavar=('WIDTH', 'HEIGHT'),
+                help='size of the board in cells (default: as many as fit into the window; larger boards are scrolled '
+                     'with the arrow keys)')
         forgiveness = ConfigItem(
                 default=0,
                 metavar='MINES',
@@ -184,6 +203,9 @@ class Config(metaclass=ConfigMeta):
         agent = ConfigItem(
                 default=None,
                 choices=minesweeper.AGENT_REGISTRY.keys())
+        agent_pacing = ConfigItem(
+                default=True,
+                help='whether agents act at a watchable pace (instead of on every tick)')
     
     with Group('controls'):
         double_click_time = ConfigItem(
@@ -194,6 +216,11 @@ class Config(metaclass=ConfigMeta):
         superchord = ConfigItem(
                 default='none',
                 choices=['none', 'auto', 'keyup'])
+        scroll_step = ConfigItem(
+                default=4,
+                type=int,
+                metavar='CELLS',
+                help='number of cells (or blocks, zoomed out with -/+) to scroll the board by per arrow key press')
         
     with Group('logging'):
         log_dir = ConfigItem(
@@ -203,3 +230,6 @@ class Config(metaclass=ConfigMeta):
         save_board_runs = ConfigItem(
                 default=True,
                 help='whether to save the board configurations for each game played')
+        save_trajectories = ConfigItem(
+                default=True,
+                help='whether to save the actions taken in each game played')
@@ -0,0 +1,113 @@
+import os
+from typing import Optional
+
+import numpy as np
+
+from minesweeper.board import CompleteBoardState
+
+
+# outcomes of the recorded games
+FAILED, UNFINISHED, COMPLETED = -1, 0, 1
+
+INDEX_DTYPE = np.dtype([('offset', '<u8'), ('width', '<u2'), ('height', '<u2'), ('outcome', 'i1')])
+
+
+class BoardCorpus:
+    """
+    Append-only corpus of finished boards, stored in two files instead of one file per game:
+        <name>.bin: the bit-packed mine, open and flag layouts of every game, back to back (memory-mapped for reading)
+        <name>.idx: one fixed-size record per game, with the offset of its layouts, the board size and the outcome
+    
+    The number of recorded games (and their outcomes) are read from the small index alone.
+    """
+    
+    def __init__(self, root: str = 'runs', name: str = 'boards'):
+        """
+        :param root: directory of the corpus files (created if needed)
+        :param name: base name of the corpus files
+        """
+        os.makedirs(root, exist_ok=True)
+        
+        self._data_file = os.path.join(root, f'{name}.bin')
+        self._index_file = os.path.join(root, f'{name}.idx')
+        self._data: Optional[np.memmap] = None
+        
+        # records are only ever appended, so a torn record (e.g. after a crash) can safely be dropped
+        size = os.path.getsize(self._index_file) if os.path.exists(self._index_file) else 0
+        if size % INDEX_DTYPE.itemsize != 0:
+            with open(self._index_file, 'r+b') as f:
+                f.truncate(size - size % INDEX_DTYPE.itemsize)
+        
+        self._index = np.fromfile(self._index_file, dtype=INDEX_DTYPE) if size > 0 else np.empty(0, INDEX_DTYPE)
+    
+    @staticmethod
+    def _packed_size(width: int, height: int) -> int:
+        return (width * height + 7) // 8
+    
+    def append(self, mine_layout: np.ndarray, open_layout: np.ndarray, flag_layout: np.ndarray,
+               outcome: int = UNFINISHED) -> int:
+        """
+        Records a game.
+        
+        :param mine_layout: mine layout of the board
+        :param open_layout: open cells of the board
+        :param flag_layout: flagged cells of the board
+        :param outcome: FAILED, UNFINISHED or COMPLETED
+        :return: number (index) of the recorded game
+        """
+        width, height = mine_layout.shape
+        packed = np.concatenate([np.packbits(layout.ravel()) for layout in (mine_layout, open_layout, flag_layout)])
+        
+        with open(self._data_file, 'ab') as f:
+            offset = f.tell()
+            f.write(packed.tobytes())
+        
+        record = np.array([(offset, width, height, outcome)], dtype=INDEX_DTYPE)
+        with open(self._index_file, 'ab') as f:
+            f.write(record.tobytes())
+        
+        self._index = np.concatenate([self._index, record])
+        return len(self._index) - 1
+    
+    def __len__(self):
+        return len(self._index)
+    
+    def __getitem__(self, game: int) -> CompleteBoardState:
+        """
+        :param game: number (index) of a recorded game
+        :return: the final state of the game's board
+        """
+        offset, width, height = (int(value) for value in self._index[game][['offset', 'width', 'height']].item())
+        packed_size = BoardCorpus._packed_size(width, height)
+        
+        data = self._mapped(offset + 3 * packed_size)
+        layouts = [np.unpackbits(data[start:start + packed_size], count=width * height).reshape(width, height)
+                   .astype(bool)
+                   for start in range(offset, offset + 3 * packed_size, packed_size)]
+        
+        return CompleteBoardState(mine_layout=layouts[0], open_layout=layouts[1], flag_layout=layouts[2])
+    
+    def _mapped(self, end: int) -> np.memmap:
+        # (re)map the data file once it grew past the current mapping
+        if self._data is None or len(self._data) < end:
+            self._data = np.memmap(self._data_file, dtype=np.uint8, mode='r')
+        return self._data
+    
+    def __getstate__(self):
+        # the memory map is not pickled (e.g. into DataLoader workers): every process maps the file by itself
+        state = self.__dict__.copy()
+        state['_data'] = None
+        return state
+    
+    @property
+    def index(self) -> np.ndarray:
+        """
+        :return: (read-only) index records of all games, with fields offset, width, height and outcome
+        """
+        index = self._index.view()
+        index.setflags(write=False)
+        return index
+    
+    @property
+    def outcomes(self) -> np.ndarray:
+        return self.index['outcome']
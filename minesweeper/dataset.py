@@ -0,0 +1,103 @@
+from typing import Optional, Sequence, Tuple
+
+import numpy as np
+import torch
+from torch.utils.data import Dataset
+
+from minesweeper.board import neighbors
+from minesweeper.corpus import BoardCorpus
+
+
+################################################################################
+#                                   Dataset                                    #
+################################################################################
+
+class CorpusDataset(Dataset):
+    """
+    The recorded games of a board corpus as (input, target) tensor pairs:
+        input:  (2, W, H) float tensor of the openable layout and the masked proximity matrix (as seen by an agent)
+        target: (1, W, H) float tensor of the mine layout
+    
+    Games are only decoded (from the memory-mapped corpus) when they are accessed. Each DataLoader worker maps the
+    corpus by itself, so the corpus is never copied into the workers.
+    """
+    
+    def __init__(self, root: str = 'runs', name: str = 'boards', size: Optional[Tuple[int, int]] = None,
+                 outcomes: Optional[Sequence[int]] = None):
+        """
+        :param root: directory of the corpus files
+        :param name: base name of the corpus files
+        :param size: only use games of this board size (needed to batch games of mixed sizes)
+        :param outcomes: only use games with one of these outcomes (default: all games)
+        """
+        self.corpus = BoardCorpus(root, name)
+        
+        index = self.corpus.index
+        selected = np.ones(len(index), dtype=bool)
+        if size is not None:
+            selected &= (index['width'] == size[0]) & (index['height'] == size[1])
+        if outcomes is not None:
+            selected &= np.isin(index['outcome'], outcomes)
+        self.games = np.flatnonzero(selected)
+    
+    def __len__(self):
+        return len(self.games)
+    
+    def __getitem__(self, item: int) -> Tuple[torch.Tensor, torch.Tensor]:
+        state = self.corpus[int(self.games[item])]
+        
+        openable_layout = ~state.open_layout & ~state.flag_layout
+        masked_proximity = np.where(state.open_layout, neighbors(state.mine_layout), 0)
+        
+        inputs = np.stack([openable_layout, masked_proximity]).astype(np.float32)
+        target = state.mine_layout[np.newaxis].astype(np.float32)
+        return torch.from_numpy(inputs), torch.from_numpy(target)
+
+
+################################################################################
+#                                  Symmetries                                  #
+################################################################################
+
+def dihedral(x: torch.Tensor, k: int) -> torch.Tensor:
+    """
+    Applies one of the 8 symmetries of the square to the last two dimensions of a tensor.
+    
+    :param x: tensor of shape (..., W, H)
+    :param k: symmetry: a rotation by k * 90 degrees, after a flip if k >= 4
+    :return: the transformed tensor (of shape (..., H, W) for odd rotations)
+    """
+    if k >= 4:
+        x = x.flip(-1)
+    return torch.rot90(x, k % 4, dims=(-2, -1))
+
+
+def random_dihedral(batch: torch.Tensor, generator: Optional[torch.Generator] = None) -> torch.Tensor:
+    """
+    Applies an independently chosen random symmetry to every sample of a batch, with one vectorized operation per
+    symmetry (rather than one per sample). Non-square boards only use the 4 symmetries that keep their shape.
+    
+    :param batch: tensor of shape (N, ..., W, H)
+    :param generator: random generator to choose the symmetries with
+    :return: the transformed batch
+    """
+    symmetries = torch.arange(8) if batch.shape[-1] == batch.shape[-2] else torch.tensor([0, 2, 4, 6])
+    chosen = symmetries[torch.randint(len(symmetries), (batch.shape[0],), generator=generator)]
+    
+    transformed = torch.empty_like(batch)
+    for k in symmetries.tolist():
+        selected = chosen == k
+        if torch.any(selected):
+            transformed[selected] = dihedral(batch[selected], k)
+    return transformed
+
+
+def collate_dihedral(samples: Sequence[Tuple[torch.Tensor, torch.Tensor]]) -> Tuple[torch.Tensor, torch.Tensor]:
+    """
+    DataLoader collate function that batches (input, target) pairs and applies the same random symmetry to the input
+    and the target of every sample.
+    """
+    inputs = torch.stack([inputs for inputs, _ in samples])
+    targets = torch.stack([target for _, target in samples])
+    
+    transformed = random_dihedral(torch.cat([inputs, targets], dim=1))
+    return transformed[:, :inputs.shape[1]], transformed[:, inputs.shape[1]:]
@@ -1,20 +1,23 @@
 import os
-import re
+import random
 import sys
 from abc import ABC
 from collections import namedtuple
 from dataclasses import dataclass
-from typing import List, Sequence, Type
+from typing import List, Optional, Sequence, Type
 
 import pygame
 from pygame.locals import *
 
+import minesweeper.graphics  # registers the grid (renderer) classes of the boards
 import minesweeper.logutils as logutils
-from board import HiddenBoardState, OnScreen
+from board import OnScreen
 from config import Config
 from minesweeper.actions import Action, ActionType
-from minesweeper.boards import SquareBoard, SquareGrid
-from minesweeper.seeders import uniform_random
+from minesweeper.boards import SquareBoard, SquareGridState
+from minesweeper.corpus import COMPLETED, FAILED, UNFINISHED, BoardCorpus
+from minesweeper.noguess import BoardPool
+from minesweeper.trajectory import TrajectoryWriter
 from minesweeper.utils import Delayer
 
 game_log = logutils.get_logger('game')
@@ -28,6 +31,13 @@ def secondary_clicked(event: pygame.event.Event):
     return event.type == MOUSEBUTTONUP and event.button == 3
 
 
+# scrolling direction (in cells) of the arrow keys
+SCROLL_KEYS = {K_LEFT: (-1, 0), K_RIGHT: (1, 0), K_UP: (0, -1), K_DOWN: (0, 1)}
+
+# zooming direction (in levels) of the +/- keys
+ZOOM_KEYS = {K_MINUS: 1, K_KP_MINUS: 1, K_EQUALS: -1, K_PLUS: -1, K_KP_PLUS: -1}
+
+
 class StatusBar(OnScreen):
 
     height_per_line = 30
@@ -108,7 +118,11 @@ class GameWindow:
         grid_rect = self.screen.get_rect().copy()
         grid_rect.h -= status_rect.h
         grid_rect.top = self.screen.get_rect().top
-        self.grid = SquareGrid(self.screen, grid_rect, self.config)
+        _, grid_cls = minesweeper.BOARD_REGISTRY[self.config.board]
+        self.grid = grid_cls(self.screen, grid_rect, self.config)
+
+        # held arrow keys keep scrolling
+        pygame.key.set_repeat(300, 50)
 
     def realign(self, new_size: (int, int)):
         self.screen = pygame.display.set_mode(new_size, flags=pygame.RESIZABLE)
@@ -163,6 +177,14 @@ class GameWindow:
             elif secondary_clicked(event):
                 game_log.debug(f'secondary key clicked at {event.pos}')
                 yield event
+            elif event.type in (KEYDOWN, KEYUP) and (event.key in SCROLL_KEYS or event.key in ZOOM_KEYS):
+                # scrolling and zooming are handled by the window itself (they are no game input)
+                if event.type == KEYDOWN and event.key in SCROLL_KEYS:
+                    dx, dy = SCROLL_KEYS[event.key]
+                    step = self.config.scroll_step * self.grid.block_size
+                    self.grid.shift(dx * step, dy * step)
+                elif event.type == KEYDOWN:
+                    self.grid.zoom(self.grid.zoom_level + ZOOM_KEYS[event.key])
             elif event.type == VIDEORESIZE:
                 game_log.debug(f'window resized')
                 self.realign(new_size=(event.w, event.h))
@@ -191,24 +213,62 @@ class Game:
         self.config = config
         
         self.game_window = GameWindow(config)
-        self.board = SquareBoard(self.game_window.grid, uniform_random(0.2), config)
+        self._board_pool: Optional[BoardPool] = None
+        self.trajectories: Optional[TrajectoryWriter] = None
+        self.agent = None
+        self.board = self._make_board()
         self.curr_state = self._new_game
         self.games_finished = 0
         self.games_completed = 0
 
+    ############################################################################
+    #                             Board Creation                               #
+    ############################################################################
+    
+    def _make_board(self):
+        board = self._new_board()
+        
+        # the board owns its (headless) grid state; the window's grid only renders it
+        self.game_window.grid.attach(board.grid)
+        return board
+    
+    def _new_board(self):
+        board_cls, _ = minesweeper.BOARD_REGISTRY[self.config.board]
+        size = self.game_window.grid.size
+        
+        if not self.config.no_guess:
+            return board_cls.create(size, 0.2, self.config)
+        
+        if board_cls is not SquareBoard:
+            raise ValueError(f'No-guess boards can only be generated for square boards, not {self.config.board} boards')
+        
+        # no-guess boards are pregenerated in the background, for the current grid size
+        if self._board_pool is None or self._board_pool.size != tuple(size):
+            if self._board_pool is not None:
+                self._board_pool.close()
+            self._board_pool = BoardPool(size, 0.2)
+        
+        board = SquareBoard(SquareGridState(size), self._board_pool.seeder(), self.config)
+        board.select(self._board_pool.start)
+        return board
+
     ############################################################################
     #                             State Functions                              #
     ############################################################################
     
     def _new_game(self, *args):
-        self.board = SquareBoard(self.game_window.grid, uniform_random(0.2), self.config)
+        self.board = self._make_board()
         self._last_reward = 0.
+        self._tick = 0
+        
+        if self.trajectories is not None:
+            self.trajectories.start_game(self.games_finished, self.board.open_layout, self.board.flag_layout)
         
         self.game_window.status_bar.update('')
         
         yield
         
-        if self.config.good_first_select:
+        if self.config.good_first_select and not self.config.no_guess:
             game_log.debug('Changing state: new_game --> first_select')
             return self._first_select
         else:
@@ -216,10 +276,20 @@ class Game:
             return self._playing
 
     def _first_select(self, *args):
+        if self.config.turbo:
+            # nobody is clicking: select a random cell
+            pos = tuple(random.randrange(length) for length in self.game_window.grid.size)
+            self.board.first_select(pos)
+            self._record(Action.select(pos), self.board.open_cells)
+            game_log.debug('Changing state: first_select --> playing')
+            return self._playing
+        
         while True:
             for event in self.game_window.events():
                 if primary_clicked(event) or secondary_clicked(event):
-                    self.board.first_select(self.game_window.grid.pos_of(event.pos))
+                    pos = self.game_window.grid.pos_of(event.pos)
+                    self.board.first_select(pos)
+                    self._record(Action.select(pos), self.board.open_cells)
                     game_log.debug('Changing state: first_select --> playing')
                     return self._playing
             
@@ -227,6 +297,7 @@ class Game:
 
     def _playing(self, *args):
         while True:
+            self._tick += 1
             actions = []
             add_action = actions.append
             cell_pos = self.game_window.grid.pos_of
@@ -250,33 +321,27 @@ class Game:
             if self.config.superchord == 'auto' and len(actions) > 0:
                 add_action(Action.superchord())
 
-            masked_proximity = self.board.proximity_matrix.copy()
-            masked_proximity[~self.board.open_layout] = 0
-            next_board_state = HiddenBoardState(
-                    openable_layout=~self.board.open_layout & ~self.board.flag_layout,
-                    flag_layout=self.board.flag_layout,
-                    proximity_matrix=masked_proximity)
-            
-            agent_actions = (yield next_board_state, self._last_reward)  # TODO change reward to status
+            # the (dense) hidden state is only built for an agent to act on
+            state = self.board.hidden_state() if self.agent is not None else None
+            agent_actions = (yield state, self._last_reward)  # TODO change reward to status
             if agent_actions is not None:
                 actions.extend(agent_actions)
     
             if any(map(lambda a: a.type == ActionType.SURRENDER, actions)):
+                self._record(Action.surrender(), 0)
                 game_log.debug('Changing state: playing --> game_end')
                 return self._game_end
         
-            # process all actions and determine next reward
+            # process all actions and determine next reward (opened cells are only counted while recording)
+            recording = self.trajectories is not None
             for action in actions:
-                if action.type == ActionType.SELECT:
-                    self.board.select(action.pos)
-                elif action.type == ActionType.FLAG:
-                    self.board.toggle_flag(action.pos)
-                elif action.type == ActionType.CHORD:
-                    self.board.chord(action.pos)
-                elif action.type == ActionType.SUPERCHORD:
-                    self.board.superchord()
-                else:
+                open_cells = self.board.open_cells if recording else 0
+                if not self.board.apply(action):
                     game_log.warning(f'Unknown action: {action}, skipping processing')
+                    continue
+                
+                if recording:
+                    self._record(action, self.board.open_cells - open_cells)
         
             # TODO determine feedback
             
@@ -299,11 +364,16 @@ class Game:
 
         # TODO add game end callbacks/hooks
         
-        logutils.save_board(f'game_user_{self.games_finished}.npz',
-                            self.board.mine_layout,
-                            self.board.open_layout,
-                            self.board.flag_layout)
+        if self.config.save_board_runs:
+            self.corpus.append(self.board.mine_layout, self.board.open_layout, self.board.flag_layout,
+                               self._outcome())
+        
+        if self.trajectories is not None:
+            self.trajectories.flush()
         
+        if self.config.turbo:
+            game_log.debug('Changing state: game_end --> new_game')
+            return self._new_game
         
         while True:
             for event in self.game_window.events():
@@ -313,6 +383,17 @@ class Game:
             
             yield
 
+    def _outcome(self):
+        return COMPLETED if self.board.completed else FAILED if self.board.failed else UNFINISHED
+    
+    def _record(self, action: Action, opened: int):
+        # the number of the game being played is the number of games finished before it
+        if self.trajectories is not None:
+            self.trajectories.record(self.games_finished, action, self._tick, opened, self._outcome(), self._layouts)
+    
+    def _layouts(self):
+        return self.board.open_layout, self.board.flag_layout
+    
     ############################################################################
     #                                Game Loop                                 #
     ############################################################################
@@ -320,14 +401,15 @@ class Game:
     def run(self, agent=None):
         tick_clock = Delayer(initial_fps=self.config.fps)
         
-        # TODO automake directory (maybe put into logutils)
-        _, _, files = next(os.walk('runs/'))
-        save_filename_pattern = re.compile(r'^game_user_(\d+).npz$')
-        for filename in files:
-            match = save_filename_pattern.match(filename)
-            self.games_finished = max(self.games_finished, int(match[1]))
-        self.games_finished += 1
+        # continue counting from the recorded games (only the small index of the corpus is read)
+        self.corpus = BoardCorpus(self.config.log_dir)
+        self.games_finished = len(self.corpus)
+        self.games_completed = int((self.corpus.outcomes == COMPLETED).sum())
+        
+        if self.config.save_trajectories:
+            self.trajectories = TrajectoryWriter(self.config.log_dir)
 
+        self.agent = agent
         if agent:
             agent.start(self.game_window.grid.size, self.config)
         
@@ -336,6 +418,10 @@ class Game:
         game_log.info('Starting the Minesweeper game.')
         tick_clock.tick_start()
         
+        # in turbo mode, the game runs as fast as possible and is only drawn every so often
+        turbo, render_every = self.config.turbo, self.config.render_every
+        ticks = 0
+        
         while True:
             state_generator = self.curr_state()
             try:
@@ -347,8 +433,12 @@ class Game:
                             reactive_state_status = state_generator.send(agent_actions)
                             agent.react(*reactive_state_status)
                     
-                    self.game_window.redraw()
-                    tick_clock.tick_delay()
+                    ticks += 1
+                    if not turbo:
+                        self.game_window.redraw()
+                        tick_clock.tick_delay()
+                    elif render_every > 0 and ticks % render_every == 0:
+                        self.game_window.redraw()
             except StopIteration as e:
                 self.curr_state = e.value
 
@@ -0,0 +1,514 @@
+import os
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pygame
+from pygame import Rect
+
+import minesweeper.boards  # the boards are registered before their grids
+from minesweeper import register_grid
+from minesweeper.board import Grid, GridRenderer
+from minesweeper.overview import HIDDEN_COLOR, OPEN_COLOR, BlockPyramid
+from minesweeper.tessellations import hex_polygons, polygons_extent, triangle_polygons
+
+
+# share of dirty cells from which the whole grid is composited in numpy, rather than blitted cell by cell
+FULL_REDRAW_FRACTION = 0.25
+
+# zoomed out, every zoom level shows blocks of OVERVIEW_FACTOR times as many cells per side (see overview.py)
+OVERVIEW_FACTOR = 4
+OVERVIEW_LEVELS = 4
+
+
+def dirty_rects(dirty: np.ndarray) -> List[Tuple[int, int, int, int]]:
+    """
+    Merges the dirty cells of a grid into few rectangles: dirty cells are first joined into horizontal row spans, and
+    spans that cover the same columns in consecutive rows into rectangles (a fully dirty grid is a single rectangle).
+    
+    :param dirty: boolean mask of the dirty cells, indexed [x, y]
+    :return: rectangles (x, y, w, h) in cells, covering exactly the dirty cells
+    """
+    # starts and ends of the runs of dirty cells in every row (spans are found in row order, left to right)
+    edges = np.diff(np.pad(dirty.T.astype(np.int8), ((0, 0), (1, 1))), axis=1)
+    starts, ends = np.argwhere(edges == 1), np.argwhere(edges == -1)
+    
+    rects = []
+    open_rects = {}  # (start, end) of the spans that can still grow downwards -> index in rects
+    for (y, start), (_, end) in zip(starts.tolist(), ends.tolist()):
+        index = open_rects.get((start, end))
+        if index is not None and rects[index][1] + rects[index][3] == y:
+            x, top, w, h = rects[index]
+            rects[index] = x, top, w, h + 1
+        else:
+            open_rects[start, end] = len(rects)
+            rects.append((start, y, end - start, 1))
+    
+    return rects
+
+
+################################################################################
+#                                    Square                                    #
+################################################################################
+
+@register_grid('square')
+class SquareGrid(GridRenderer):
+    """
+    Renders a square grid onto a pygame surface. The grid state itself lives in a (headless) SquareGridState that is
+    attached to the renderer; the renderer only listens to its changes.
+    
+    Only the cells that fit on screen are drawn (the view), so grids far larger than the window can be scrolled through
+    (see shift) at a cost that only depends on the size of the view.
+    
+    Zoomed out (see zoom), blocks of cells are drawn as single colors instead, from block aggregates of the grid's state
+    that are kept up to date with every change, so even overviews of millions of cells cost almost nothing per frame.
+    """
+    
+    def __init__(self, screen: pygame.Surface, available_rect: pygame.Rect, config):
+        # save parameters and pre-load assets/resources
+        self._screen = screen
+        self._config = config
+        self._state = None
+        self._zoom = 0
+        self._load_cells()
+        
+        self.resize(screen, available_rect)
+    
+    def _load_cells(self):
+        from pygame.transform import smoothscale
+        
+        load_image = pygame.image.load
+        
+        font = pygame.font.Font(pygame.font.match_font('arial', bold=True), 24)
+        
+        self.cell_size = np.array(self._config.cell_size)
+        center = self.cell_size // 2
+        
+        hidden_base_file = os.path.join(self._config.res_dir, self._config.hidden_cell_file)
+        open_base_file = os.path.join(self._config.res_dir, self._config.open_cell_file)
+        
+        hidden_base = smoothscale(load_image(hidden_base_file).convert_alpha(), self.cell_size)
+        open_base = smoothscale(load_image(open_base_file).convert_alpha(), self.cell_size)
+        
+        self._hidden_image = hidden_base.copy()
+        
+        self._flag_image = hidden_base.copy()
+        flag = font.render('F', True, (255, 0, 0))
+        flag_rect = flag.get_rect()
+        flag_rect.center = center
+        self._flag_image.blit(flag, flag_rect)
+        
+        self._open_images = [open_base.copy() for _ in range(10)]
+        for num in range(1, 9):
+            text = font.render(str(num), True, (255, 0, 0))
+            text_rect = text.get_rect()
+            text_rect.center = center
+            
+            self._open_images[num].blit(text, text_rect)
+        
+        mine = font.render('*', True, (255, 0, 0))
+        mine_rect = mine.get_rect()
+        mine_rect.center = center
+        self._open_images[-1].blit(mine, mine_rect)
+        
+        # the same tiles as one pixel array of shape (tiles, cell_x, cell_y, 3), composited over the background
+        self._atlas = np.stack([SquareGrid._pixels(image, self._config.bg_color)
+                                for image in [*self._open_images, self._hidden_image, self._flag_image]])
+        self._tile_images = [pygame.surfarray.make_surface(tile).convert() for tile in self._atlas]
+    
+    @staticmethod
+    def _pixels(image: pygame.Surface, background) -> np.ndarray:
+        tile = pygame.Surface(image.get_size())
+        tile.fill(background)
+        tile.blit(image, (0, 0))
+        return pygame.surfarray.array3d(tile)
+    
+    ############################################################################
+    #                            Grid-Wide Changes                             #
+    ############################################################################
+    
+    def attach(self, grid: Grid):
+        """Starts rendering (and listening to) the given grid state, instead of the previously attached one."""
+        assert tuple(grid.size) == tuple(self._size)
+        
+        if self._state is not None:
+            self._state.remove_listener(self)
+        
+        self._state = grid
+        self._state.add_listener(self)
+        
+        if self._pyramid is not None:
+            self._pyramid.rebuild(grid)
+        self._dirty.fill(True)
+    
+    def realign(self, screen, available_rect: Rect):
+        self._screen = screen
+        self._fit_view(available_rect)
+    
+    def resize(self, screen, available_rect: Rect):
+        self._screen = screen
+        
+        # the board is as large as configured, or as large as fits on screen
+        fitting_size = tuple(int(length) for length in np.array(available_rect.size) // self.cell_size)
+        grid_size = tuple(self._config.board_size) if self._config.board_size else fitting_size
+        
+        # a differently sized grid state can no longer be shown
+        if self._state is not None and tuple(self._state.size) != grid_size:
+            self._state.remove_listener(self)
+            self._state = None
+        
+        self._size = grid_size
+        self._pyramid = None if self._zoom == 0 else BlockPyramid(grid_size, OVERVIEW_LEVELS, OVERVIEW_FACTOR)
+        self._offset = np.zeros(2, dtype=int)
+        self._fit_view(available_rect)
+    
+    def _fit_view(self, available_rect: Rect):
+        """Shows as many cells (or blocks) of the grid as fit into the available screen real estate (see shift)."""
+        self._available_rect = available_rect
+        
+        # size of the drawn units: cells, or blocks of cells when zoomed out
+        block_size = self.block_size
+        self._unit_size = self.cell_size if self._zoom == 0 else np.maximum(1, self.cell_size // OVERVIEW_FACTOR)
+        units = -(-np.array(self._size) // block_size)
+        
+        self._view = np.minimum(np.array(available_rect.size) // self._unit_size, units)
+        self._used_rect = Rect((0, 0), tuple(int(length) for length in self._view * self._unit_size))
+        self._used_rect.center = available_rect.center
+        self._offset = self._clipped(self._offset)
+        
+        # visible units still to be redrawn (an initial draw of the whole view is forced)
+        self._dirty = np.ones(tuple(self._view), dtype=bool)
+    
+    def _clipped(self, offset) -> np.ndarray:
+        # the view stays within the grid, and starts at a whole block
+        offset = np.clip(offset, 0, np.maximum(0, np.array(self._size) - self._view * self.block_size))
+        return offset // self.block_size * self.block_size
+    
+    def shift(self, dx, dy):
+        """Scrolls the visible part of the grid by the given number of cells (as far as the grid extends)."""
+        offset = self._clipped(self._offset + (dx, dy))
+        
+        if np.any(offset != self._offset):
+            self._offset = offset
+            self._dirty.fill(True)
+    
+    def zoom(self, level: int):
+        """
+        Zooms out to the given level, keeping the center of the view: at level 0, every cell is drawn; at every further
+        level, blocks of OVERVIEW_FACTOR times as many cells per side are drawn as single colors.
+        """
+        level = int(np.clip(level, 0, OVERVIEW_LEVELS))
+        if level == self._zoom:
+            return
+        
+        # the block aggregates are only kept once needed
+        if level > 0 and self._pyramid is None:
+            self._pyramid = BlockPyramid(self._size, OVERVIEW_LEVELS, OVERVIEW_FACTOR)
+            if self._state is not None:
+                self._pyramid.rebuild(self._state)
+        
+        center = self._offset + self._view * self.block_size // 2
+        self._zoom = level
+        self._fit_view(self._available_rect)
+        self._offset = self._clipped(center - self._view * self.block_size // 2)
+    
+    ############################################################################
+    #                                Listening                                 #
+    ############################################################################
+    
+    def cells_changed(self, positions):
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        if self._pyramid is not None:
+            self._pyramid.update(self._state, positions)
+        
+        # only visible units are redrawn, and units changed repeatedly (e.g. by overlapping flood fills) only once
+        units = (positions - self._offset) // self.block_size
+        visible = np.all((units >= 0) & (units < self._view), axis=1)
+        self._dirty[units[visible, 0], units[visible, 1]] = True
+    
+    def grid_refilled(self):
+        if self._pyramid is not None:
+            self._pyramid.rebuild(self._state)
+        self._dirty.fill(True)
+    
+    ############################################################################
+    #                                 Queries                                  #
+    ############################################################################
+    
+    @property
+    def rect(self):
+        return self._used_rect
+    
+    @property
+    def size(self):
+        return self._size
+    
+    @property
+    def view(self):
+        """Visible part of the grid, as the slices of its cells."""
+        return tuple(slice(int(start), int(min(start + length * self.block_size, size)))
+                     for start, length, size in zip(self._offset, self._view, self._size))
+    
+    @property
+    def zoom_level(self) -> int:
+        return self._zoom
+    
+    @property
+    def block_size(self) -> int:
+        """Number of cells per side of the drawn units (1 unless zoomed out)."""
+        return OVERVIEW_FACTOR ** self._zoom
+    
+    def pos_of(self, coords):
+        return int(self._offset[0] + (coords[0] - self._used_rect.left) // self._unit_size[0] * self.block_size), \
+               int(self._offset[1] + (coords[1] - self._used_rect.top) // self._unit_size[1] * self.block_size)
+    
+    ############################################################################
+    #                                 Graphics                                 #
+    ############################################################################
+    
+    def _tiles(self, xs, ys) -> np.ndarray:
+        """
+        :return: indices into the tile atlas (0-9: open, 10: hidden, 11: flagged) of the cells at the given coordinates
+        """
+        state = self._state
+        # open cells show their number (the mine tile is the last of the open tiles, at proximity -1)
+        return np.where(state.open[xs, ys], state.proximity[xs, ys] % 10, 10 + state.flags[xs, ys])
+    
+    def redraw(self):
+        dirty, self._dirty = self._dirty, np.zeros_like(self._dirty)
+        if self._state is None or not np.any(dirty):
+            return []
+        
+        if self._zoom > 0:
+            self._draw_overview()
+            return [self._used_rect]
+        
+        xs, ys = np.nonzero(dirty)
+        if len(xs) >= FULL_REDRAW_FRACTION * dirty.size:
+            self._composite()
+            return [self._used_rect]
+        
+        # every dirty cell is drawn once, in a single call
+        tiles = self._tiles(xs + self._offset[0], ys + self._offset[1])
+        ref_x, ref_y = self._used_rect.topleft
+        cell_x, cell_y = self.cell_size.tolist()
+        self._screen.blits([(self._tile_images[tile], (ref_x + x * cell_x, ref_y + y * cell_y))
+                            for x, y, tile in zip(xs.tolist(), ys.tolist(), tiles.tolist())],
+                           doreturn=False)
+        
+        # only a few merged rectangles are updated on the display
+        return [Rect(ref_x + x * cell_x, ref_y + y * cell_y, w * cell_x, h * cell_y) for x, y, w, h in dirty_rects(dirty)]
+    
+    def _composite(self):
+        """Draws the whole view at once, as a frame gathered from the tile atlas (instead of one blit per cell)."""
+        (width, height), (cell_x, cell_y) = self._view, self.cell_size
+        
+        # (W, H, cell_x, cell_y, 3) tiles of the visible cells -> (W * cell_x, H * cell_y, 3) pixels
+        tiles = self._atlas[self._tiles(*self.view)]
+        frame = tiles.transpose(0, 2, 1, 3, 4).reshape(width * cell_x, height * cell_y, 3)
+        
+        pygame.surfarray.blit_array(self._screen.subsurface(self._used_rect), frame)
+    
+    def _draw_overview(self):
+        """Draws the visible blocks as one pixel array, with a color per block."""
+        start = self._offset // self.block_size
+        window = tuple(slice(int(first), int(first + length)) for first, length in zip(start, self._view))
+        colors = self._pyramid.colors(self._zoom, window)
+        
+        unit_x, unit_y = self._unit_size
+        frame = np.repeat(np.repeat(colors, unit_x, axis=0), unit_y, axis=1)
+        pygame.surfarray.blit_array(self._screen.subsurface(self._used_rect), frame)
+
+
+# chunked grids are indexed like square ones, and only the cells in view are ever read
+register_grid('chunked')(SquareGrid)
+
+# a torus is a square grid whose edges are adjacent, which does not change how its cells are drawn
+register_grid('torus')(SquareGrid)
+
+
+################################################################################
+#                                   Polygons                                   #
+################################################################################
+
+class PolygonGrid(GridRenderer):
+    """
+    Renders a grid of polygonal cells (e.g. hexagons or triangles, see minesweeper.tessellations) onto a pygame surface,
+    drawing every cell as a filled polygon. Like SquareGrid, it renders an attached (headless) SquareGridState and only
+    redraws the cells that changed; the whole grid is always in view (scaled down to fit, if needed).
+    
+    Subclasses give the vertices of the cells, in units of one cell_size[0] pixels.
+    """
+    
+    # (W, H, V, 2) vertices of the cells of a grid of the given size
+    polygons: Callable[[Tuple[int, int]], np.ndarray] = None
+    
+    # distance between adjacent cells along both axes (in units), to estimate how many cells fit on screen
+    pitch: Tuple[float, float] = (1, 1)
+    
+    def __init__(self, screen: pygame.Surface, available_rect: pygame.Rect, config):
+        self._screen = screen
+        self._config = config
+        self._state = None
+        self.cell_size = np.array(config.cell_size)
+        
+        self.resize(screen, available_rect)
+    
+    ############################################################################
+    #                            Grid-Wide Changes                             #
+    ############################################################################
+    
+    def attach(self, grid: Grid):
+        """Starts rendering (and listening to) the given grid state, instead of the previously attached one."""
+        assert tuple(grid.size) == tuple(self._size)
+        
+        if self._state is not None:
+            self._state.remove_listener(self)
+        
+        self._state = grid
+        self._state.add_listener(self)
+        self._dirty.fill(True)
+    
+    def realign(self, screen, available_rect: Rect):
+        self._screen = screen
+        self._fit(available_rect)
+    
+    def resize(self, screen, available_rect: Rect):
+        self._screen = screen
+        
+        grid_size = tuple(self._config.board_size) if self._config.board_size else self._fitting_size(available_rect)
+        
+        # a differently sized grid state can no longer be shown
+        if self._state is not None and tuple(self._state.size) != grid_size:
+            self._state.remove_listener(self)
+            self._state = None
+        
+        self._size = grid_size
+        self._fit(available_rect)
+    
+    def _fitting_size(self, available_rect: Rect) -> Tuple[int, int]:
+        # estimated from the pitch, then shrunk until the cells (which may stick out at the edges) fit
+        available = np.array(available_rect.size) / self.cell_size[0]
+        size = np.maximum(1, (available / self.pitch).astype(int))
+        for axis in range(2):
+            while size[axis] > 1 and polygons_extent(type(self).polygons(tuple(size)))[axis] > available[axis]:
+                size[axis] -= 1
+        return tuple(int(length) for length in size)
+    
+    def _fit(self, available_rect: Rect):
+        """Scales the grid to the configured cell size (or down to the available screen real estate) and centers it."""
+        polygons = type(self).polygons(self._size)
+        extent = polygons_extent(polygons)
+        scale = min(self.cell_size[0], *(np.array(available_rect.size) / extent))
+        
+        self._used_rect = Rect((0, 0), tuple(int(length) for length in np.ceil(extent * scale)))
+        self._used_rect.center = available_rect.center
+        
+        self._vertices = polygons * scale + self._used_rect.topleft
+        self._centers = self._vertices.mean(axis=2)
+        
+        # screen rectangles of the cells (to update on the display) and the cell labels, at the current scale
+        corners = np.floor(self._vertices.min(axis=2)).astype(int), np.ceil(self._vertices.max(axis=2)).astype(int)
+        self._bounds = np.concatenate([corners[0], corners[1] - corners[0] + 1], axis=-1)
+        self._load_labels(max(6, int(scale * 0.5)))
+        
+        self._dirty = np.ones(self._size, dtype=bool)
+    
+    def _load_labels(self, font_size: int):
+        # labels are rendered once, when first drawn
+        self._font = pygame.font.Font(pygame.font.match_font('arial', bold=True), font_size)
+        self._labels = {}
+    
+    def shift(self, dx, dy):
+        # the whole grid is always in view
+        pass
+    
+    ############################################################################
+    #                                Listening                                 #
+    ############################################################################
+    
+    def cells_changed(self, positions):
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        self._dirty[positions[:, 0], positions[:, 1]] = True
+    
+    def grid_refilled(self):
+        self._dirty.fill(True)
+    
+    ############################################################################
+    #                                 Queries                                  #
+    ############################################################################
+    
+    @property
+    def rect(self):
+        return self._used_rect
+    
+    @property
+    def size(self):
+        return self._size
+    
+    def pos_of(self, coords):
+        # the cell containing the point is among those with the nearest centers (the nearest one, if it is in none)
+        distances = np.sum((self._centers - coords) ** 2, axis=-1).ravel()
+        candidates = np.argsort(distances)[:4]
+        for index in candidates:
+            pos = np.unravel_index(index, self._size)
+            if self._contains(self._vertices[pos], coords):
+                break
+        else:
+            pos = np.unravel_index(candidates[0], self._size)
+        return int(pos[0]), int(pos[1])
+    
+    @staticmethod
+    def _contains(vertices: np.ndarray, point) -> bool:
+        # a point is inside a convex polygon if it is on the same side of all its edges
+        edges = np.roll(vertices, -1, axis=0) - vertices
+        offsets = np.asarray(point) - vertices
+        sides = edges[:, 0] * offsets[:, 1] - edges[:, 1] * offsets[:, 0]
+        return bool(np.all(sides >= 0) or np.all(sides <= 0))
+    
+    ############################################################################
+    #                                 Graphics                                 #
+    ############################################################################
+    
+    def redraw(self):
+        dirty, self._dirty = self._dirty, np.zeros_like(self._dirty)
+        if self._state is None or not np.any(dirty):
+            return []
+        
+        xs, ys = np.nonzero(dirty)
+        for x, y in zip(xs.tolist(), ys.tolist()):
+            self._draw_cell((x, y))
+        
+        if len(xs) >= FULL_REDRAW_FRACTION * dirty.size:
+            return [self._used_rect]
+        return [Rect(*self._bounds[x, y]) for x, y in zip(xs.tolist(), ys.tolist())]
+    
+    def _draw_cell(self, pos):
+        state = self._state
+        vertices = self._vertices[pos]
+        
+        if state.open[pos]:
+            color, proximity = OPEN_COLOR, int(state.proximity[pos])
+            label = '*' if proximity < 0 else str(proximity) if proximity > 0 else None
+        else:
+            color, label = HIDDEN_COLOR, 'F' if state.flags[pos] else None
+        
+        pygame.draw.polygon(self._screen, color.tolist(), vertices)
+        pygame.draw.polygon(self._screen, self._config.bg_color, vertices, 1)
+        
+        if label is not None:
+            text = self._labels.get(label)
+            if text is None:
+                text = self._labels[label] = self._font.render(label, True, (255, 0, 0))
+            self._screen.blit(text, text.get_rect(center=tuple(self._centers[pos])))
+
+
+@register_grid('hex')
+class HexGrid(PolygonGrid):
+    polygons = staticmethod(hex_polygons)
+    pitch = (1, np.sqrt(3) / 2)
+
+
+@register_grid('triangle')
+class TriangleGrid(PolygonGrid):
+    polygons = staticmethod(triangle_polygons)
+    pitch = (0.5, np.sqrt(3) / 2)
@@ -0,0 +1,202 @@
+import math
+import sys
+from functools import lru_cache
+from time import perf_counter
+from typing import Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+
+# Neighbor counts (the number of set cells among the 8 adjacent cells of every cell) are the core kernel of the boards,
+# the rules agents and superchords. Every backend counts a (W, H) layout or an (N, W, H) stack of layouts into uint8,
+# optionally into a given output buffer (so that hot loops do not allocate), and is exact: the backends only differ in
+# speed, which depends on the size of the layouts. The fastest one is measured once per size class (see best_backend).
+
+Backend = Callable[[np.ndarray, Optional[np.ndarray]], np.ndarray]
+
+# the 8 adjacent cells of a cell
+KERNEL = np.array([[1, 1, 1],
+                   [1, 0, 1],
+                   [1, 1, 1]], dtype=np.uint8)
+
+# number of timed runs per backend in the microbenchmark (the fastest run counts)
+BENCHMARK_RUNS = 3
+
+
+def _as_uint8(layout: np.ndarray) -> np.ndarray:
+    layout = np.asarray(layout)
+    return layout.view(np.uint8) if layout.dtype == bool else layout.astype(np.uint8, copy=False)
+
+
+def _output(layout: np.ndarray, out: Optional[np.ndarray]) -> np.ndarray:
+    if out is None:
+        return np.empty(layout.shape, dtype=np.uint8)
+    
+    assert out.shape == layout.shape and out.dtype.itemsize == 1
+    return out.view(np.uint8)
+
+
+################################################################################
+#                                   Backends                                   #
+################################################################################
+
+def slice_counts(layout: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Sums shifted slices of the zero-padded layout in uint8: first the 3 cells of every column, then 3 columns, minus the
+    cell itself (5 additions instead of 8).
+    """
+    values = _as_uint8(layout)
+    result = _output(values, out)
+    
+    # (np.pad is far slower for small layouts)
+    padded = np.zeros(values.shape[:-2] + (values.shape[-2] + 2, values.shape[-1] + 2), dtype=np.uint8)
+    padded[..., 1:-1, 1:-1] = values
+    columns = padded[..., :-2, :] + padded[..., 1:-1, :]
+    columns += padded[..., 2:, :]
+    
+    np.add(columns[..., :-2], columns[..., 1:-1], out=result)
+    result += columns[..., 2:]
+    result -= values
+    return result
+
+
+def ndimage_counts(layout: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Correlates the layout with the 3x3 neighborhood kernel using scipy.ndimage (zeros beyond the edges)."""
+    from scipy.ndimage import correlate
+    
+    values = _as_uint8(layout)
+    result = _output(values, out)
+    
+    correlate(values, KERNEL.reshape((1,) * (values.ndim - 2) + KERNEL.shape), output=result, mode='constant', cval=0)
+    return result
+
+
+def signal_counts(layout: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Convolves a single layout with the 3x3 neighborhood kernel using scipy.signal (fastest for tiny layouts)."""
+    from scipy.signal import convolve2d
+    
+    values = _as_uint8(layout)
+    result = _output(values, out)
+    
+    result[...] = convolve2d(values, KERNEL, mode='same', boundary='fill')
+    return result
+
+
+@lru_cache(maxsize=1)
+def _torch_kernel():
+    import torch
+    
+    return torch.from_numpy(KERNEL.astype(np.float32)).reshape(1, 1, 3, 3)
+
+
+def torch_counts(layout: np.ndarray, out: Optional[np.ndarray] = None) -> np.ndarray:
+    """Counts all layouts of a stack as one batch of torch.nn.functional.conv2d (on the CPU, in float32)."""
+    import torch
+    from torch.nn.functional import conv2d
+    
+    values = _as_uint8(layout)
+    result = _output(values, out)
+    
+    stack = torch.from_numpy(np.ascontiguousarray(values).reshape(-1, 1, *values.shape[-2:])).to(torch.float32)
+    counts = conv2d(stack, _torch_kernel(), padding=1)
+    result[...] = counts.to(torch.uint8).numpy().reshape(values.shape)
+    return result
+
+
+BACKENDS: Dict[str, Backend] = {
+    'slices': slice_counts,
+    'ndimage': ndimage_counts,
+    'signal': signal_counts,
+    'torch': torch_counts,
+}
+
+# backends that only count single (W, H) layouts, and backends only worth it for (N, W, H) stacks
+SINGLE_BACKENDS = ('signal',)
+STACK_BACKENDS = ('torch',)
+
+
+################################################################################
+#                              Backend Selection                               #
+################################################################################
+
+def available_backends(stacked: bool) -> Tuple[str, ...]:
+    """
+    :param stacked: whether the layouts are (N, W, H) stacks, rather than single (W, H) layouts
+    :return: names of the backends to consider: torch is only used once it was imported anyway (e.g. by an agent), so
+             that headless modules never load it
+    """
+    excluded = SINGLE_BACKENDS if stacked else STACK_BACKENDS
+    return tuple(name for name in BACKENDS
+                 if name not in excluded and (name != 'torch' or 'torch' in sys.modules))
+
+
+# fastest backend per (stacked, size class, torch loaded), measured once
+_best_backends: Dict[Tuple[bool, int, bool], str] = {}
+
+
+def best_backend(shape: Tuple[int, ...]) -> str:
+    """
+    :param shape: shape of the layouts to count, (W, H) or (N, W, H)
+    :return: name of the fastest available backend for layouts of that size, measured once per size class (layouts
+             with the same power of 2 of cells)
+    """
+    key = len(shape) > 2, math.prod(shape).bit_length(), 'torch' in sys.modules
+    backend = _best_backends.get(key)
+    if backend is None:
+        backend = _best_backends[key] = _benchmark(key[0], key[1], available_backends(key[0]))
+    return backend
+
+
+def _benchmark(stacked: bool, bits: int, backends: Tuple[str, ...]) -> str:
+    # a representative random layout of the size class (square, or a stack of 16 square layouts)
+    count = 16 if stacked else 1
+    side = max(3, int(np.sqrt(2 ** max(0, bits - 1) / count)))
+    layout = np.random.default_rng(0).uniform(size=(count, side, side) if stacked else (side, side)) < 0.2
+    out = np.empty(layout.shape, dtype=np.uint8)
+    
+    timings = {}
+    for name in backends:
+        BACKENDS[name](layout, out)  # warmup (e.g. lazy imports)
+        runs = []
+        for _ in range(BENCHMARK_RUNS):
+            start = perf_counter()
+            BACKENDS[name](layout, out)
+            runs.append(perf_counter() - start)
+        timings[name] = min(runs)
+    
+    return min(timings, key=timings.get)
+
+
+################################################################################
+#                                   Kernels                                    #
+################################################################################
+
+def count_neighbors(layout: np.ndarray, out: Optional[np.ndarray] = None, backend: Optional[str] = None) -> np.ndarray:
+    """
+    :param layout: boolean (or 0/1) (W, H) layout, or (N, W, H) stack of layouts
+    :param out: uint8 (or int8) output buffer of the same shape, or None to allocate one
+    :param backend: name of the backend to use (see BACKENDS), or None for the fastest one
+    :return: number of set cells among the 8 adjacent cells of every cell, as uint8 (out, if given)
+    """
+    layout = np.asarray(layout)
+    counts = BACKENDS[backend or best_backend(layout.shape)](layout, out)
+    return counts if out is None else out
+
+
+def proximity(mines: np.ndarray, out: Optional[np.ndarray] = None, backend: Optional[str] = None) -> np.ndarray:
+    """
+    :param mines: boolean (W, H) mine layout, or (N, W, H) stack of mine layouts
+    :param out: int8 output buffer of the same shape, or None to allocate one
+    :param backend: name of the backend to use (see BACKENDS), or None for the fastest one
+    :return: proximity matrix as int8: the number of adjacent mines of every cell, -1 for mines
+    """
+    mines = np.asarray(mines, dtype=bool)
+    if out is None:
+        out = np.empty(mines.shape, dtype=np.int8)
+    
+    # counts (0-8) are the same in uint8 and int8, so they are written straight into the output
+    count_neighbors(mines, out.view(np.uint8), backend)
+    
+    # mines are set to -1 (all bits set) without a (slow) boolean mask assignment
+    np.bitwise_or(out, np.negative(mines.view(np.int8)), out=out)
+    return out
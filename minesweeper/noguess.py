@@ -0,0 +1,173 @@
+import multiprocessing
+import sys
+from typing import Optional, Tuple
+
+import numpy as np
+
+from minesweeper.boards import SquareBoard, SquareGridState
+from minesweeper.seeders import Seeder, uniform_random
+from minesweeper.solvers import FrontierSolver
+
+
+class _Config:
+    forgiveness = 0
+
+
+def default_start(game_size: Tuple[int, int]) -> Tuple[int, int]:
+    return game_size[0] // 2, game_size[1] // 2
+
+
+def solvable(layout: np.ndarray, start: Tuple[int, int], solver: FrontierSolver = None) -> bool:
+    """
+    Plays a board with deductions only (no guessing), starting by opening the start cell.
+    
+    :param layout: mine layout of the board
+    :param start: position of the first select (must not be a mine)
+    :param solver: solver to deduce with (default: a new, single-process solver)
+    :return: whether every safe cell can be opened without ever guessing
+    """
+    if layout[start]:
+        return False
+    
+    solver = solver or FrontierSolver(parallel_threshold=sys.maxsize)
+    board = SquareBoard(SquareGridState(layout.shape), lambda size: layout.copy(), _Config)
+    board.select(start)
+    
+    while not board.completed:
+        state = board.hidden_state()
+        
+        # cheap linear deductions first, exact (and endgame) probabilities only if those are stuck
+        safe, mines = solver.deduce(state)
+        if not np.any(safe | mines):
+            solution = solver.solve(state)
+            safe, mines = solution.safe, solution.mines
+        
+        safe, mines = safe & state.openable_layout, mines & state.openable_layout
+        if not np.any(safe | mines):
+            return False
+        
+        for pos in np.argwhere(mines):
+            board.toggle_flag(tuple(pos))
+        for pos in np.argwhere(safe):
+            board.select(tuple(pos))
+    
+    return True
+
+
+def no_guess(seeder: Seeder, start: Optional[Tuple[int, int]] = None, max_attempts: int = 10_000) -> Seeder:
+    """
+    Rejection sampling of boards that can be solved without guessing. The cells around the start cell are always
+    cleared of mines (as with a good first select), so the start cell opens a region and the density is slightly lower
+    than that of the underlying seeder.
+    
+    :param seeder: seeder of the candidate layouts
+    :param start: position of the first select (default: the center of the board)
+    :param max_attempts: number of candidates to try per layout before giving up
+    """
+    solver = FrontierSolver(parallel_threshold=sys.maxsize)
+    
+    def seeder_no_guess(game_size: (int, int), batch: Optional[int] = None) -> np.ndarray:
+        start_pos = start or default_start(game_size)
+        cleared = tuple(slice(max(0, coord - 1), coord + 2) for coord in start_pos)
+        
+        layouts = []
+        for _ in range(1 if batch is None else batch):
+            for _ in range(max_attempts):
+                layout = seeder(game_size)
+                layout[cleared] = False
+                if solvable(layout, start_pos, solver):
+                    layouts.append(layout)
+                    break
+            else:
+                raise RuntimeError(f'No board solvable without guessing in {max_attempts} attempts')
+        
+        return layouts[0] if batch is None else np.stack(layouts)
+    
+    return seeder_no_guess
+
+
+################################################################################
+#                                  Board Pool                                  #
+################################################################################
+
+def _generate(queue: multiprocessing.Queue, size: Tuple[int, int], mine_prob: float, start: Tuple[int, int],
+              seed: np.random.SeedSequence):
+    # worker process: keeps the pool full (put blocks while the pool is at capacity)
+    seeder = no_guess(uniform_random(mine_prob, seed), start)
+    while True:
+        queue.put(np.packbits(seeder(size)))
+
+
+class BoardPool:
+    """
+    A bounded, in-memory pool of pregenerated no-guess boards, kept full by background worker processes, so that new
+    games can take a ready board instead of waiting for rejection sampling. All boards are solvable from the same
+    start cell, which should be opened (selected) first.
+    
+    Typical Code Usage:
+        with BoardPool((30, 16), 0.15) as pool:
+            board = SquareBoard(grid, pool.seeder(), config)
+            board.select(pool.start)
+    """
+    
+    def __init__(self, size: Tuple[int, int], mine_prob: float, capacity: int = 32, workers: Optional[int] = None,
+                 seed: Optional[int] = None, start: Optional[Tuple[int, int]] = None):
+        """
+        :param size: size of the boards, in cells
+        :param mine_prob: mine density of the candidate boards
+        :param capacity: largest number of boards kept ready
+        :param workers: number of generating processes (default: all but one CPU)
+        :param seed: seed of the generated boards (every worker gets its own, spawned seed)
+        :param start: position of the first select (default: the center of the board)
+        """
+        self.size = tuple(size)
+        self.start = start or default_start(self.size)
+        
+        workers = workers or max(1, multiprocessing.cpu_count() - 1)
+        seeds = np.random.SeedSequence(seed)
+        
+        # fresh (spawned) workers do not inherit the state of the game, e.g. pygame's signal handlers
+        context = multiprocessing.get_context('spawn')
+        self._queue = context.Queue(maxsize=capacity)
+        self._workers = [context.Process(target=_generate,
+                                         args=(self._queue, self.size, mine_prob, self.start, worker_seed),
+                                         daemon=True)
+                         for worker_seed in seeds.spawn(workers)]
+        for worker in self._workers:
+            worker.start()
+    
+    def get(self, timeout: Optional[float] = None) -> np.ndarray:
+        """
+        :param timeout: longest time to wait for a board (in seconds, default: forever)
+        :return: mine layout of the next ready board
+        """
+        packed = self._queue.get(timeout=timeout)
+        return np.unpackbits(packed, count=self.size[0] * self.size[1]).reshape(self.size).astype(bool)
+    
+    def seeder(self) -> Seeder:
+        """
+        :return: seeder taking its layouts from the pool
+        """
+        
+        def seeder_from_pool(game_size: (int, int), batch: Optional[int] = None) -> np.ndarray:
+            if tuple(game_size) != self.size:
+                raise ValueError(f'Pool boards are {self.size}, not {tuple(game_size)}')
+            
+            return self.get() if batch is None else np.stack([self.get() for _ in range(batch)])
+        
+        return seeder_from_pool
+    
+    def close(self):
+        for worker in self._workers:
+            worker.terminate()
+        for worker in self._workers:
+            worker.join()
+        
+        self._workers = []
+        self._queue.close()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,140 @@
+from typing import List, Tuple
+
+import numpy as np
+
+from minesweeper.chunks import ChunkedArray
+
+
+# aggregated cell states, counted per block
+OPEN, FLAGGED, EXPLODED = 0, 1, 2
+CHANNELS = 3
+
+# colors of blocks of only hidden, only open and only flagged cells (blocks are blended between these), and of blocks
+# with an exploded mine
+HIDDEN_COLOR = np.array([110, 110, 110])
+OPEN_COLOR = np.array([225, 225, 225])
+FLAGGED_COLOR = np.array([230, 40, 40])
+EXPLODED_COLOR = np.array([0, 0, 0])
+
+
+class BlockPyramid:
+    """
+    Block aggregates of a grid's state: for every block of factor^level x factor^level cells (at levels 1, 2, ...) the
+    number of open, flagged and exploded (open mine) cells in it. Each level is summed from the factor x factor blocks of the
+    level below, like a mipmap pyramid.
+    
+    The pyramid is updated incrementally from the changed cells: only the blocks containing them (at every level) are
+    recounted. The levels are chunked arrays, so for huge grids only the blocks around touched cells are allocated.
+    """
+    
+    def __init__(self, size: Tuple[int, int], levels: int = 4, factor: int = 4):
+        """
+        :param size: size of the grid, in cells
+        :param levels: number of levels (the largest blocks are factor^levels cells per side)
+        :param factor: number of blocks per side of a block of the next level
+        """
+        self.size = tuple(size)
+        self.factor = factor
+        self.levels: List[List[ChunkedArray]] = []
+        
+        # offsets of the cells (or lower-level blocks) within a block
+        self._offsets = np.stack(np.meshgrid(np.arange(factor), np.arange(factor), indexing='ij'), -1).reshape(-1, 2)
+        
+        for level in range(1, levels + 1):
+            level_size = self.level_size(level)
+            self.levels.append([ChunkedArray(level_size, dtype=np.int32) for _ in range(CHANNELS)])
+    
+    def block_size(self, level: int) -> int:
+        """
+        :return: number of cells per side of the blocks of a level
+        """
+        return self.factor ** level
+    
+    def level_size(self, level: int) -> Tuple[int, int]:
+        """
+        :return: number of blocks of a level (along both axes)
+        """
+        return tuple(-(-length // self.block_size(level)) for length in self.size)
+    
+    ############################################################################
+    #                                 Updates                                  #
+    ############################################################################
+    
+    def rebuild(self, grid):
+        """Recounts all blocks, from a grid's marked (open or flagged) cells."""
+        self.levels = [[ChunkedArray(channel.size, dtype=np.int32) for channel in channels] for channels in self.levels]
+        self.update(grid, grid.marked_positions())
+    
+    def update(self, grid, positions):
+        """
+        Recounts the blocks containing the given cells, at every level.
+        
+        :param grid: the grid (state) with the changed cells, indexed like SquareGridState
+        :param positions: positions of the changed cells
+        """
+        positions = np.asarray(positions, dtype=np.intp).reshape(-1, 2)
+        if len(positions) == 0:
+            return
+        
+        # the lowest level is counted from the cells themselves
+        blocks = np.unique(positions // self.factor, axis=0)
+        cells, valid = self._children(blocks, self.size)
+        xs, ys = cells[valid].T
+        
+        opened = grid.open[xs, ys]
+        exploded = np.zeros_like(opened)
+        exploded[opened] = grid.proximity[xs[opened], ys[opened]] < 0
+        counts = self._sum_children([opened, grid.flags[xs, ys], exploded], valid)
+        self._write(self.levels[0], blocks, counts)
+        
+        # every further level is counted from the level below
+        for lower, channels in zip(self.levels, self.levels[1:]):
+            blocks = np.unique(blocks // self.factor, axis=0)
+            children, valid = self._children(blocks, lower[0].size)
+            xs, ys = children[valid].T
+            counts = self._sum_children([channel[xs, ys] for channel in lower], valid)
+            self._write(channels, blocks, counts)
+    
+    def _children(self, blocks: np.ndarray, size: Tuple[int, int]) -> Tuple[np.ndarray, np.ndarray]:
+        children = blocks[:, np.newaxis, :] * self.factor + self._offsets[np.newaxis]
+        return children, np.all(children < size, axis=-1)
+    
+    @staticmethod
+    def _sum_children(values: List[np.ndarray], valid: np.ndarray) -> List[np.ndarray]:
+        counts = []
+        for channel_values in values:
+            per_block = np.zeros(valid.shape, dtype=np.int32)
+            per_block[valid] = channel_values
+            counts.append(per_block.sum(axis=1))
+        return counts
+    
+    @staticmethod
+    def _write(channels: List[ChunkedArray], blocks: np.ndarray, counts: List[np.ndarray]):
+        for channel, channel_counts in zip(channels, counts):
+            channel[blocks[:, 0], blocks[:, 1]] = channel_counts
+    
+    ############################################################################
+    #                                 Queries                                  #
+    ############################################################################
+    
+    def counts(self, level: int, window: Tuple[slice, slice]) -> np.ndarray:
+        """
+        :param level: level of the blocks (from 1)
+        :param window: blocks to read (a tuple of slices)
+        :return: (W, H, 3) counts of the open, flagged and exploded cells of every block in the window
+        """
+        return np.stack([channel[window] for channel in self.levels[level - 1]], axis=-1)
+    
+    def colors(self, level: int, window: Tuple[slice, slice]) -> np.ndarray:
+        """
+        :param level: level of the blocks (from 1)
+        :param window: blocks to read (a tuple of slices)
+        :return: (W, H, 3) uint8 color of every block in the window, blended by the share of open and flagged cells
+        """
+        counts = self.counts(level, window)
+        fractions = counts / self.block_size(level) ** 2
+        
+        colors = HIDDEN_COLOR + fractions[..., OPEN, np.newaxis] * (OPEN_COLOR - HIDDEN_COLOR) \
+                              + fractions[..., FLAGGED, np.newaxis] * (FLAGGED_COLOR - HIDDEN_COLOR)
+        colors[counts[..., EXPLODED] > 0] = EXPLODED_COLOR
+        return colors.astype(np.uint8)
@@ -0,0 +1,228 @@
+from collections import OrderedDict, namedtuple
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from minesweeper.adjacency import ADJACENT_OFFSETS
+from minesweeper.board import HiddenBoardState, neighbors
+
+
+# encoded cell values of a window: open cells are their proximity (0 - 8), the rest are these
+HIDDEN = 9
+MINE = 10  # flagged, or an opened mine
+OUTSIDE = 11
+
+# conclusions about the center cell of a window
+UNKNOWN, SAFE, MINE_CELL = 0, 1, 2
+
+RADIUS = 2
+WINDOW = 2 * RADIUS + 1
+
+PatternStats = namedtuple('PatternStats', ['hits', 'misses', 'maxsize', 'currsize'])
+
+
+def encode(state: HiddenBoardState) -> np.ndarray:
+    """
+    :param state: (hidden) board state
+    :return: the encoded board, padded with OUTSIDE cells so that every cell has a full window
+    """
+    encoded = np.where(state.openable_layout, HIDDEN, state.proximity_matrix)
+    encoded[state.flag_layout | (~state.openable_layout & (state.proximity_matrix < 0))] = MINE
+    return np.pad(encoded.astype(np.int8), RADIUS, constant_values=OUTSIDE)
+
+
+def _constraints(window: np.ndarray):
+    # (hidden cells, fewest, most remaining mines) for every open number of the window: neighbors outside of the window
+    # are unknown, so each of them may or may not be a mine
+    cells = window.tolist()  # (plain lists are far faster to index than arrays, cell by cell)
+    hidden = {}
+    for x, column in enumerate(cells):
+        for y, value in enumerate(column):
+            if value == HIDDEN:
+                hidden[x, y] = len(hidden)
+    
+    constraints = []
+    for cx, column in enumerate(cells):
+        for cy, value in enumerate(column):
+            if value > 8:
+                continue
+            
+            variables, mines, outside = [], 0, 0
+            for dx, dy in ADJACENT_OFFSETS:
+                x, y = cx + dx, cy + dy
+                if not (0 <= x < WINDOW and 0 <= y < WINDOW):
+                    outside += 1
+                elif cells[x][y] == HIDDEN:
+                    variables.append(hidden[x, y])
+                elif cells[x][y] == MINE:
+                    mines += 1
+            
+            remaining = value - mines
+            constraints.append((variables, remaining - outside, remaining))
+    
+    return hidden, constraints
+
+
+def _component(constraints, center: int):
+    """
+    :return: the constraints connected to the center variable (through shared variables), and their variables in the
+        order they are reached from the center
+    """
+    of_variable = {}
+    for i, (variables, _, _) in enumerate(constraints):
+        for v in variables:
+            of_variable.setdefault(v, []).append(i)
+    
+    variables, connected = [center], []
+    reached, used = {center}, set()
+    for variable in variables:
+        for i in of_variable.get(variable, ()):
+            if i in used:
+                continue
+            used.add(i)
+            connected.append(constraints[i])
+            for other in constraints[i][0]:
+                if other not in reached:
+                    reached.add(other)
+                    variables.append(other)
+    
+    return connected, variables
+
+
+def _satisfiable(constraints, order: List[int], assignment: List[int]) -> bool:
+    """
+    Depth-first search for any assignment of the unassigned variables (in the given order) that satisfies all
+    constraints. The mines and unassigned variables of every constraint are counted incrementally, so each step only
+    checks the constraints of the variable it assigns.
+    """
+    of_variable = {v: [] for v in order}
+    mines, free = [], []
+    for i, (variables, fewest, most) in enumerate(constraints):
+        for v in variables:
+            of_variable[v].append(i)
+        assigned = [assignment[v] for v in variables if assignment[v] >= 0]
+        mines.append(sum(assigned))
+        free.append(len(variables) - len(assigned))
+        if mines[i] > most or mines[i] + free[i] < fewest:
+            return False
+    
+    unassigned = [v for v in order if assignment[v] < 0]
+    
+    def search(depth: int) -> bool:
+        if depth == len(unassigned):
+            return True
+        
+        v = unassigned[depth]
+        for value in (0, 1):
+            consistent = True
+            for i in of_variable[v]:
+                mines[i] += value
+                free[i] -= 1
+                consistent &= constraints[i][1] <= mines[i] + free[i] and mines[i] <= constraints[i][2]
+            
+            found = consistent and search(depth + 1)
+            for i in of_variable[v]:
+                mines[i] -= value
+                free[i] += 1
+            if found:
+                return True
+        return False
+    
+    return search(0)
+
+
+def solve_window(window: np.ndarray) -> int:
+    """
+    Solves the center cell of a window using only the open numbers inside the window. Their neighbors outside of the
+    window are treated as completely unknown, so the conclusion only depends on the window (and is always sound).
+    
+    Only the hidden cells constrained together with the center (through shared open numbers) are searched: all other
+    hidden cells are free, so the search stays small even for mostly hidden windows.
+    
+    :param window: encoded WINDOW x WINDOW cells
+    :return: UNKNOWN, SAFE or MINE_CELL
+    """
+    hidden, constraints = _constraints(window)
+    
+    center = hidden.get((RADIUS, RADIUS))
+    if center is None:
+        return UNKNOWN
+    
+    constraints, order = _component(constraints, center)
+    if len(constraints) == 0:
+        return UNKNOWN
+    
+    assignment = [-1] * len(hidden)
+    assignment[center] = 1
+    can_be_mine = _satisfiable(constraints, order, assignment)
+    assignment[center] = 0
+    can_be_safe = _satisfiable(constraints, order, assignment)
+    
+    if can_be_mine and not can_be_safe:
+        return MINE_CELL
+    if can_be_safe and not can_be_mine:
+        return SAFE
+    return UNKNOWN
+
+
+class PatternTable:
+    """
+    Bounded (least recently used) transposition table of local deductions: the WINDOW x WINDOW neighborhood of a
+    frontier cell is hashed and the conclusion about the cell (safe, mine or unknown) is remembered, so that common
+    patterns (1-2-1, 1-2-2-1, ...) are only ever solved once.
+    """
+    
+    def __init__(self, maxsize: int = 1 << 16):
+        """
+        :param maxsize: largest number of patterns to remember
+        """
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._table: OrderedDict = OrderedDict()
+    
+    def lookup(self, window: np.ndarray) -> int:
+        """
+        :param window: encoded WINDOW x WINDOW cells (int8)
+        :return: UNKNOWN, SAFE or MINE_CELL
+        """
+        key = window.tobytes()
+        conclusion: Optional[int] = self._table.get(key)
+        if conclusion is not None:
+            self.hits += 1
+            self._table.move_to_end(key)
+            return conclusion
+        
+        self.misses += 1
+        conclusion = self._table[key] = solve_window(window)
+        if len(self._table) > self.maxsize:
+            self._table.popitem(last=False)
+        return conclusion
+    
+    def deduce(self, state: HiddenBoardState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        :param state: (hidden) board state
+        :return: layouts of the frontier cells that must be safe and of those that must be mines (according to their
+            local windows)
+        """
+        open_numbers = ~state.openable_layout & ~state.flag_layout & (state.proximity_matrix > 0)
+        frontier = state.openable_layout & (neighbors(open_numbers) > 0)
+        
+        windows = np.lib.stride_tricks.sliding_window_view(encode(state), (WINDOW, WINDOW))
+        
+        safe = np.zeros(frontier.shape, dtype=bool)
+        mines = np.zeros(frontier.shape, dtype=bool)
+        for pos in zip(*np.nonzero(frontier)):
+            conclusion = self.lookup(windows[pos])
+            safe[pos] = conclusion == SAFE
+            mines[pos] = conclusion == MINE_CELL
+        
+        return safe, mines
+    
+    @property
+    def stats(self) -> PatternStats:
+        return PatternStats(self.hits, self.misses, self.maxsize, len(self._table))
+    
+    def clear(self):
+        self._table.clear()
+        self.hits = self.misses = 0
@@ -0,0 +1,82 @@
+import numpy as np
+
+
+class ZeroRegions:
+    """
+    Index of the connected regions of empty (zero proximity) cells of a board, including the numbered cells bordering
+    each region, i.e. exactly the cells a flood fill from any empty cell of the region opens.
+    
+    The cells of every region are stored as flat indices in one array (CSR-style: region k spans
+    cells[offsets[k]:offsets[k + 1]]), so that opening a region is a single vectorized assignment.
+    """
+    __slots__ = ['labels', 'offsets', 'cells']
+    
+    def __init__(self, proximity: np.ndarray, adjacency=None):
+        """
+        :param proximity: proximity matrix of the board (mines are negative)
+        :param adjacency: (sparse) adjacency matrix over the flat cell indices for boards that are not square grids (e.g.
+                          hexagons), or None for the 8 adjacent cells of a square grid
+        """
+        if adjacency is None:
+            region_labels, region_cells, num_regions = self._square_regions(proximity)
+        else:
+            region_labels, region_cells, num_regions = self._graph_regions(proximity, adjacency)
+        
+        # remove duplicates (border cells can be reached from several empty cells) and group by region
+        pairs = np.unique(np.stack([region_labels, region_cells]), axis=1)
+        
+        self.offsets = np.zeros(num_regions + 2, dtype=np.intp)
+        self.offsets[2:] = np.cumsum(np.bincount(pairs[0], minlength=num_regions + 1)[1:])
+        self.cells = pairs[1]
+    
+    def _square_regions(self, proximity: np.ndarray):
+        from scipy.ndimage import label
+        
+        w, h = proximity.shape
+        
+        # label 8-connected regions of empty cells (labels start at 1, 0 is not an empty cell)
+        self.labels, num_regions = label(proximity == 0, structure=np.ones((3, 3), dtype=bool))
+        
+        # every cell gets the labels of all empty cells in its 3x3 neighborhood (including itself)
+        padded = np.pad(self.labels, 1)
+        flat_indices = np.arange(w * h).reshape(w, h)
+        region_labels = []
+        region_cells = []
+        for dx in range(3):
+            for dy in range(3):
+                adjacent_labels = padded[dx:dx + w, dy:dy + h]
+                in_region = adjacent_labels > 0
+                region_labels.append(adjacent_labels[in_region])
+                region_cells.append(flat_indices[in_region])
+        
+        return np.concatenate(region_labels), np.concatenate(region_cells), num_regions
+    
+    def _graph_regions(self, proximity: np.ndarray, adjacency):
+        from scipy.sparse.csgraph import connected_components
+        
+        # label the connected components of the graph of empty cells (labels start at 1, 0 is not an empty cell)
+        empty_cells = np.flatnonzero(proximity == 0)
+        num_regions, components = connected_components(adjacency[empty_cells][:, empty_cells], directed=False)
+        
+        labels = np.zeros(proximity.size, dtype=np.intp)
+        labels[empty_cells] = components + 1
+        self.labels = labels.reshape(proximity.shape)
+        
+        # every empty cell labels itself and all its adjacent cells
+        edges = adjacency[empty_cells].tocoo()
+        return np.concatenate([labels[empty_cells], labels[empty_cells][edges.row]]), \
+               np.concatenate([empty_cells, edges.col]), num_regions
+    
+    def region_of(self, pos) -> int:
+        """
+        :param pos: position of a cell
+        :return: label of the region of empty cells the cell belongs to (0 if the cell is not empty)
+        """
+        return self.labels[pos]
+    
+    def cells_of(self, region: int) -> np.ndarray:
+        """
+        :param region: region label (as returned by region_of)
+        :return: flat indices of all cells opened with the region (a view, not a copy)
+        """
+        return self.cells[self.offsets[region]:self.offsets[region + 1]]
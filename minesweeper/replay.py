@@ -0,0 +1,90 @@
+import os
+
+import numpy as np
+
+from minesweeper.actions import ActionType
+from minesweeper.board import HiddenBoardState
+from minesweeper.boards import SquareBoard, SquareGridState
+from minesweeper.corpus import BoardCorpus
+from minesweeper.trajectory import KEYFRAME_DTYPE, TrajectoryReader, to_action
+
+
+class _Config:
+    forgiveness = float('inf')  # replays continue past opened mines, exactly as recorded
+
+
+class Replay:
+    """
+    Random access to the (hidden) board state of any recorded game after any number of its steps: the board is restored
+    from the nearest earlier keyframe and only the few steps since then are replayed.
+    
+    The mine layouts come from the board corpus, so the games need to have been recorded to both (with the same
+    numbering, as the game does when saving both board runs and trajectories).
+    """
+    
+    def __init__(self, root: str = 'runs', corpus_name: str = 'boards', trajectory_name: str = 'trajectories'):
+        """
+        :param root: directory of the corpus and trajectory files
+        :param corpus_name: base name of the board corpus files
+        :param trajectory_name: base name of the trajectory files
+        """
+        self.corpus = BoardCorpus(root, corpus_name)
+        self.trajectories = TrajectoryReader(root, trajectory_name)
+        
+        index_file = os.path.join(root, f'{trajectory_name}.kix')
+        size = os.path.getsize(index_file) if os.path.exists(index_file) else 0
+        self.keyframes = np.fromfile(index_file, dtype=KEYFRAME_DTYPE, count=size // KEYFRAME_DTYPE.itemsize) \
+            if size > 0 else np.empty(0, dtype=KEYFRAME_DTYPE)
+        self._keyframe_data = np.memmap(os.path.join(root, f'{trajectory_name}.key'), dtype=np.uint8, mode='r') \
+            if size > 0 else None
+        
+        # keyframes are recorded in order of game and step, so (game, step) keys are sorted
+        self._keys = self.keyframes['game'].astype(np.int64) << 32 | self.keyframes['step']
+    
+    def steps(self, game: int) -> int:
+        """
+        :return: number of recorded steps of the game
+        """
+        return len(self.trajectories.game(game))
+    
+    def board(self, game: int, step: int) -> SquareBoard:
+        """
+        :param game: number of a recorded game
+        :param step: number of steps (actions) of the game to apply
+        :return: a (headless) board in the state of the game after the given number of steps
+        """
+        steps = self.trajectories.game(game)
+        if not 0 <= step <= len(steps):
+            raise IndexError(f'Game {game} has {len(steps)} steps, not {step}')
+        
+        # the last keyframe of the game at or before the step
+        position = np.searchsorted(self._keys, game << 32 | step, side='right') - 1
+        if position < 0 or self.keyframes[position]['game'] != game:
+            raise KeyError(f'No keyframe recorded for game {game}')
+        
+        keyframe = self.keyframes[position]
+        offset, size = int(keyframe['offset']), (int(keyframe['width']), int(keyframe['height']))
+        packed_size = (size[0] * size[1] + 7) // 8
+        open_layout, flag_layout = (np.unpackbits(self._keyframe_data[start:start + packed_size],
+                                                  count=size[0] * size[1]).reshape(size).astype(bool)
+                                    for start in (offset, offset + packed_size))
+        
+        mine_layout = self.corpus[game].mine_layout
+        board = SquareBoard(SquareGridState(size), lambda _: mine_layout, _Config, open_layout=open_layout)
+        for pos in np.argwhere(flag_layout):
+            board.toggle_flag(tuple(pos))
+        
+        for recorded in steps[int(keyframe['step']):step]:
+            action = to_action(recorded)
+            if action.type != ActionType.SURRENDER:
+                board.apply(action)
+        
+        return board
+    
+    def state(self, game: int, step: int) -> HiddenBoardState:
+        """
+        :param game: number of a recorded game
+        :param step: number of steps (actions) of the game to apply
+        :return: the (hidden) board state of the game after the given number of steps
+        """
+        return self.board(game, step).hidden_state()
@@ -1,36 +1,97 @@
 import numpy as np
-import random
 
-from typing import Callable, Tuple
+from typing import Optional, Protocol, Tuple, Union
 
 
-Seeder = Callable[[Tuple[int, int]], np.ndarray]
+RandomState = Union[None, int, np.random.SeedSequence, np.random.Generator]
 
 
-def uniform_random(mine_prob: float) -> Seeder:
-    def seeder(game_size: (int, int)) -> np.ndarray:
-        return np.random.uniform(0., 1., game_size) <= mine_prob
+class Seeder(Protocol):
+    """
+    Generates mine layouts: a single (W, H) layout, or an (N, W, H) stack of N independent layouts if batch is given.
+    """
     
-    return seeder
+    def __call__(self, game_size: Tuple[int, int], batch: Optional[int] = None) -> np.ndarray:
+        ...
 
 
-def number_mines(num_mines: int) -> Seeder:
-    def seeder(game_size: (int, int)) -> np.ndarray:
-        sites = game_size[0] * game_size[1]
+class ChunkSeeder(Protocol):
+    """
+    Generates the mine layout of a single chunk of a chunked board (see minesweeper.chunks), deterministically from the
+    chunk's key: the same chunk always gets the same layout, however often (or in whichever order) chunks are generated.
+    """
     
-        indices = [True] * min(num_mines, sites) + [False] * max(0, sites - num_mines)
-        random.shuffle(indices)
+    def __call__(self, key: Tuple[int, int], chunk_shape: Tuple[int, int]) -> np.ndarray:
+        ...
+
+
+def _shape(game_size: Tuple[int, int], batch: Optional[int]) -> Tuple[int, ...]:
+    return tuple(game_size) if batch is None else (batch, *game_size)
+
+
+def uniform_random(mine_prob: float, rng: RandomState = None) -> Seeder:
+    """
+    :param mine_prob: probability of each cell being a mine (independently of the others)
+    :param rng: random generator (or seed) to draw the layouts from (default: freshly seeded from the OS)
+    """
+    rng = np.random.default_rng(rng)
+    
+    def seeder(game_size: (int, int), batch: Optional[int] = None) -> np.ndarray:
+        return rng.random(_shape(game_size, batch)) < mine_prob
+    
+    return seeder
+
+
+def number_mines(num_mines: int, rng: RandomState = None) -> Seeder:
+    """
+    :param num_mines: exact number of mines of each layout (capped at the number of cells)
+    :param rng: random generator (or seed) to draw the layouts from (default: freshly seeded from the OS)
+    """
+    rng = np.random.default_rng(rng)
     
-        return np.array(indices).reshape(game_size)
+    def seeder(game_size: (int, int), batch: Optional[int] = None) -> np.ndarray:
+        sites = game_size[0] * game_size[1]
+        mines = min(max(num_mines, 0), sites)
+        
+        # the mines are the cells with the smallest random keys (a uniformly random subset of exactly that size)
+        keys = rng.random((1 if batch is None else batch, sites))
+        if mines == 0 or mines == sites:
+            layouts = np.full(keys.shape, mines == sites)
+        else:
+            thresholds = np.partition(keys, mines - 1, axis=1)[:, mines - 1:mines]
+            layouts = keys <= thresholds
+        
+        return layouts.reshape(_shape(game_size, batch))
     
     return seeder
 
 
-def percent_mines(mine_percent: float) -> Seeder:
+def percent_mines(mine_percent: float, rng: RandomState = None) -> Seeder:
+    """
+    :param mine_percent: fraction of the cells that are mines (rounded down to an exact number of mines)
+    :param rng: random generator (or seed) to draw the layouts from (default: freshly seeded from the OS)
+    """
     if not 0. <= mine_percent <= 1.:
         raise ValueError(f'Not a valid percent: {mine_percent}')
     
-    def seeder(game_size: (int, int)) -> np.ndarray:
-        return number_mines(int(mine_percent * mine_percent))(game_size)
+    rng = np.random.default_rng(rng)
+    
+    def seeder(game_size: (int, int), batch: Optional[int] = None) -> np.ndarray:
+        return number_mines(int(mine_percent * game_size[0] * game_size[1]), rng)(game_size, batch)
+    
+    return seeder
+
+
+def hashed_uniform_random(mine_prob: float, seed: Optional[int] = None) -> ChunkSeeder:
+    """
+    :param mine_prob: probability of each cell being a mine (independently of the others)
+    :param seed: seed of the board (default: freshly drawn from the OS); every chunk's layout is drawn from a generator
+                 seeded by a hash of the seed and the chunk's key
+    """
+    entropy = np.random.SeedSequence(seed).entropy
+    
+    def seeder(key: Tuple[int, int], chunk_shape: Tuple[int, int]) -> np.ndarray:
+        rng = np.random.default_rng(np.random.SeedSequence(entropy, spawn_key=tuple(int(coord) for coord in key)))
+        return rng.random(chunk_shape) < mine_prob
     
     return seeder
@@ -0,0 +1,251 @@
+import argparse
+import itertools
+import logging
+import random
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from math import sqrt
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import minesweeper
+from minesweeper import Agent
+from minesweeper.actions import ActionType
+from minesweeper.boards import SquareBoard, SquareGridState
+from minesweeper.seeders import uniform_random
+
+
+@dataclass(frozen=True)
+class SimulationConfig:
+    """
+    Game configuration of a simulation; it also stands in for the game config passed to the board and the agent.
+    """
+    agent: str
+    board_size: Tuple[int, int] = (16, 16)
+    mine_prob: float = 0.15
+    good_first_select: bool = True
+    forgiveness: int = 0
+    
+    agent_pacing = False
+    # the games are already spread over worker processes, so solvers do not start pools of their own
+    solver_workers = 0
+
+
+@dataclass
+class SimulationResult:
+    config: SimulationConfig
+    games: int = 0
+    wins: int = 0
+    
+    @property
+    def win_rate(self) -> float:
+        return self.wins / self.games if self.games > 0 else float('nan')
+    
+    @property
+    def interval(self) -> Tuple[float, float]:
+        return wilson_interval(self.wins, self.games)
+
+
+def wilson_interval(wins: int, games: int, z: float = 1.96) -> Tuple[float, float]:
+    """
+    Wilson score interval of a binomial proportion (well-behaved even for win rates close to 0 or 1).
+    
+    :param wins: number of successes
+    :param games: number of trials
+    :param z: standard score of the confidence level (default: 95%)
+    :return: lower and upper bound of the interval
+    """
+    if games == 0:
+        return 0., 1.
+    
+    p = wins / games
+    denominator = 1 + z * z / games
+    center = (p + z * z / (2 * games)) / denominator
+    margin = z * sqrt(p * (1 - p) / games + z * z / (4 * games * games)) / denominator
+    return max(0., center - margin), min(1., center + margin)
+
+
+################################################################################
+#                                 Single Games                                 #
+################################################################################
+
+def game_seed(base_seed: int, config_index: int, game_index: int) -> np.random.SeedSequence:
+    return np.random.SeedSequence(base_seed, spawn_key=(config_index, game_index))
+
+
+def play_game(config: SimulationConfig, seed: np.random.SeedSequence, max_idle_steps: int = 100,
+              agent: Optional[Agent] = None) -> bool:
+    """
+    Plays a single game of the configured agent.
+    
+    :param config: game configuration
+    :param seed: seed of the game (board layout, first select and the agent's own randomness)
+    :param max_idle_steps: number of consecutive steps without any action after which the agent gives up
+    :param agent: agent to play with (restarted for this game), or None for a new agent of the configured kind
+    :return: whether the game was won
+    """
+    board_rng, agent_seed = seed.spawn(2)
+    rng = np.random.default_rng(board_rng)
+    
+    # agents may use either of the global random generators
+    random.seed(int(agent_seed.generate_state(1)[0]))
+    np.random.seed(agent_seed.generate_state(1))
+    
+    board = SquareBoard(SquareGridState(config.board_size), uniform_random(config.mine_prob, rng), config)
+    
+    if config.good_first_select:
+        board.first_select(tuple(int(length) for length in rng.integers(0, config.board_size)))
+    
+    if agent is None:
+        agent = new_agent(config.agent)
+    agent.start(config.board_size, config)
+    
+    idle_steps = 0
+    while not (board.failed or board.completed) and idle_steps < max_idle_steps:
+        state = board.hidden_state()
+        actions = agent.act(state)
+        idle_steps = 0 if actions else idle_steps + 1
+        
+        for action in actions:
+            if action.type == ActionType.SURRENDER:
+                return False
+            board.apply(action)
+        
+        if actions:
+            agent.react(board.hidden_state(), None)
+    
+    return board.completed and not board.failed
+
+
+def new_agent(name: str) -> Agent:
+    import minesweeper.agents  # registers the built-in agents (in every worker process)
+    
+    return minesweeper.AGENT_REGISTRY[name]()
+
+
+# agents of this process by name, reused for all of its games (so that e.g. pattern tables are only filled once)
+_agents: Dict[str, Agent] = {}
+
+
+def play_games(config: SimulationConfig, base_seed: int, config_index: int, games: range) -> Tuple[int, int]:
+    """
+    :return: number of games played and won, for the given game indices of one configuration
+    """
+    # agents log every move, which would drown out everything else
+    logging.disable(logging.INFO)
+    
+    if config.agent not in _agents:
+        _agents[config.agent] = new_agent(config.agent)
+    agent = _agents[config.agent]
+    
+    wins = sum(play_game(config, game_seed(base_seed, config_index, game), agent=agent) for game in games)
+    return len(games), wins
+
+
+def _start_worker():
+    # a fresh set of agents for every worker process (a forked worker would otherwise inherit the parent's)
+    _agents.clear()
+    logging.disable(logging.INFO)
+
+
+################################################################################
+#                                    Sweeps                                    #
+################################################################################
+
+def sweep(agent: str,
+          board_sizes: Sequence[Tuple[int, int]],
+          mine_probs: Sequence[float],
+          good_first_selects: Sequence[bool] = (True,),
+          forgivenesses: Sequence[int] = (0,)) -> List[SimulationConfig]:
+    """
+    :return: all combinations of the given parameters
+    """
+    return [SimulationConfig(agent, tuple(size), prob, good_first_select, forgiveness)
+            for size, prob, good_first_select, forgiveness
+            in itertools.product(board_sizes, mine_probs, good_first_selects, forgivenesses)]
+
+
+def simulate(configs: Sequence[SimulationConfig], games: int, base_seed: int = 0, workers: Optional[int] = None,
+             chunk_size: int = 100) -> Iterable[SimulationResult]:
+    """
+    Plays the given number of games for every configuration, in a pool of worker processes. Every game is seeded from
+    (base seed, configuration index, game index) alone, so the results do not depend on the number of workers or on
+    how the games are split into chunks.
+    
+    :param configs: configurations to simulate
+    :param games: number of games per configuration
+    :param base_seed: seed of the whole simulation
+    :param workers: number of worker processes (default: number of CPUs, 0: play in this process)
+    :param chunk_size: number of games sent to a worker at once
+    :return: results of every configuration (in order, as soon as all of its games are finished)
+    """
+    chunks = [(index, range(start, min(start + chunk_size, games)))
+              for index in range(len(configs)) for start in range(0, games, chunk_size)]
+    
+    if workers == 0:
+        outcomes = (play_games(configs[index], base_seed, index, chunk) for index, chunk in chunks)
+        yield from _collect(configs, chunks, outcomes)
+        return
+    
+    with ProcessPoolExecutor(max_workers=workers, initializer=_start_worker) as pool:
+        futures = [pool.submit(play_games, configs[index], base_seed, index, chunk) for index, chunk in chunks]
+        yield from _collect(configs, chunks, (future.result() for future in futures))
+
+
+def _collect(configs, chunks, outcomes) -> Iterable[SimulationResult]:
+    results = [SimulationResult(config) for config in configs]
+    remaining = [sum(1 for index, _ in chunks if index == i) for i in range(len(configs))]
+    
+    next_result = 0
+    for (index, _), (played, won) in zip(chunks, outcomes):
+        results[index].games += played
+        results[index].wins += won
+        remaining[index] -= 1
+        
+        while next_result < len(results) and remaining[next_result] == 0:
+            yield results[next_result]
+            next_result += 1
+
+
+################################################################################
+#                                Command Line                                  #
+################################################################################
+
+def _size(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def _flag(text: str) -> bool:
+    return text.lower() in ('1', 'true', 'yes', 'on')
+
+
+def arg_parser() -> argparse.ArgumentParser:
+    import minesweeper.agents  # registers the built-in agents
+    
+    parser = argparse.ArgumentParser('Minesweeper simulation',
+                                     description='Estimates win rates of an agent over a sweep of game configurations.')
+    parser.add_argument('--agent', default='strategic', choices=minesweeper.AGENT_REGISTRY.keys())
+    parser.add_argument('--board-sizes', type=_size, nargs='+', default=[(16, 16)], metavar='WxH')
+    parser.add_argument('--mine-probs', type=float, nargs='+', default=[0.15], metavar='PROB')
+    parser.add_argument('--good-first-select', type=_flag, nargs='+', default=[True], metavar='BOOL')
+    parser.add_argument('--forgiveness', type=int, nargs='+', default=[0], metavar='MINES')
+    parser.add_argument('--games', type=int, default=1000, help='number of games per configuration')
+    parser.add_argument('--seed', type=int, default=0, help='seed of the whole simulation')
+    parser.add_argument('--workers', type=int, default=None, help='number of worker processes (0: no pool)')
+    parser.add_argument('--chunk-size', type=int, default=100, metavar='GAMES')
+    return parser
+
+
+def main(args=None):
+    args = arg_parser().parse_args(args)
+    configs = sweep(args.agent, args.board_sizes, args.mine_probs, args.good_first_select, args.forgiveness)
+    
+    print(f'{"size":>9} {"mines":>6} {"first":>6} {"forgive":>7} {"games":>9} {"win rate":>9}  95% interval')
+    for result in simulate(configs, args.games, args.seed, args.workers, args.chunk_size):
+        config = result.config
+        low, high = result.interval
+        size = f'{config.board_size[0]}x{config.board_size[1]}'
+        print(f'{size:>9} {config.mine_prob:>6.3f} {str(config.good_first_select):>6} {config.forgiveness:>7} '
+              f'{result.games:>9} {result.win_rate:>9.4f}  [{low:.4f}, {high:.4f}]', flush=True)
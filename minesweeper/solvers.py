@@ -0,0 +1,563 @@
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
+from math import comb, gcd, lgamma
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from minesweeper.adjacency import neighbor_index
+from minesweeper.board import HiddenBoardState
+
+
+################################################################################
+#                            Frontier Decomposition                            #
+################################################################################
+
+@dataclass
+class Component:
+    """
+    An independent part of the hidden frontier: hidden cells that are (transitively) constrained by the same open
+    numbered cells, and no others.
+    """
+    cells: np.ndarray
+    constraints: List[Tuple[Tuple[int, ...], int]]
+    
+    @property
+    def size(self):
+        return len(self.cells)
+
+
+def frontier_components(state: HiddenBoardState) -> List[Component]:
+    """
+    Splits the hidden frontier (hidden, unflagged cells next to an open number) into independent components.
+    
+    :param state: (hidden) board state
+    :return: components, with cells as flat indices and constraints as (local cell indices, remaining mines) pairs
+    """
+    from scipy.sparse import coo_matrix
+    from scipy.sparse.csgraph import connected_components
+    
+    adjacency = neighbor_index(state.openable_layout.shape)
+    num_cells = state.openable_layout.size
+    
+    hidden = state.openable_layout.ravel()
+    proximity = state.proximity_matrix.ravel()
+    opened = ~hidden & ~state.flag_layout.ravel()
+    known_mines = state.flag_layout.ravel() | (opened & (proximity < 0))
+    
+    # all (cell, adjacent cell) pairs of the grid
+    cells = np.repeat(np.arange(num_cells), np.diff(adjacency.offsets))
+    adjacent = adjacency.neighbors
+    
+    # remaining (unknown) mines around every cell
+    remaining = proximity - np.bincount(cells[known_mines[adjacent]], minlength=num_cells)
+    
+    # constraint edges: open numbered cell --> adjacent hidden cell
+    edges = opened[cells] & (proximity[cells] >= 0) & hidden[adjacent]
+    constraint_cells, variable_cells = cells[edges], adjacent[edges]
+    if len(constraint_cells) == 0:
+        return []
+    
+    graph = coo_matrix((np.ones(len(constraint_cells)), (constraint_cells, variable_cells)),
+                       shape=(num_cells, num_cells))
+    _, labels = connected_components(graph, directed=False)
+    
+    # group the edges by component
+    components = []
+    edge_labels = labels[constraint_cells]
+    order = np.argsort(edge_labels, kind='stable')
+    boundaries = np.flatnonzero(np.diff(edge_labels[order])) + 1
+    for group in np.split(order, boundaries):
+        component_cells = np.unique(variable_cells[group])
+        local_variables = np.searchsorted(component_cells, variable_cells[group])
+        
+        grouped = defaultdict(list)
+        for constraint_cell, variable in zip(constraint_cells[group], local_variables):
+            grouped[constraint_cell].append(int(variable))
+        
+        constraints = [(tuple(variables), int(remaining[constraint_cell]))
+                       for constraint_cell, variables in grouped.items()]
+        components.append(Component(component_cells, constraints))
+    
+    return components
+
+
+################################################################################
+#                          Linear Algebra Deduction                            #
+################################################################################
+
+Row = Tuple[Dict[int, int], int]
+
+
+def _normalize(coefficients: Dict[int, int], rhs: int) -> Row:
+    divisor = gcd(rhs, *coefficients.values()) if coefficients else 0
+    if divisor > 1:
+        return {v: a // divisor for v, a in coefficients.items()}, rhs // divisor
+    return coefficients, rhs
+
+
+def eliminate(rows: List[Row]) -> List[Row]:
+    """
+    Fraction-free (integer) Gauss-Jordan elimination of sparse rows ({variable: coefficient}, right hand side).
+    
+    :param rows: linear equations over the variables
+    :return: equivalent equations in reduced row echelon form (without empty rows)
+    """
+    rows = [(dict(coefficients), rhs) for coefficients, rhs in rows if coefficients]
+    reduced = []
+    
+    while rows:
+        # pivot on the variable of the sparsest row (keeps fill-in low)
+        pivot_coefficients, pivot_rhs = rows.pop(min(range(len(rows)), key=lambda r: len(rows[r][0])))
+        if not pivot_coefficients:
+            continue
+        pivot = next(iter(pivot_coefficients))
+        a = pivot_coefficients[pivot]
+        
+        def reduce(row: Row) -> Row:
+            coefficients, rhs = row
+            b = coefficients.get(pivot, 0)
+            if b == 0:
+                return row
+            
+            combined = {v: a * coefficient for v, coefficient in coefficients.items()}
+            for v, coefficient in pivot_coefficients.items():
+                combined[v] = combined.get(v, 0) - b * coefficient
+            return _normalize({v: c for v, c in combined.items() if c != 0}, a * rhs - b * pivot_rhs)
+        
+        rows = [reduce(row) for row in rows]
+        reduced = [reduce(row) for row in reduced]
+        reduced.append((pivot_coefficients, pivot_rhs))
+    
+    return [row for row in reduced if row[0] or row[1] != 0]
+
+
+def deduce_component(component: Component) -> Dict[int, int]:
+    """
+    Finds the cells of a component that must be safe (0) or must be mines (1), in polynomial time: the constraints are
+    brought into reduced row echelon form, and every row whose right hand side equals the sum of its positive (or
+    negative) coefficients fixes all of its variables. Fixed variables are substituted back until nothing changes.
+    
+    :param component: frontier component
+    :return: {local cell index: 0 or 1} for all deduced cells
+    """
+    known: Dict[int, int] = {}
+    
+    while True:
+        rows = []
+        for variables, value in component.constraints:
+            rhs = value - sum(known.get(v, 0) for v in variables)
+            rows.append(({v: 1 for v in variables if v not in known}, rhs))
+        
+        deduced = {}
+        for coefficients, rhs in eliminate(rows):
+            positive = sum(a for a in coefficients.values() if a > 0)
+            negative = sum(a for a in coefficients.values() if a < 0)
+            
+            if rhs == positive:
+                deduced.update({v: int(a > 0) for v, a in coefficients.items()})
+            elif rhs == negative:
+                deduced.update({v: int(a < 0) for v, a in coefficients.items()})
+        
+        if not deduced:
+            return known
+        known.update(deduced)
+
+
+def reduce_component(component: Component, known: Dict[int, int]) -> List[Component]:
+    """
+    Substitutes the known cells into a component, splitting what is left into (possibly several) smaller components.
+    
+    :param component: frontier component
+    :param known: {local cell index: 0 or 1} of the cells to remove
+    :return: remaining components
+    """
+    unknown = np.array([v for v in range(component.size) if v not in known], dtype=int)
+    local = {v: i for i, v in enumerate(unknown)}
+    
+    # union-find over the remaining cells, joined by shared constraints
+    parent = list(range(len(unknown)))
+    
+    def root(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+    
+    constraints = []
+    for variables, value in component.constraints:
+        remaining = tuple(local[v] for v in variables if v in local)
+        if remaining:
+            constraints.append((remaining, value - sum(known.get(v, 0) for v in variables)))
+            for i in remaining[1:]:
+                parent[root(i)] = root(remaining[0])
+    
+    groups = defaultdict(list)
+    for i in range(len(unknown)):
+        groups[root(i)].append(i)
+    
+    components = []
+    for members in groups.values():
+        renumbered = {i: j for j, i in enumerate(members)}
+        member_constraints = [(tuple(renumbered[i] for i in variables), value)
+                              for variables, value in constraints if variables[0] in renumbered]
+        components.append(Component(component.cells[unknown[members]], member_constraints))
+    
+    return components
+
+
+################################################################################
+#                             Exact Enumeration                                #
+################################################################################
+
+@dataclass
+class ComponentSolution:
+    """
+    All consistent mine assignments of a component, grouped by the number of mines in the assignment.
+    """
+    cells: np.ndarray
+    solutions: Dict[int, int]
+    mine_counts: Dict[int, np.ndarray]
+    
+    @property
+    def total(self) -> int:
+        return sum(self.solutions.values())
+    
+    @property
+    def consistent(self) -> bool:
+        return self.total > 0
+    
+    @property
+    def probabilities(self) -> np.ndarray:
+        """
+        :return: exact probability of each cell being a mine (assuming every consistent assignment is equally likely)
+        """
+        return sum(self.mine_counts.values()) / self.total
+
+
+def solve_component(component: Component) -> ComponentSolution:
+    """
+    Enumerates all consistent mine assignments of a component by backtracking over its cells, memoizing on the
+    remaining mine counts of the constraints that are only partially assigned (the "cut"). Cells are ordered
+    breadth-first along the constraints, which keeps the cut (and the memo) small for long, thin frontiers.
+    
+    :param component: frontier component
+    :return: solution counts of the component
+    """
+    n = component.size
+    
+    # breadth-first cell order along shared constraints
+    cell_constraints = [[] for _ in range(n)]
+    for c, (variables, _) in enumerate(component.constraints):
+        for v in variables:
+            cell_constraints[v].append(c)
+    
+    order, seen = [], np.zeros(n, dtype=bool)
+    for start in range(n):
+        if seen[start]:
+            continue
+        seen[start] = True
+        frontier = [start]
+        while frontier:
+            v = frontier.pop(0)
+            order.append(v)
+            for c in cell_constraints[v]:
+                for u in component.constraints[c][0]:
+                    if not seen[u]:
+                        seen[u] = True
+                        frontier.append(u)
+    
+    position = np.empty(n, dtype=int)
+    position[order] = np.arange(n)
+    
+    # constraints in terms of the ordered cells
+    constraint_cells = [sorted(position[v] for v in variables) for variables, _ in component.constraints]
+    values = tuple(value for _, value in component.constraints)
+    ordered_constraints = [[] for _ in range(n)]
+    for c, cells in enumerate(constraint_cells):
+        for i in cells:
+            ordered_constraints[i].append(c)
+    
+    # number of cells of each constraint after cell i, and the constraints in the cut before cell i
+    cells_after = [{c: sum(1 for j in constraint_cells[c] if j > i) for c in ordered_constraints[i]} for i in range(n)]
+    cut = [tuple(c for c, cells in enumerate(constraint_cells) if cells[0] < i <= cells[-1]) for i in range(n + 1)]
+    
+    memo = {}
+    
+    def solve(i, residual):
+        if i == n:
+            return {0: (1, np.zeros(0, dtype=np.int64))}
+        
+        key = (i, tuple(residual[c] for c in cut[i]))
+        if key in memo:
+            return memo[key]
+        
+        result = {}
+        for mine in (0, 1):
+            next_residual = list(residual)
+            for c in ordered_constraints[i]:
+                next_residual[c] -= mine
+                if not 0 <= next_residual[c] <= cells_after[i][c]:
+                    break
+            else:
+                for mines, (count, mine_counts) in solve(i + 1, tuple(next_residual)).items():
+                    head = np.array([mine * count], dtype=np.int64)
+                    prev_count, prev_mine_counts = result.get(mines + mine, (0, 0))
+                    result[mines + mine] = (prev_count + count, prev_mine_counts + np.concatenate([head, mine_counts]))
+        
+        memo[key] = result
+        return result
+    
+    solved = solve(0, values)
+    
+    # back to the component's cell order
+    return ComponentSolution(component.cells,
+                             {mines: count for mines, (count, _) in solved.items()},
+                             {mines: mine_counts[position] for mines, (_, mine_counts) in solved.items()})
+
+
+################################################################################
+#                                   Endgame                                    #
+################################################################################
+
+EXACT_BINOMIAL_LIMIT = 1000
+
+
+@lru_cache(maxsize=32)
+def binomial_row(n: int) -> np.ndarray:
+    """
+    :return: C(n, k) for k = 0..n, exactly computed with arbitrary-precision integers (only used for small n)
+    """
+    return np.array([comb(n, k) for k in range(n + 1)], dtype=object)
+
+
+def binomial_weights(n: int, ks: np.ndarray) -> np.ndarray:
+    """
+    Relative binomial coefficients C(n, k) for the given ks, scaled so that the largest is 1 (0 outside 0 <= k <= n).
+    Small n use the cached, exact binomial table; large n use log-gamma, which cannot overflow.
+
+    :param n: number of cells
+    :param ks: numbers of mines among the cells
+    :return: relative weights of the ks
+    """
+    valid = (0 <= ks) & (ks <= n)
+    weights = np.zeros(len(ks))
+    if not np.any(valid):
+        return weights
+
+    if n <= EXACT_BINOMIAL_LIMIT:
+        exact = binomial_row(n)[ks[valid]]
+        largest = max(exact)
+        weights[valid] = [count / largest for count in exact]
+    else:
+        logs = np.array([lgamma(n + 1) - lgamma(k + 1) - lgamma(n - k + 1) for k in ks[valid]])
+        weights[valid] = np.exp(logs - logs.max())
+
+    return weights
+
+
+def _distribution(solution: ComponentSolution) -> np.ndarray:
+    # relative number of solutions for each number of mines in the component (scaled so that the largest is 1)
+    distribution = np.zeros(max(solution.solutions) + 1)
+    largest = max(solution.solutions.values())
+    for mines, count in solution.solutions.items():
+        distribution[mines] = count / largest
+    return distribution
+
+
+def endgame_probabilities(solutions: List[ComponentSolution], interior_cells: int, remaining_mines: int):
+    """
+    Exact mine probabilities using the global mine count: every combination of component solutions is weighted by the
+    number of ways the remaining mines fit into the interior (non-frontier) hidden cells, C(interior, remaining - k).
+
+    :param solutions: solutions of all frontier components
+    :param interior_cells: number of hidden, unflagged cells not on the frontier
+    :param remaining_mines: number of mines not yet known (flagged or opened)
+    :return: per-component cell probabilities and the mine probability of every interior cell (None if inconsistent)
+    """
+    distributions = [_distribution(solution) for solution in solutions]
+
+    total_distribution = np.ones(1)
+    for distribution in distributions:
+        total_distribution = np.convolve(total_distribution, distribution)
+
+    weights = binomial_weights(interior_cells, remaining_mines - np.arange(len(total_distribution)))
+    total = np.dot(total_distribution, weights)
+    if total == 0:
+        return None
+
+    probabilities = []
+    for i, solution in enumerate(solutions):
+        # distribution of the number of mines in all other components
+        others = np.ones(1)
+        for j, distribution in enumerate(distributions):
+            if j != i:
+                others = np.convolve(others, distribution)
+
+        largest = max(solution.solutions.values())
+        cell_weights = np.zeros(len(solution.cells))
+        for mines, mine_counts in solution.mine_counts.items():
+            # weight of every combination in which this component has the given number of mines
+            combined = np.dot(others, weights[mines:mines + len(others)]) if mines < len(weights) else 0.
+            cell_weights += mine_counts / largest * combined
+
+        probabilities.append(cell_weights / total)
+
+    interior_probability = np.nan
+    if interior_cells > 0:
+        interior_mines = remaining_mines - np.arange(len(total_distribution))
+        interior_probability = np.dot(total_distribution * weights, interior_mines) / interior_cells / total
+
+    return probabilities, interior_probability
+
+
+def fixed_solution(component: Component, known: Dict[int, int]) -> ComponentSolution:
+    """
+    :return: the (single) solution of the known cells of a component
+    """
+    variables = sorted(known)
+    values = np.array([known[v] for v in variables], dtype=np.int64)
+    return ComponentSolution(component.cells[variables], {int(values.sum()): 1}, {int(values.sum()): values})
+
+
+################################################################################
+#                                    Solver                                    #
+################################################################################
+
+@dataclass
+class FrontierSolution:
+    components: List[ComponentSolution]
+    probabilities: np.ndarray
+    endgame: bool = False  # whether the probabilities take the total number of mines into account
+    
+    @property
+    def safe(self) -> np.ndarray:
+        return self.probabilities == 0
+    
+    @property
+    def mines(self) -> np.ndarray:
+        return self.probabilities == 1
+
+
+class FrontierSolver:
+    """
+    Computes exact mine probabilities for the hidden frontier of a board, solving each independent component
+    separately (and large components in parallel, in worker processes). Before any enumeration, cells that can be
+    deduced with linear algebra are fixed, which often splits long frontiers into small, cheaply enumerated pieces.
+    
+    Near the end of a game (few hidden cells left) and if the total number of mines is known, the solutions of all
+    components are combined with the number of remaining mines, which also gives probabilities for the cells that are
+    not on the frontier.
+    """
+    
+    def __init__(self, max_component_size: int = 48, parallel_threshold: int = 20, workers: Optional[int] = None,
+                 endgame_threshold: int = 64):
+        """
+        :param max_component_size: largest component (in cells) to enumerate exactly; larger ones are left unsolved
+        :param parallel_threshold: components of at least this many cells are solved in worker processes (if there
+            are at least two of them)
+        :param workers: number of worker processes (default: number of CPUs, 0: solve everything in this process)
+        :param endgame_threshold: largest number of hidden cells for which the total number of mines is used
+        """
+        self.max_component_size = max_component_size
+        self.parallel_threshold = parallel_threshold
+        self.endgame_threshold = endgame_threshold
+        self.workers = workers
+        self._pool: Optional[ProcessPoolExecutor] = None
+        self._last_state: Optional[HiddenBoardState] = None
+        self._last_solution: Optional[FrontierSolution] = None
+    
+    def solve(self, state: HiddenBoardState) -> FrontierSolution:
+        """
+        :param state: (hidden) board state
+        :return: solved components and per-cell mine probabilities (NaN for cells that are not on a solved frontier,
+            unless the endgame solution applies)
+        """
+        if state is self._last_state:
+            return self._last_solution
+        
+        solved, components = [], []
+        complete = True
+        for component in frontier_components(state):
+            known = deduce_component(component)
+            if known:
+                solved.append(fixed_solution(component, known))
+            
+            for remaining in reduce_component(component, known):
+                if remaining.size <= self.max_component_size:
+                    components.append(remaining)
+                else:
+                    complete = False
+        
+        solved.extend(self._solve_all(components))
+        
+        probabilities = np.full(state.openable_layout.shape, np.nan)
+        for solution in solved:
+            if solution.consistent:
+                probabilities.flat[solution.cells] = solution.probabilities
+        
+        endgame = complete and self._is_endgame(state) and self._solve_endgame(state, solved, probabilities)
+        
+        self._last_state, self._last_solution = state, FrontierSolution(solved, probabilities, endgame)
+        return self._last_solution
+    
+    def _is_endgame(self, state: HiddenBoardState) -> bool:
+        return state.mine_count is not None and np.count_nonzero(state.openable_layout) <= self.endgame_threshold
+    
+    @staticmethod
+    def _solve_endgame(state: HiddenBoardState, solved: List[ComponentSolution], probabilities: np.ndarray) -> bool:
+        # replaces the (per-component) probabilities by ones that take the total number of mines into account
+        if not all(solution.consistent for solution in solved):
+            return False
+        
+        known_mines = np.count_nonzero(state.flag_layout | (~state.openable_layout & (state.proximity_matrix < 0)))
+        
+        interior = state.openable_layout.copy()
+        for solution in solved:
+            interior.flat[solution.cells] = False
+        
+        result = endgame_probabilities(solved, np.count_nonzero(interior), state.mine_count - known_mines)
+        if result is None:
+            return False
+        
+        component_probabilities, interior_probability = result
+        for solution, cell_probabilities in zip(solved, component_probabilities):
+            probabilities.flat[solution.cells] = cell_probabilities
+        probabilities[interior] = interior_probability
+        
+        return True
+    
+    def deduce(self, state: HiddenBoardState) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Fast path: only the linear algebra deductions, without any (exponential) enumeration.
+        
+        :param state: (hidden) board state
+        :return: layouts of the cells that must be safe and of the cells that must be mines
+        """
+        safe = np.zeros(state.openable_layout.shape, dtype=bool)
+        mines = np.zeros(state.openable_layout.shape, dtype=bool)
+        
+        for component in frontier_components(state):
+            for v, mine in deduce_component(component).items():
+                (mines if mine else safe).flat[component.cells[v]] = True
+        
+        return safe, mines
+    
+    def _solve_all(self, components: List[Component]) -> List[ComponentSolution]:
+        large = [component for component in components if component.size >= self.parallel_threshold]
+        if len(large) < 2 or self.workers == 0:
+            return [solve_component(component) for component in components]
+        
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers)
+        
+        futures = {id(component): self._pool.submit(solve_component, component) for component in large}
+        return [futures[id(component)].result() if id(component) in futures else solve_component(component)
+                for component in components]
+    
+    def close(self):
+        if self._pool is not None:
+            self._pool.shutdown()
+            self._pool = None
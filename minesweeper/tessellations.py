@@ -0,0 +1,108 @@
+from typing import Sequence, Tuple
+
+import numpy as np
+from scipy.sparse import csr_matrix
+
+from minesweeper.adjacency import ADJACENT_OFFSETS
+
+
+# Cells of every tessellation are laid out on a (W, H) grid of (x, y) positions (x to the right, y down), so that grid
+# states, layouts and flat indices (x * H + y) work exactly as for square boards; only the adjacency (and the shape of
+# the cells) differs. Where the neighbors depend on the cell, they are given per parity class of the cell.
+
+# hexagons in rows (pointy tops), odd rows shifted right by half a cell: offsets by the parity of y
+HEX_OFFSETS = (((-1, 0), (1, 0), (-1, -1), (0, -1), (-1, 1), (0, 1)),
+               ((-1, 0), (1, 0), (0, -1), (1, -1), (0, 1), (1, 1)))
+
+# triangles sharing an edge or a corner (12 neighbors): offsets by the parity of x + y (even: pointing up)
+TRIANGLE_OFFSETS = (tuple((dx, -1) for dx in range(-1, 2)) + tuple((dx, 0) for dx in (-2, -1, 1, 2)) +
+                    tuple((dx, 1) for dx in range(-2, 3)),
+                    tuple((dx, -1) for dx in range(-2, 3)) + tuple((dx, 0) for dx in (-2, -1, 1, 2)) +
+                    tuple((dx, 1) for dx in range(-1, 2)))
+
+
+def offset_adjacency(size: Tuple[int, int], offsets: Sequence[Sequence[Tuple[int, int]]], parity, wrap: bool = False) \
+        -> csr_matrix:
+    """
+    :param size: size of the grid, in cells
+    :param offsets: offsets of the adjacent cells, for every parity class of cells
+    :param parity: function of the (x, y) coordinate arrays, giving the parity class of every cell
+    :param wrap: whether the grid wraps around at its edges (a torus), rather than ending
+    :return: symmetric (W * H, W * H) adjacency matrix over the flat cell indices
+    """
+    w, h = size
+    xs, ys = np.divmod(np.arange(w * h), h)
+    classes = parity(xs, ys)
+    
+    rows, cols = [], []
+    for parity_class, class_offsets in enumerate(offsets):
+        cells = np.flatnonzero(classes == parity_class)
+        for dx, dy in class_offsets:
+            adj_xs, adj_ys = xs[cells] + dx, ys[cells] + dy
+            if wrap:
+                adj_xs, adj_ys = adj_xs % w, adj_ys % h
+            valid = (0 <= adj_xs) & (adj_xs < w) & (0 <= adj_ys) & (adj_ys < h)
+            rows.append(cells[valid])
+            cols.append(adj_xs[valid] * h + adj_ys[valid])
+    
+    rows, cols = np.concatenate(rows), np.concatenate(cols)
+    
+    # tiny wrapped grids reach cells several ways (or themselves): every neighbor counts once, a cell never
+    distinct = rows != cols
+    adjacency = csr_matrix((np.ones(np.count_nonzero(distinct), dtype=np.int8), (rows[distinct], cols[distinct])),
+                           shape=(w * h, w * h))
+    adjacency.data[:] = 1
+    adjacency.sort_indices()
+    return adjacency
+
+
+def hex_adjacency(size: Tuple[int, int]) -> csr_matrix:
+    return offset_adjacency(size, HEX_OFFSETS, lambda xs, ys: ys % 2)
+
+
+def triangle_adjacency(size: Tuple[int, int]) -> csr_matrix:
+    return offset_adjacency(size, TRIANGLE_OFFSETS, lambda xs, ys: (xs + ys) % 2)
+
+
+def torus_adjacency(size: Tuple[int, int]) -> csr_matrix:
+    return offset_adjacency(size, (ADJACENT_OFFSETS,), lambda xs, ys: np.zeros_like(xs), wrap=True)
+
+
+################################################################################
+#                                   Geometry                                   #
+################################################################################
+
+def hex_polygons(size: Tuple[int, int]) -> np.ndarray:
+    """
+    :return: (W, H, 6, 2) vertices of every cell, for hexagons one unit wide
+    """
+    w, h = size
+    xs, ys = np.meshgrid(np.arange(w), np.arange(h), indexing='ij')
+    radius = 1 / np.sqrt(3)
+    
+    centers = np.stack([xs + 0.5 * (ys % 2) + 0.5, 1.5 * radius * ys + radius], axis=-1)
+    angles = np.radians(30 + 60 * np.arange(6))
+    corners = radius * np.stack([np.cos(angles), np.sin(angles)], axis=-1)
+    return centers[:, :, np.newaxis, :] + corners
+
+
+def triangle_polygons(size: Tuple[int, int]) -> np.ndarray:
+    """
+    :return: (W, H, 3, 2) vertices of every cell, for triangles with sides one unit long
+    """
+    w, h = size
+    xs, ys = np.meshgrid(np.arange(w), np.arange(h), indexing='ij')
+    height = np.sqrt(3) / 2
+    up = (xs + ys) % 2 == 0
+    
+    left, right, middle = 0.5 * xs, 0.5 * xs + 1, 0.5 * xs + 0.5
+    top, bottom = height * ys, height * (ys + 1)
+    base, apex = np.where(up, bottom, top), np.where(up, top, bottom)
+    return np.stack([np.stack([left, base], -1), np.stack([right, base], -1), np.stack([middle, apex], -1)], axis=2)
+
+
+def polygons_extent(polygons: np.ndarray) -> np.ndarray:
+    """
+    :return: width and height of the bounding box of all polygons (which start at the origin)
+    """
+    return polygons.reshape(-1, 2).max(axis=0)
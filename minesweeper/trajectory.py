@@ -0,0 +1,172 @@
+import os
+from typing import Callable, Optional, Tuple
+
+import numpy as np
+
+from minesweeper.actions import Action, ActionType
+
+
+# one record per processed action; positionless actions (superchord, surrender) have x = y = -1
+STEP_DTYPE = np.dtype([('game', '<u4'),
+                       ('type', 'u1'),
+                       ('x', '<i2'),
+                       ('y', '<i2'),
+                       ('tick', '<u4'),
+                       ('opened', '<i4'),   # number of cells opened by the action
+                       ('outcome', 'i1')])  # outcome of the game after the action (see corpus.py)
+
+# full (bit-packed) open/flag layouts of a game after its first `step` actions, stored every few steps
+KEYFRAME_DTYPE = np.dtype([('game', '<u4'),
+                           ('step', '<u4'),
+                           ('offset', '<u8'),
+                           ('width', '<u2'),
+                           ('height', '<u2')])
+
+ACTION_TYPES = {action_type.value[0]: action_type for action_type in ActionType}
+
+
+def type_code(action_type: ActionType) -> int:
+    return action_type.value[0]
+
+
+def to_action(step: np.void) -> Action:
+    """
+    :param step: a recorded step
+    :return: the action of the step
+    """
+    action_type = ACTION_TYPES[int(step['type'])]
+    return Action(action_type, (int(step['x']), int(step['y'])) if action_type.has_pos else (-1, -1))
+
+
+class TrajectoryWriter:
+    """
+    Streams the actions of every game into a compact binary log (<name>.bin, an array of STEP_DTYPE records). Steps are
+    collected in a fixed-size buffer, which is only written out once full (or on flush()).
+    
+    Next to the actions, keyframes of the full board state are stored every keyframe_interval steps of a game (the
+    packed layouts in <name>.key, their KEYFRAME_DTYPE records in <name>.kix), so that any step can be restored
+    quickly (see replay.py).
+    """
+    
+    def __init__(self, root: str = 'runs', name: str = 'trajectories', buffer_size: int = 4096,
+                 keyframe_interval: int = 32):
+        """
+        :param root: directory of the log (created if needed)
+        :param name: base name of the log files
+        :param buffer_size: number of steps buffered before they are written
+        :param keyframe_interval: number of steps between keyframes of a game
+        """
+        os.makedirs(root, exist_ok=True)
+        
+        self._file = os.path.join(root, f'{name}.bin')
+        self._keyframe_file = os.path.join(root, f'{name}.key')
+        self._keyframe_index_file = os.path.join(root, f'{name}.kix')
+        
+        self._buffer = np.zeros(buffer_size, dtype=STEP_DTYPE)
+        self._buffered = 0
+        
+        self.keyframe_interval = keyframe_interval
+        self._keyframes = []
+        self._keyframe_offset = os.path.getsize(self._keyframe_file) if os.path.exists(self._keyframe_file) else 0
+        
+        self._game = None
+        self._step = 0
+    
+    def start_game(self, game: int, open_layout: np.ndarray, flag_layout: np.ndarray):
+        """
+        Starts recording a game, with a keyframe of its initial state.
+        
+        :param game: number of the game
+        :param open_layout: open cells of the board
+        :param flag_layout: flagged cells of the board
+        """
+        self._game, self._step = game, 0
+        self._keyframe(open_layout, flag_layout)
+    
+    def record(self, game: int, action: Action, tick: int, opened: int, outcome: int,
+               layouts: Optional[Callable[[], Tuple[np.ndarray, np.ndarray]]] = None):
+        """
+        Records a processed action.
+        
+        :param game: number of the game
+        :param action: the action
+        :param tick: tick (frame) of the game at which the action was processed
+        :param opened: number of cells opened by the action
+        :param outcome: outcome of the game after the action
+        :param layouts: function giving the open and the flagged cells of the board after the action (only called
+            when a keyframe is due)
+        """
+        if game != self._game:
+            self._game, self._step = game, 0
+        
+        x, y = action.pos if action.type.has_pos else (-1, -1)
+        self._buffer[self._buffered] = (game, type_code(action.type), x, y, tick, opened, outcome)
+        self._buffered += 1
+        self._step += 1
+        
+        if layouts is not None and self._step % self.keyframe_interval == 0:
+            self._keyframe(*layouts())
+        
+        if self._buffered == len(self._buffer):
+            self.flush()
+    
+    def _keyframe(self, open_layout: np.ndarray, flag_layout: np.ndarray):
+        packed = np.concatenate([np.packbits(open_layout.ravel()), np.packbits(flag_layout.ravel())]).tobytes()
+        record = (self._game, self._step, self._keyframe_offset, *open_layout.shape)
+        
+        self._keyframes.append((record, packed))
+        self._keyframe_offset += len(packed)
+    
+    def flush(self):
+        if self._buffered > 0:
+            with open(self._file, 'ab') as f:
+                f.write(self._buffer[:self._buffered].tobytes())
+            self._buffered = 0
+        
+        # the keyframe data is written before its index, so indexed keyframes are always complete
+        if len(self._keyframes) > 0:
+            with open(self._keyframe_file, 'ab') as f:
+                f.write(b''.join(packed for _, packed in self._keyframes))
+            with open(self._keyframe_index_file, 'ab') as f:
+                f.write(np.array([record for record, _ in self._keyframes], dtype=KEYFRAME_DTYPE).tobytes())
+            self._keyframes = []
+    
+    def close(self):
+        self.flush()
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class TrajectoryReader:
+    """
+    Memory-mapped access to the steps of a trajectory log written by TrajectoryWriter.
+    """
+    
+    def __init__(self, root: str = 'runs', name: str = 'trajectories'):
+        file = os.path.join(root, f'{name}.bin')
+        size = os.path.getsize(file) if os.path.exists(file) else 0
+        
+        # only whole records (a write may have been cut off)
+        self.steps: np.ndarray = np.memmap(file, dtype=STEP_DTYPE, mode='r', shape=(size // STEP_DTYPE.itemsize,)) \
+            if size >= STEP_DTYPE.itemsize else np.empty(0, dtype=STEP_DTYPE)
+    
+    def __len__(self):
+        return len(self.steps)
+    
+    def game(self, game: int) -> np.ndarray:
+        """
+        :param game: number of a game
+        :return: all recorded steps of the game (games are recorded in order)
+        """
+        start, end = np.searchsorted(self.steps['game'], [game, game + 1])
+        return self.steps[start:end]
+    
+    def actions(self, game: int, stop: Optional[int] = None):
+        """
+        :return: the actions of the game (up to the given step)
+        """
+        return [to_action(step) for step in self.game(game)[:stop]]
@@ -1,9 +1,18 @@
 from collections import namedtuple, deque
 from dataclasses import dataclass, field
 from time import time as current_time_sec
-import pygame
 
-from typing import Deque, Literal, Any
+from typing import Deque, Literal, Any, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    import pygame
+
+
+def _clock() -> 'pygame.time.Clock':
+    # pygame is only imported when a clock is actually needed, so that headless code can use these utilities
+    import pygame
+    
+    return pygame.time.Clock()
 
 
 ################################################################################
@@ -15,7 +24,7 @@ class Transient:
     obj: Any
     time: int
     fade: int = 0
-    timer: pygame.time.Clock = field(default_factory=lambda: pygame.time.Clock)
+    timer: 'pygame.time.Clock' = field(default_factory=_clock)
         
     def restart(self):
         self.timer.tick()
@@ -127,7 +136,7 @@ class Delayer:
     __slots__ = ['_clock', '_fps', '_ticks']
     
     def __init__(self, initial_fps=30):
-        self._clock = pygame.time.Clock()
+        self._clock = _clock()
         self._fps = initial_fps
         self._ticks = TimeMovingAverage()
     
@@ -152,6 +161,7 @@ class Delayer:
         
         # TODO: adaptive framerate? (lagging in no more than 10% of ticks) to prevent backlogs
         if delay:
+            import pygame
             pygame.time.delay(delay_time)
         
         return delay_time
@@ -199,7 +209,7 @@ class TickRepeater:
         self._wait_ticks = initial_delay
         
         if time_based:
-            self._tick_generator = pygame.time.Clock().tick
+            self._tick_generator = _clock().tick
         else:
             self._tick_generator = lambda: 1
         
@@ -1,4 +1,5 @@
 import minesweeper
+import minesweeper.agents  # registers the built-in agents
 from minesweeper.game import Game
 from minesweeper.config import Config
 
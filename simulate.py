@@ -0,0 +1,5 @@
+from minesweeper.simulate import main
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+from minesweeper.batch import BatchSquareBoard
+
+
+class Config:
+    forgiveness = 0
+
+
+LAYOUT = np.array([[0, 0, 0, 0, 0],
+                   [0, 0, 0, 0, 0],
+                   [0, 0, 0, 1, 0],
+                   [0, 0, 0, 0, 0],
+                   [1, 0, 0, 0, 1]], dtype=bool)
+
+
+@pytest.fixture
+def board():
+    return BatchSquareBoard(LAYOUT.shape, 3, lambda size, batch: np.stack([LAYOUT] * batch), Config)
+
+
+class TestBatchSquareBoard:
+
+    def test_proximity(self, board):
+        assert board.proximity_matrix[0, 2, 3] == -1
+        assert board.proximity_matrix[0, 3, 4] == 2
+        assert board.proximity_matrix[0, 0, 0] == 0
+        assert np.all(board.proximity_matrix == board.proximity_matrix[0])
+
+    def test_flood_fill(self, board):
+        board.select(np.array([[0, 0], [4, 1], [1, 3]]))
+
+        # empty region opens up to (and including) its bordering numbers, but not the empty cell at (4, 2)
+        assert board.open_layout[0, 0, 0] and board.open_layout[0, 3, 2]
+        assert not board.open_layout[0, 4, 2]
+        assert not np.any(board.open_layout[0] & LAYOUT)
+        assert np.all(board.open_cells == [16, 1, 1])
+        assert not np.any(board.completed)
+
+    def test_mask(self, board):
+        board.select(np.array([[0, 0], [2, 3], [0, 0]]), mask=np.array([False, True, False]))
+
+        assert np.all(board.failed == [False, True, False])
+        assert np.all(board.open_cells == [0, 1, 0])
+
+    def test_chord_and_superchord(self, board):
+        board.toggle_flag(np.array([[2, 3]] * 3))
+        board.select(np.array([[3, 4]] * 3))
+        board.chord(np.array([[3, 4]] * 3))
+
+        # only one of the two adjacent mines is flagged, so nothing is chorded
+        assert np.all(board.open_cells == 1)
+
+        board.toggle_flag(np.array([[4, 4]] * 3))
+        board.chord(np.array([[3, 4]] * 3), mask=np.array([True, False, False]))
+        assert board.open_cells[0] > 1 and board.open_cells[1] == 1
+
+        board.superchord()
+        assert np.all(board.open_cells == board.open_cells[0])
+        assert not np.any(board.failed)
+
+    def test_positions_shape(self, board):
+        with pytest.raises(ValueError):
+            board.select(np.array([[2, 3]]), mask=np.array([False, True, False]))
+
+    def test_first_select(self, board):
+        board.first_select(np.array([[2, 3]] * 3))
+
+        assert not np.any(board.failed)
+        assert np.all(board.proximity_matrix[:, 2, 3] == 0)
+        assert np.all(board.mines == 2)
+
+    def test_reset(self, board):
+        board.select(np.array([[0, 0]] * 3))
+        board.reset(np.array([True, False, False]))
+
+        assert np.all(board.open_cells[0] == 0)
+        assert np.all(board.open_cells[1:] > 0)
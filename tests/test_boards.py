@@ -0,0 +1,381 @@
+from collections import deque
+
+import numpy as np
+import pytest
+
+import minesweeper
+from minesweeper.adjacency import ADJACENT_OFFSETS, neighbor_index
+from minesweeper.boards import ChunkedBoard, ChunkedGridState, GraphBoard, HexBoard, SquareBoard, SquareGridState, \
+    TorusBoard, TriangleBoard
+from minesweeper.batch import BatchSquareBoard
+from minesweeper.chunks import ChunkedArray
+from minesweeper.seeders import hashed_uniform_random
+from minesweeper.tessellations import offset_adjacency
+
+
+class Config:
+    forgiveness = 0
+
+
+def random_layouts(count, size, mine_prob, seed=0):
+    return np.random.default_rng(seed).uniform(0., 1., (count, *size)) <= mine_prob
+
+
+def headless_board(layout):
+    return SquareBoard(SquareGridState(layout.shape), lambda size: layout.copy(), Config)
+
+
+class TestNeighborIndex:
+    
+    @pytest.mark.parametrize('size', [(1, 1), (1, 5), (4, 3), (7, 7)])
+    def test_matches_offsets(self, size):
+        index = neighbor_index(size)
+        
+        for x, y in np.ndindex(size):
+            expected = {(x + dx, y + dy) for dx in (-1, 0, 1) for dy in (-1, 0, 1)
+                        if (dx, dy) != (0, 0) and 0 <= x + dx < size[0] and 0 <= y + dy < size[1]}
+            assert {index.pos_of(i) for i in index.of_pos((x, y))} == expected
+    
+    def test_shared(self):
+        assert neighbor_index((5, 6)) is neighbor_index((5, 6))
+        assert not neighbor_index((5, 6)).neighbors.flags.writeable
+
+
+class TestSquareBoard:
+    
+    @pytest.fixture
+    def layout(self):
+        return random_layouts(1, (12, 9), 0.15)[0]
+    
+    def test_headless(self, layout):
+        board = headless_board(layout)
+        
+        assert board.mines == np.sum(layout)
+        assert board.open_cells == 0
+        
+        safe = tuple(np.argwhere(~layout)[0])
+        board.select(safe)
+        assert board.open_cells >= 1 and not board.failed
+    
+    def test_listener(self, layout):
+        changes = []
+        
+        class Listener:
+            def cells_changed(self, positions):
+                changes.extend(positions)
+            
+            def grid_refilled(self):
+                changes.append('refilled')
+        
+        state = SquareGridState(layout.shape)
+        state.add_listener(Listener())
+        board = SquareBoard(state, lambda size: layout.copy(), Config)
+        board.toggle_flag((0, 0))
+        
+        assert changes == ['refilled', (0, 0)]
+    
+    @pytest.mark.parametrize('pos', [(0, 0), (5, 4), (11, 8), (1, 7)])
+    def test_incremental_counts(self, layout, pos):
+        board = headless_board(layout)
+        board.first_select(pos)
+        
+        assert np.all(board.proximity_matrix == SquareBoard.add_neighbors(board.mine_layout))
+        
+        rng = np.random.default_rng(0)
+        for _ in range(20):
+            board.toggle_flag(tuple(rng.integers(0, (12, 9))))
+            board.select(tuple(rng.integers(0, (12, 9))))
+        
+        known = board.flag_layout | (board.open_layout & board.mine_layout)
+        assert np.all(board.known_mine_counts == SquareBoard.count_neighbors(known))
+    
+    @pytest.mark.parametrize('seed', range(10))
+    def test_superchord_matches_fixed_point(self, seed):
+        layout = random_layouts(1, (20, 15), 0.15, seed=seed)[0]
+        rng = np.random.default_rng(seed)
+        
+        board, reference = headless_board(layout), headless_board(layout)
+        for _ in range(15):
+            # mostly correct flags, with a few wrong ones
+            flag = tuple(rng.integers(0, (20, 15)))
+            if layout[flag] or rng.uniform() < 0.1:
+                board.toggle_flag(flag)
+                reference.toggle_flag(flag)
+            pos = tuple(rng.integers(0, (20, 15)))
+            if not layout[pos]:
+                board.select(pos)
+                reference.select(pos)
+        
+        board.superchord()
+        
+        # whole-board fixed-point superchord
+        while True:
+            open_cells = reference.open_cells
+            known = reference.flag_layout | (reference.mine_layout & reference.open_layout)
+            complete = (SquareBoard.add_neighbors(known) == reference.proximity_matrix) & reference.open_layout
+            for pos in np.argwhere(SquareBoard.add_neighbors(complete) > 0):
+                reference.select(tuple(pos))
+            if open_cells == reference.open_cells:
+                break
+        
+        assert np.all(board.open_layout == reference.open_layout)
+    
+    def test_flood_fill_through_flags(self):
+        layout = np.zeros((6, 6), dtype=bool)
+        board = headless_board(layout)
+        
+        # adjacent flagged empty cells must not keep re-queueing each other
+        board.toggle_flag((2, 2))
+        board.toggle_flag((2, 3))
+        board.select((0, 0))
+        
+        assert board.open_cells == 34 and board.flags == 2
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_matches_batch(self, seed):
+        layouts = random_layouts(4, (16, 16), 0.12, seed=seed)
+        rng = np.random.default_rng(seed)
+        
+        batch = BatchSquareBoard((16, 16), 4, lambda size, batch: layouts.copy(), Config)
+        boards = [headless_board(layout) for layout in layouts]
+        
+        for _ in range(6):
+            positions = rng.integers(0, 16, (4, 2))
+            flags = rng.integers(0, 16, (4, 2))
+            
+            batch.toggle_flag(flags)
+            batch.select(positions)
+            batch.chord(positions)
+            for board, pos, flag in zip(boards, positions, flags):
+                board.toggle_flag(tuple(flag))
+                board.select(tuple(pos))
+                board.chord(tuple(pos))
+        
+        batch.superchord()
+        for board in boards:
+            board.superchord()
+        
+        for i, board in enumerate(boards):
+            assert np.all(batch.open_layout[i] == board.open_layout)
+            assert np.all(batch.flag_layout[i] == board.flag_layout)
+            assert batch.failed[i] == board.failed
+
+
+class SquareGraphBoard(GraphBoard):
+    # the square grid as a graph, which must play exactly like SquareBoard
+    adjacency_of = staticmethod(lambda size: offset_adjacency(size, (ADJACENT_OFFSETS,), lambda xs, ys: 0 * xs))
+
+
+class TestGraphBoard:
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_square_graph_matches_square(self, seed):
+        layout = random_layouts(1, (14, 11), 0.15, seed=seed)[0]
+        rng = np.random.default_rng(seed)
+        
+        board = SquareGraphBoard(SquareGridState(layout.shape), lambda size: layout.copy(), Config)
+        reference = headless_board(layout)
+        assert np.all(board.proximity_matrix == reference.proximity_matrix)
+        
+        first = tuple(rng.integers(0, (14, 11)))
+        board.first_select(first)
+        reference.first_select(first)
+        for _ in range(10):
+            flag, pos = tuple(rng.integers(0, (14, 11))), tuple(rng.integers(0, (14, 11)))
+            for played in (board, reference):
+                played.toggle_flag(flag)
+                played.select(pos)
+                played.chord(pos)
+        board.superchord()
+        reference.superchord()
+        
+        assert np.all(board.mine_layout == reference.mine_layout)
+        assert np.all(board.proximity_matrix == reference.proximity_matrix)
+        assert np.all(board.open_layout == reference.open_layout)
+        assert np.all(board.known_mine_counts == reference.known_mine_counts)
+    
+    @pytest.mark.parametrize('board_cls', [HexBoard, TriangleBoard, TorusBoard])
+    @pytest.mark.parametrize('seed', range(3))
+    def test_counts_follow_adjacency(self, board_cls, seed):
+        board = board_cls.create((12, 9), 0.2, Config)
+        rng = np.random.default_rng(seed)
+        adjacency = board.adjacency_matrix
+        
+        def counts(layout):
+            return (adjacency @ layout.ravel().astype(int)).reshape(layout.shape)
+        
+        pos = tuple(rng.integers(0, (12, 9)))
+        board.first_select(pos)
+        assert not board.failed
+        assert not np.any(board.mine_layout.flat[board.adjacency.of_pos(pos)])
+        assert np.all(board.proximity_matrix == np.where(board.mine_layout, -1, counts(board.mine_layout)))
+        
+        for _ in range(20):
+            board.toggle_flag(tuple(rng.integers(0, (12, 9))))
+            board.select(tuple(rng.integers(0, (12, 9))))
+        
+        known = board.flag_layout | (board.open_layout & board.mine_layout)
+        assert np.all(board.known_mine_counts == counts(known))
+    
+    @pytest.mark.parametrize('board_cls', [HexBoard, TriangleBoard, TorusBoard])
+    @pytest.mark.parametrize('seed', range(3))
+    def test_flood_fill_matches_search(self, board_cls, seed):
+        board = board_cls.create((15, 12), 0.1, Config)
+        empty = np.argwhere(board.proximity_matrix == 0)
+        start = tuple(empty[np.random.default_rng(seed).integers(len(empty))])
+        
+        # breadth-first search through the empty cells, along the adjacency
+        expected = {board.adjacency.index_of(start)}
+        queue = deque(expected)
+        while queue:
+            index = queue.popleft()
+            if board.proximity_matrix.flat[index] != 0:
+                continue
+            for adj_index in board.adjacency.of(index).tolist():
+                if adj_index not in expected:
+                    expected.add(adj_index)
+                    queue.append(adj_index)
+        
+        board.select(start)
+        assert set(np.flatnonzero(board.open_layout).tolist()) == expected
+    
+    def test_torus_wraps(self):
+        layout = np.zeros((6, 5), dtype=bool)
+        layout[0, 0] = True
+        board = TorusBoard(SquareGridState(layout.shape), lambda size: layout.copy(), Config)
+        
+        assert board.proximity_matrix[5, 4] == board.proximity_matrix[1, 1] == 1
+        assert board.proximity_matrix[3, 2] == 0
+
+
+class TestChunkedArray:
+    
+    def test_lazy_allocation(self):
+        array = ChunkedArray((1000, 1000), dtype=np.int8, chunk_size=64)
+        
+        assert array[500, 500] == 0 and array[:100, 900:].sum() == 0
+        assert array.nbytes == 0
+        
+        array[500, 500] = 3
+        assert array[500, 500] == 3 and len(array.chunks) == 1
+    
+    def test_matches_dense(self):
+        rng = np.random.default_rng(0)
+        dense = np.zeros((37, 23), dtype=np.int8)
+        array = ChunkedArray(dense.shape, dtype=np.int8, chunk_size=8)
+        
+        xs, ys = rng.integers(0, 37, 50), rng.integers(0, 23, 50)
+        values = rng.integers(1, 100, 50).astype(np.int8)
+        dense[xs, ys] = values
+        array[xs, ys] = values
+        
+        assert np.array_equal(array.dense(), dense)
+        assert np.array_equal(array[5:30, 7:], dense[5:30, 7:])
+        assert np.array_equal(array[xs[::-1], ys], dense[xs[::-1], ys])
+        assert all(array[x, y] == dense[x, y] for x, y in np.ndindex(dense.shape))
+    
+    def test_generated(self):
+        array = ChunkedArray((20, 20), dtype=int, chunk_size=8,
+                             generate=lambda key: np.full(array.chunk_shape(key), key[0] * 10 + key[1]))
+        
+        assert array[19, 9] == 21 and array.chunk((2, 2)).shape == (4, 4)
+        
+        array[19, 9] = -1
+        array.discard((slice(0, 1), slice(0, 1)))
+        assert array[19, 9] == -1
+        
+        array.discard((slice(17, 18), slice(8, 9)))
+        assert array[19, 9] == 21
+
+
+class TestChunkedBoard:
+    
+    @staticmethod
+    def boards(layout, chunk_size=4):
+        # the same layout, cut into chunks
+        def seeder(key, chunk_shape):
+            return layout[key[0] * chunk_size:key[0] * chunk_size + chunk_shape[0],
+                          key[1] * chunk_size:key[1] * chunk_size + chunk_shape[1]]
+        
+        chunked = ChunkedBoard(ChunkedGridState(layout.shape, chunk_size=chunk_size), seeder, Config)
+        return chunked, headless_board(layout)
+    
+    @pytest.mark.parametrize('seed', range(10))
+    def test_matches_square(self, seed):
+        layout = random_layouts(1, (21, 14), 0.15, seed=seed)[0]
+        rng = np.random.default_rng(seed)
+        board, reference = TestChunkedBoard.boards(layout)
+        
+        assert np.array_equal(board.proximity_matrix, reference.proximity_matrix)
+        
+        pos = tuple(rng.integers(0, (21, 14)))
+        board.first_select(pos)
+        reference.first_select(pos)
+        assert np.array_equal(board.proximity_matrix, reference.proximity_matrix)
+        
+        for _ in range(15):
+            flag, pos = tuple(rng.integers(0, (21, 14))), tuple(rng.integers(0, (21, 14)))
+            for b in (board, reference):
+                b.toggle_flag(flag)
+                b.select(pos)
+                b.chord(pos)
+        
+        board.superchord()
+        reference.superchord()
+        
+        assert np.array_equal(board.open_layout, reference.open_layout)
+        assert np.array_equal(board.flag_layout, reference.flag_layout)
+        assert (board.open_cells, board.open_mines, board.flags, board.mines, board.completed, board.failed) == \
+               (reference.open_cells, reference.open_mines, reference.flags, reference.mines, reference.completed,
+                reference.failed)
+        
+        state, reference_state = board.hidden_state(), reference.hidden_state()
+        assert np.array_equal(state.proximity_matrix, reference_state.proximity_matrix)
+        assert state.mine_count == reference_state.mine_count
+    
+    def test_completed(self):
+        layout = np.zeros((10, 10), dtype=bool)
+        layout[9, 9] = True
+        board, _ = TestChunkedBoard.boards(layout)
+        
+        board.select((0, 0))
+        assert board.completed and not board.failed and board.open_cells == 99
+    
+    def test_completed_by_flags(self):
+        layout = np.zeros((10, 10), dtype=bool)
+        layout[[1, 2], [1, 2]] = True
+        board, _ = TestChunkedBoard.boards(layout)
+        
+        board.toggle_flag((1, 1))
+        assert not board.completed
+        
+        # the chunks without any flags still have to be free of mines
+        board.toggle_flag((2, 2))
+        assert board.completed and board.mines == 2 and board.open_cells == 0
+        
+        board.toggle_flag((2, 2))
+        assert not board.completed
+    
+    def test_huge_board_stays_small(self):
+        board = ChunkedBoard(ChunkedGridState((1_000_000, 1_000_000)), hashed_uniform_random(0.1, 0), Config)
+        
+        pos = (500_000, 500_000)
+        board.first_select(pos)
+        board.superchord()
+        
+        assert board.grid.is_open(pos) and board.open_cells > 1
+        
+        # neither the game state nor the end of game checks count the mines of the whole board
+        assert not board.completed and not board.failed
+        assert len(board.grid.open.chunks) < 100 and len(board._mines.chunks) < 100
+
+
+class TestCreate:
+    
+    @pytest.mark.parametrize('name', sorted(minesweeper.BOARD_REGISTRY))
+    def test_registered_boards(self, name):
+        board_cls, _ = minesweeper.BOARD_REGISTRY[name]
+        board = board_cls.create((10, 8), 0.1, Config)
+        
+        assert isinstance(board, board_cls) and board.grid.size == (10, 8)
+        assert board.open_cells == 0 and not board.failed
@@ -0,0 +1,48 @@
+import numpy as np
+
+from minesweeper.corpus import COMPLETED, FAILED, UNFINISHED, BoardCorpus
+
+
+def random_game(rng, size):
+    return tuple(rng.uniform(0., 1., size) <= 0.3 for _ in range(3))
+
+
+class TestBoardCorpus:
+    
+    def test_round_trip(self, tmp_path):
+        rng = np.random.default_rng(0)
+        corpus = BoardCorpus(str(tmp_path))
+        games = [random_game(rng, size) for size in [(9, 9), (16, 30), (3, 5), (300, 300)]]
+        
+        for i, game in enumerate(games):
+            assert corpus.append(*game, outcome=COMPLETED if i % 2 else FAILED) == i
+        
+        for corpus in (corpus, BoardCorpus(str(tmp_path))):
+            assert len(corpus) == len(games)
+            assert list(corpus.outcomes) == [FAILED, COMPLETED, FAILED, COMPLETED]
+            for i, (mines, opened, flags) in enumerate(games):
+                state = corpus[i]
+                assert np.array_equal(state.mine_layout, mines)
+                assert np.array_equal(state.open_layout, opened)
+                assert np.array_equal(state.flag_layout, flags)
+    
+    def test_append_after_read(self, tmp_path):
+        rng = np.random.default_rng(1)
+        corpus = BoardCorpus(str(tmp_path))
+        first, second = random_game(rng, (8, 8)), random_game(rng, (8, 8))
+        
+        corpus.append(*first)
+        assert np.array_equal(corpus[0].mine_layout, first[0])
+        corpus.append(*second)
+        
+        assert np.array_equal(corpus[1].flag_layout, second[2])
+        assert list(corpus.outcomes) == [UNFINISHED, UNFINISHED]
+    
+    def test_torn_record(self, tmp_path):
+        corpus = BoardCorpus(str(tmp_path))
+        corpus.append(*random_game(np.random.default_rng(2), (5, 5)))
+        
+        with open(tmp_path / 'boards.idx', 'ab') as f:
+            f.write(b'\x01\x02\x03')
+        
+        assert len(BoardCorpus(str(tmp_path))) == 1
@@ -0,0 +1,79 @@
+import numpy as np
+import pytest
+
+torch = pytest.importorskip('torch')
+from torch.utils.data import DataLoader
+
+from minesweeper.board import neighbors
+from minesweeper.corpus import COMPLETED, FAILED, BoardCorpus
+from minesweeper.dataset import CorpusDataset, collate_dihedral, dihedral, random_dihedral
+
+
+@pytest.fixture
+def corpus_dir(tmp_path):
+    rng = np.random.default_rng(0)
+    corpus = BoardCorpus(str(tmp_path))
+    for game in range(12):
+        size = (6, 6) if game % 3 else (5, 7)
+        mines = rng.uniform(0., 1., size) <= 0.2
+        opened = rng.uniform(0., 1., size) <= 0.5
+        corpus.append(mines, opened, ~opened & mines, COMPLETED if game % 2 else FAILED)
+    return str(tmp_path)
+
+
+class TestCorpusDataset:
+    
+    def test_items(self, corpus_dir):
+        dataset = CorpusDataset(corpus_dir)
+        corpus = BoardCorpus(corpus_dir)
+        
+        assert len(dataset) == 12
+        for i in range(len(dataset)):
+            inputs, target = dataset[i]
+            state = corpus[i]
+            
+            assert inputs.shape == (2, *state.mine_layout.shape) and target.shape == (1, *state.mine_layout.shape)
+            assert np.array_equal(inputs[0].numpy(), ~state.open_layout & ~state.flag_layout)
+            assert np.array_equal(inputs[1].numpy(), np.where(state.open_layout, neighbors(state.mine_layout), 0))
+            assert np.array_equal(target[0].numpy(), state.mine_layout)
+    
+    def test_filters(self, corpus_dir):
+        assert len(CorpusDataset(corpus_dir, size=(6, 6))) == 8
+        assert len(CorpusDataset(corpus_dir, size=(6, 6), outcomes=[COMPLETED])) == 4
+    
+    def test_loader_workers(self, corpus_dir):
+        dataset = CorpusDataset(corpus_dir, size=(6, 6))
+        dataset[0]  # maps the corpus in this process, which must not be copied into the workers
+        
+        loader = DataLoader(dataset, batch_size=3, num_workers=2, collate_fn=collate_dihedral)
+        batches = list(loader)
+        
+        assert sum(len(inputs) for inputs, _ in batches) == 8
+        
+        # the same symmetry is applied to the inputs and the targets of each sample
+        samples = [dataset[i] for i in range(len(dataset))]
+        transformed = [(inputs, target) for batch in batches for inputs, target in zip(*batch)]
+        for (inputs, target), (result_inputs, result_target) in zip(samples, transformed):
+            assert any(torch.equal(dihedral(inputs, k), result_inputs) and
+                       torch.equal(dihedral(target, k), result_target) for k in range(8))
+
+
+class TestSymmetries:
+    
+    def test_dihedral_group(self):
+        square = torch.arange(16.).reshape(4, 4)
+        
+        transformed = {tuple(dihedral(square, k).flatten().tolist()) for k in range(8)}
+        assert len(transformed) == 8
+    
+    def test_random_dihedral(self):
+        batch = torch.arange(8 * 16.).reshape(8, 1, 4, 4)
+        transformed = random_dihedral(batch, torch.Generator().manual_seed(0))
+        
+        for sample, result in zip(batch, transformed):
+            assert any(torch.equal(dihedral(sample, k), result) for k in range(8))
+    
+    def test_non_square(self):
+        batch = torch.arange(16 * 15.).reshape(16, 1, 3, 5)
+        
+        assert random_dihedral(batch).shape == batch.shape
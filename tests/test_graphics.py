@@ -0,0 +1,236 @@
+import os
+
+import numpy as np
+import pytest
+
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+
+from minesweeper.boards import ChunkedBoard, ChunkedGridState, HexBoard, SquareGridState, TriangleBoard
+from minesweeper.graphics import HexGrid, SquareGrid, TriangleGrid, dirty_rects
+from minesweeper.seeders import hashed_uniform_random
+
+
+class Config:
+    res_dir = os.path.join(os.path.dirname(__file__), os.pardir, 'res')
+    hidden_cell_file = 'hidden_cell.png'
+    open_cell_file = 'open_cell.png'
+    cell_size = (8, 8)
+    bg_color = (255, 255, 255)
+    board_size = None
+
+
+def covered(rects, size):
+    mask = np.zeros(size, dtype=int)
+    for x, y, w, h in rects:
+        mask[x:x + w, y:y + h] += 1
+    return mask
+
+
+class TestDirtyRects:
+    
+    @pytest.mark.parametrize('seed', range(10))
+    def test_exact_cover(self, seed):
+        dirty = np.random.default_rng(seed).uniform(size=(13, 9)) < 0.4
+        assert np.array_equal(covered(dirty_rects(dirty), dirty.shape), dirty.astype(int))
+    
+    def test_full_grid_is_one_rect(self):
+        assert dirty_rects(np.ones((6, 4), dtype=bool)) == [(0, 0, 6, 4)]
+    
+    def test_clean_grid(self):
+        assert dirty_rects(np.zeros((6, 4), dtype=bool)) == []
+    
+    def test_column_merged(self):
+        dirty = np.zeros((5, 5), dtype=bool)
+        dirty[1:3, 1:4] = True
+        assert dirty_rects(dirty) == [(1, 1, 2, 3)]
+
+
+class TestSquareGrid:
+    
+    @pytest.fixture
+    def screen(self):
+        pygame.init()
+        yield pygame.display.set_mode((80, 48))
+        pygame.quit()
+    
+    @pytest.fixture
+    def grid(self, screen):
+        grid = SquareGrid(screen, screen.get_rect(), Config)
+        grid.attach(SquareGridState(grid.size))
+        return grid
+    
+    def test_full_redraw(self, grid):
+        assert grid.redraw() == [grid.rect]
+        assert grid.redraw() == []
+    
+    def test_duplicates_redrawn_once(self, grid):
+        grid.redraw()
+        grid.cells_changed([(2, 3), (2, 3), (3, 3)])
+        grid.cells_changed([(2, 3)])
+        
+        left, top = grid.rect.topleft
+        assert grid.redraw() == [pygame.Rect(left + 16, top + 24, 16, 8)]
+    
+    def test_draws_state(self, grid, screen):
+        grid.redraw()
+        hidden = pygame.surfarray.array3d(screen)[grid.rect.left:grid.rect.left + 8, grid.rect.top:grid.rect.top + 8]
+        
+        grid._state.select((0, 0))
+        grid.redraw()
+        opened = pygame.surfarray.array3d(screen)[grid.rect.left:grid.rect.left + 8, grid.rect.top:grid.rect.top + 8]
+        assert not np.array_equal(hidden, opened)
+    
+    def test_composite_matches_blits(self, grid, screen):
+        rng = np.random.default_rng(0)
+        state = grid._state
+        state.refill(rng.integers(-1, 9, grid.size).astype(np.int8), rng.uniform(size=grid.size) < 0.5)
+        for pos in np.argwhere(rng.uniform(size=grid.size) < 0.2):
+            state.toggle_flag(tuple(pos))
+        
+        assert grid.redraw() == [grid.rect]
+        composited = pygame.surfarray.array3d(screen)
+        
+        screen.fill((0, 0, 0))
+        for pos in np.ndindex(grid.size):
+            grid.cells_changed([pos])
+            grid.redraw()
+        assert np.array_equal(pygame.surfarray.array3d(screen), composited)
+
+
+class TestViewport:
+    
+    @pytest.fixture
+    def screen(self):
+        pygame.init()
+        yield pygame.display.set_mode((80, 48))
+        pygame.quit()
+    
+    @pytest.fixture
+    def grid(self, screen):
+        class LargeConfig(Config):
+            board_size = (1000, 2000)
+        
+        grid = SquareGrid(screen, screen.get_rect(), LargeConfig)
+        grid.attach(SquareGridState(grid.size))
+        return grid
+    
+    def test_view_fits_screen(self, grid):
+        assert grid.size == (1000, 2000)
+        assert grid.view == (slice(0, 10), slice(0, 6))
+        assert grid.redraw() == [grid.rect]
+    
+    def test_shift_clipped(self, grid):
+        grid.shift(-5, 3)
+        assert grid.view == (slice(0, 10), slice(3, 9))
+        
+        grid.shift(5000, 5000)
+        assert grid.view == (slice(990, 1000), slice(1994, 2000))
+    
+    def test_pos_of_scrolled(self, grid):
+        grid.shift(100, 200)
+        assert grid.pos_of((grid.rect.left + 17, grid.rect.top + 1)) == (102, 200)
+    
+    def test_only_visible_cells_redrawn(self, grid):
+        grid.shift(100, 200)
+        grid.redraw()
+        
+        grid.cells_changed([(0, 0), (500, 500), (101, 203)])
+        left, top = grid.rect.topleft
+        assert grid.redraw() == [pygame.Rect(left + 8, top + 24, 8, 8)]
+    
+    def test_scrolled_draw(self, grid, screen):
+        grid._state.select((105, 202))
+        grid.redraw()
+        before = pygame.surfarray.array3d(screen)
+        
+        grid.shift(100, 200)
+        assert grid.redraw() == [grid.rect]
+        
+        cell = (slice(grid.rect.left + 40, grid.rect.left + 48), slice(grid.rect.top + 16, grid.rect.top + 24))
+        assert not np.array_equal(pygame.surfarray.array3d(screen)[cell], before[cell])
+    
+    def test_chunked_grid(self, screen):
+        class HugeConfig(Config):
+            board_size = (1_000_000, 1_000_000)
+            forgiveness = 0
+        
+        grid = SquareGrid(screen, screen.get_rect(), HugeConfig)
+        board = ChunkedBoard(ChunkedGridState(grid.size), hashed_uniform_random(0.1, 0), HugeConfig)
+        grid.attach(board.grid)
+        grid.shift(500_000, 500_000)
+        assert grid.redraw() == [grid.rect]
+        
+        board.first_select((500_003, 500_002))
+        assert len(grid.redraw()) > 0
+        
+        # only the chunks around the view (and the opened region) were ever generated
+        assert len(board.grid.open.chunks) < 50
+    
+    
+    def test_zoom_out(self, grid, screen):
+        grid.shift(100, 200)
+        grid._state.select((101, 202))
+        
+        grid.zoom(2)
+        assert grid.zoom_level == 2 and grid.block_size == 16
+        
+        # 2 pixel blocks of 16 cells per side, around the previous center
+        assert grid.redraw() == [grid.rect]
+        assert grid.rect.size == (80, 48)
+        assert all(view.stop - view.start == length * 16 for view, length in zip(grid.view, (40, 24)))
+        assert grid.view[0].start <= 105 < grid.view[0].stop and grid.view[1].start <= 203 < grid.view[1].stop
+        assert grid.view[0].start % 16 == 0
+        
+        grid.cells_changed([(grid.view[0].start, grid.view[1].start)])
+        assert grid.redraw() == [grid.rect]
+        
+        # zoomed in again, around the center of the overview
+        center = [(view.start + view.stop) // 2 for view in grid.view]
+        grid.zoom(0)
+        assert grid.view == (slice(center[0] - 5, center[0] + 5), slice(center[1] - 3, center[1] + 3))
+
+
+class TestPolygonGrid:
+    
+    @pytest.fixture
+    def screen(self):
+        pygame.init()
+        yield pygame.display.set_mode((200, 120))
+        pygame.quit()
+    
+    @pytest.mark.parametrize('grid_cls, board_cls', [(HexGrid, HexBoard), (TriangleGrid, TriangleBoard)])
+    def test_draws_board(self, screen, grid_cls, board_cls):
+        class PolygonConfig(Config):
+            cell_size = (16, 16)
+            forgiveness = 0
+        
+        grid = grid_cls(screen, screen.get_rect(), PolygonConfig)
+        board = board_cls.create(grid.size, 0.1, PolygonConfig)
+        grid.attach(board.grid)
+        
+        assert screen.get_rect().contains(grid.rect)
+        assert grid.redraw() == [grid.rect]
+        assert grid.redraw() == []
+        
+        # every cell is found at its center, and only the changed cell is updated
+        for pos in np.ndindex(grid.size):
+            assert grid.pos_of(tuple(grid._centers[pos])) == pos
+        
+        before = pygame.surfarray.array3d(screen)
+        board.grid.toggle_flag((2, 2))
+        rects = grid.redraw()
+        assert len(rects) == 1 and rects[0].collidepoint(tuple(grid._centers[2, 2]))
+        assert not np.array_equal(pygame.surfarray.array3d(screen), before)
+    
+    def test_configured_size_scaled_to_fit(self, screen):
+        class LargeConfig(Config):
+            cell_size = (16, 16)
+            board_size = (60, 40)
+        
+        grid = HexGrid(screen, screen.get_rect(), LargeConfig)
+        grid.attach(SquareGridState(grid.size))
+        
+        assert grid.size == (60, 40)
+        assert screen.get_rect().contains(grid.rect)
@@ -0,0 +1,95 @@
+import sys
+
+import numpy as np
+import pytest
+from scipy.signal import convolve2d
+
+from minesweeper import kernels
+from minesweeper.kernels import BACKENDS, available_backends, best_backend, count_neighbors, proximity
+
+
+def reference_counts(layout):
+    kernel = np.ones((3, 3), dtype=int)
+    kernel[1, 1] = 0
+    return convolve2d(layout, kernel, mode='same', boundary='fill')
+
+
+def random_layout(shape, seed=0):
+    return np.random.default_rng(seed).uniform(size=shape) < 0.3
+
+
+class TestBackends:
+    
+    @pytest.mark.parametrize('backend', [name for name in BACKENDS if name not in kernels.STACK_BACKENDS])
+    @pytest.mark.parametrize('shape', [(1, 1), (1, 7), (3, 2), (16, 30), (101, 64)])
+    def test_single_layouts(self, backend, shape):
+        layout = random_layout(shape)
+        counts = count_neighbors(layout, backend=backend)
+        
+        assert counts.dtype == np.uint8
+        assert np.array_equal(counts, reference_counts(layout))
+    
+    @pytest.mark.parametrize('backend', [name for name in BACKENDS if name not in kernels.SINGLE_BACKENDS])
+    @pytest.mark.parametrize('shape', [(0, 4, 4), (1, 5, 5), (7, 16, 9)])
+    def test_stacks(self, backend, shape):
+        layouts = random_layout(shape)
+        counts = count_neighbors(layouts, backend=backend)
+        
+        assert counts.shape == shape
+        assert all(np.array_equal(layout_counts, reference_counts(layout))
+                   for layout_counts, layout in zip(counts, layouts))
+    
+    @pytest.mark.parametrize('backend', ['slices', 'ndimage', 'torch'])
+    def test_output_buffer(self, backend):
+        layouts = random_layout((4, 9, 8))
+        buffer = np.full((6, 9, 8), 99, dtype=np.int8)
+        
+        counts = count_neighbors(layouts, out=buffer[:4], backend=backend)
+        assert np.shares_memory(counts, buffer)
+        assert np.array_equal(buffer[:4], count_neighbors(layouts, backend='slices'))
+        assert np.all(buffer[4:] == 99)
+
+
+class TestProximity:
+    
+    @pytest.mark.parametrize('shape', [(1, 1), (9, 9), (30, 16), (300, 200), (5, 12, 10)])
+    def test_matches_convolution(self, shape):
+        mines = random_layout(shape, seed=1)
+        counts = reference_counts(mines) if mines.ndim == 2 else np.array([reference_counts(m) for m in mines])
+        
+        result = proximity(mines)
+        assert result.dtype == np.int8
+        assert np.array_equal(result, counts * (1 - mines) - mines)
+    
+    def test_output_buffer(self):
+        mines = random_layout((12, 10))
+        out = np.empty((12, 10), dtype=np.int8)
+        
+        assert proximity(mines, out) is out
+        assert np.array_equal(out, np.where(mines, -1, reference_counts(mines)))
+
+
+class TestSelection:
+    
+    def test_choice_cached(self, monkeypatch):
+        calls = []
+        benchmark = kernels._benchmark
+        monkeypatch.setattr(kernels, '_best_backends', {})
+        monkeypatch.setattr(kernels, '_benchmark', lambda *args: calls.append(args) or benchmark(*args))
+        
+        backend = best_backend((40, 50))
+        assert backend in available_backends(False)
+        
+        # layouts of the same size class reuse the measured choice
+        assert best_backend((50, 40)) == backend and best_backend((45, 45)) == backend
+        assert len(calls) == 1
+        
+        best_backend((4, 40, 50))
+        assert len(calls) == 2
+    
+    def test_torch_only_once_loaded(self, monkeypatch):
+        monkeypatch.delitem(sys.modules, 'torch', raising=False)
+        assert 'torch' not in available_backends(True)
+        
+        monkeypatch.setitem(sys.modules, 'torch', object())
+        assert 'torch' in available_backends(True) and 'torch' not in available_backends(False)
@@ -0,0 +1,39 @@
+import numpy as np
+import pytest
+
+from minesweeper.noguess import BoardPool, no_guess, solvable
+from minesweeper.seeders import uniform_random
+
+
+class TestNoGuess:
+    
+    def test_solvable(self):
+        layout = np.zeros((6, 6), dtype=bool)
+        layout[5, 5] = True
+        
+        assert solvable(layout, (0, 0))
+    
+    def test_guess_needed(self):
+        # the opened 1 cannot tell which of the three other cells is the mine
+        layout = np.array([[1, 0],
+                           [0, 0]], dtype=bool)
+        
+        assert not solvable(layout, (1, 1))
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_seeder(self, seed):
+        layouts = no_guess(uniform_random(0.15, seed))((9, 9), batch=3)
+        
+        for layout in layouts:
+            assert not np.any(layout[3:6, 3:6])
+            assert solvable(layout, (4, 4))
+    
+    def test_pool(self):
+        with BoardPool((8, 8), 0.12, capacity=4, workers=2, seed=1) as pool:
+            layouts = pool.seeder()((8, 8), batch=3)
+            
+            assert layouts.shape == (3, 8, 8) and layouts.dtype == bool
+            assert all(solvable(layout, pool.start) for layout in layouts)
+            
+            with pytest.raises(ValueError):
+                pool.seeder()((9, 9))
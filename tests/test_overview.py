@@ -0,0 +1,78 @@
+import numpy as np
+import pytest
+
+from minesweeper.boards import ChunkedBoard, ChunkedGridState, SquareBoard, SquareGridState
+from minesweeper.overview import EXPLODED, FLAGGED, OPEN, BlockPyramid
+from minesweeper.seeders import hashed_uniform_random
+
+
+class Config:
+    forgiveness = float('inf')
+
+
+def block_sums(layout, block_size):
+    # reference: pad to whole blocks, then reshape and sum
+    w, h = layout.shape
+    padded = np.pad(layout, ((0, -w % block_size), (0, -h % block_size))).astype(int)
+    return padded.reshape(padded.shape[0] // block_size, block_size, -1, block_size).sum(axis=(1, 3))
+
+
+class TestBlockPyramid:
+    
+    @pytest.mark.parametrize('seed', range(5))
+    def test_incremental_matches_reshape(self, seed):
+        rng = np.random.default_rng(seed)
+        layout = rng.uniform(size=(70, 45)) < 0.15
+        
+        state = SquareGridState(layout.shape)
+        board = SquareBoard(state, lambda size: layout.copy(), Config)
+        pyramid = BlockPyramid(layout.shape, levels=3, factor=4)
+        
+        class Listener:
+            def cells_changed(self, positions):
+                pyramid.update(state, positions)
+            
+            def grid_refilled(self):
+                pyramid.rebuild(state)
+        
+        state.add_listener(Listener())
+        for _ in range(40):
+            board.toggle_flag(tuple(rng.integers(0, layout.shape)))
+            board.select(tuple(rng.integers(0, layout.shape)))
+        
+        for level in (1, 2, 3):
+            block_size = 4 ** level
+            counts = pyramid.counts(level, (slice(None), slice(None)))
+            assert np.array_equal(counts[..., OPEN], block_sums(board.open_layout, block_size))
+            assert np.array_equal(counts[..., FLAGGED], block_sums(board.flag_layout, block_size))
+            assert np.array_equal(counts[..., EXPLODED],
+                                  block_sums(board.open_layout & board.mine_layout, block_size))
+        
+        rebuilt = BlockPyramid(layout.shape, levels=3, factor=4)
+        rebuilt.rebuild(state)
+        for level in (1, 2, 3):
+            assert np.array_equal(rebuilt.counts(level, (slice(None), slice(None))),
+                                  pyramid.counts(level, (slice(None), slice(None))))
+    
+    def test_colors(self):
+        state = SquareGridState((8, 8))
+        state.refill(np.zeros((8, 8), dtype=np.int8), np.arange(64).reshape(8, 8) < 32)
+        pyramid = BlockPyramid((8, 8), levels=1, factor=4)
+        pyramid.rebuild(state)
+        
+        colors = pyramid.colors(1, (slice(None), slice(None)))
+        assert colors.shape == (2, 2, 3) and colors.dtype == np.uint8
+        assert np.all(colors[0] > colors[1])  # open blocks are lighter than hidden ones
+    
+    def test_huge_grid(self):
+        state = ChunkedGridState((1_000_000, 1_000_000))
+        board = ChunkedBoard(state, hashed_uniform_random(0.1, 1), Config)
+        board.first_select((123_456, 654_321))
+        
+        pyramid = BlockPyramid(state.size)
+        pyramid.rebuild(state)
+        
+        top = pyramid.counts(4, (slice(123_456 // 256 - 1, 123_456 // 256 + 2),
+                                 slice(654_321 // 256 - 1, 654_321 // 256 + 2)))
+        assert top[..., OPEN].sum() == board.open_cells
+        assert sum(array.nbytes for channels in pyramid.levels for array in channels) < 10_000_000
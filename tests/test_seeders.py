@@ -0,0 +1,52 @@
+import numpy as np
+import pytest
+
+from minesweeper.seeders import hashed_uniform_random, number_mines, percent_mines, uniform_random
+
+
+class TestSeeders:
+    
+    @pytest.mark.parametrize('make_seeder', [lambda rng: uniform_random(0.2, rng),
+                                             lambda rng: number_mines(10, rng),
+                                             lambda rng: percent_mines(0.2, rng)])
+    def test_reproducible(self, make_seeder):
+        first, second = make_seeder(np.random.default_rng(5)), make_seeder(np.random.default_rng(5))
+        
+        assert np.array_equal(first((9, 7)), second((9, 7)))
+        assert np.array_equal(first((9, 7), batch=20), second((9, 7), batch=20))
+    
+    def test_shapes(self):
+        seeder = uniform_random(0.2, 0)
+        
+        assert seeder((9, 7)).shape == (9, 7)
+        assert seeder((9, 7), batch=5).shape == (5, 9, 7)
+    
+    @pytest.mark.parametrize('mines', [0, 1, 17, 62, 63, 100])
+    def test_exact_number(self, mines):
+        layouts = number_mines(mines, 1)((9, 7), batch=50)
+        
+        assert np.all(layouts.sum(axis=(1, 2)) == min(mines, 63))
+    
+    def test_percent(self):
+        layouts = percent_mines(0.15, 2)((16, 30), batch=10)
+        
+        assert np.all(layouts.sum(axis=(1, 2)) == int(0.15 * 16 * 30))
+    
+    def test_uniform_positions(self):
+        # every cell is equally likely to be a mine
+        frequencies = number_mines(10, 3)((5, 5), batch=20_000).mean(axis=0)
+        
+        assert np.allclose(frequencies, 10 / 25, atol=0.02)
+    
+    def test_hashed_chunks(self):
+        seeder = hashed_uniform_random(0.3, 7)
+        
+        # chunks only depend on the seed and their key, not on the order they are generated in
+        first = seeder((3, 5), (64, 64))
+        seeder((0, 0), (64, 64))
+        assert np.array_equal(seeder((3, 5), (64, 64)), first)
+        assert np.array_equal(hashed_uniform_random(0.3, 7)((3, 5), (64, 64)), first)
+        
+        assert not np.array_equal(seeder((5, 3), (64, 64)), first)
+        assert not np.array_equal(hashed_uniform_random(0.3, 8)((3, 5), (64, 64)), first)
+        assert abs(first.mean() - 0.3) < 0.05
@@ -0,0 +1,41 @@
+import pytest
+from pytest import approx
+
+from minesweeper.simulate import SimulationConfig, game_seed, new_agent, play_game, simulate, sweep, wilson_interval
+
+
+class TestSimulation:
+    
+    def test_wilson_interval(self):
+        low, high = wilson_interval(50, 100)
+        
+        assert low < 0.5 < high
+        assert 0.5 - low == approx(high - 0.5)
+        assert wilson_interval(0, 10)[0] == 0. and wilson_interval(10, 10)[1] == 1.
+    
+    def test_deterministic(self):
+        config = SimulationConfig('strategic', (8, 8), 0.15)
+        
+        outcomes = [play_game(config, game_seed(7, 0, game)) for game in range(10)]
+        
+        assert outcomes == [play_game(config, game_seed(7, 0, game)) for game in range(10)]
+    
+    @pytest.mark.parametrize('chunk_size', [1, 3, 20])
+    def test_independent_of_chunking(self, chunk_size):
+        configs = sweep('strategic', [(6, 6)], [0.1, 0.2], good_first_selects=[True, False])
+        
+        results = list(simulate(configs, 12, base_seed=3, workers=0, chunk_size=chunk_size))
+        
+        assert [result.config for result in results] == configs
+        assert all(result.games == 12 for result in results)
+        assert [result.wins for result in results] == \
+               [sum(play_game(config, game_seed(3, i, game)) for game in range(12)) for i, config in enumerate(configs)]
+    
+    def test_reused_agent(self):
+        config = SimulationConfig('strategic', (8, 8), 0.15)
+        agent = new_agent('strategic')
+        
+        outcomes = [play_game(config, game_seed(5, 0, game), agent=agent) for game in range(10)]
+        
+        assert outcomes == [play_game(config, game_seed(5, 0, game)) for game in range(10)]
+        assert agent.solver.workers == 0
@@ -0,0 +1,217 @@
+import itertools
+import time
+
+import numpy as np
+import pytest
+from pytest import approx
+
+from minesweeper.board import HiddenBoardState, neighbors
+from minesweeper.boards import SquareBoard, SquareGridState
+from minesweeper.patterns import HIDDEN, MINE_CELL, RADIUS, SAFE, UNKNOWN, WINDOW, PatternTable, solve_window
+from minesweeper.solvers import FrontierSolver, deduce_component, frontier_components, reduce_component, \
+    solve_component
+
+
+class Config:
+    forgiveness = 0
+
+
+def hidden_state(board, mine_count=None):
+    masked_proximity = board.proximity_matrix.copy()
+    masked_proximity[~board.open_layout] = 0
+    return HiddenBoardState(openable_layout=~board.open_layout & ~board.flag_layout,
+                            flag_layout=board.flag_layout.copy(),
+                            proximity_matrix=masked_proximity,
+                            mine_count=mine_count)
+
+
+def played_board(seed, size=(9, 9), mine_prob=0.2, selects=3):
+    rng = np.random.default_rng(seed)
+    layout = rng.uniform(0., 1., size) <= mine_prob
+    board = SquareBoard(SquareGridState(size), lambda _: layout.copy(), Config)
+    for pos in np.argwhere(~layout)[rng.permutation(np.sum(~layout))[:selects]]:
+        board.select(tuple(pos))
+    return board
+
+
+def brute_force(component):
+    counts = np.zeros(component.size)
+    total = 0
+    for assignment in itertools.product((0, 1), repeat=component.size):
+        if all(sum(assignment[v] for v in variables) == value for variables, value in component.constraints):
+            counts += assignment
+            total += 1
+    return counts / total
+
+
+def brute_force_endgame(board):
+    # probabilities over all layouts of the hidden cells that match the open numbers and the total number of mines
+    hidden = np.flatnonzero(~board.open_layout)
+    counts = np.zeros(board.mine_layout.size)
+    total = 0
+    for mines in itertools.combinations(hidden, int(np.sum(board.mine_layout[~board.open_layout]))):
+        layout = np.zeros(board.mine_layout.shape, dtype=bool)
+        layout.flat[list(mines)] = True
+        proximity = SquareBoard.count_neighbors(layout)
+        if np.all(proximity[board.open_layout & ~board.mine_layout] ==
+                  board.proximity_matrix[board.open_layout & ~board.mine_layout]):
+            counts += layout.ravel()
+            total += 1
+    return (counts / total).reshape(board.mine_layout.shape)
+
+
+class TestFrontierSolver:
+    
+    def test_one_two_one(self):
+        # hidden row above an open 1-2-1 (walled in by open cells on the sides)
+        layout = np.array([[0, 0, 0],
+                           [1, 0, 0],
+                           [0, 0, 0],
+                           [1, 0, 0],
+                           [0, 0, 0]], dtype=bool)
+        board = SquareBoard(SquareGridState(layout.shape), lambda _: layout.copy(), Config)
+        for pos in np.ndindex(layout.shape):
+            if pos[1] > 0:
+                board.select(pos)
+        
+        solution = FrontierSolver().solve(hidden_state(board))
+        
+        assert np.all(solution.mines == layout)
+        assert np.all(solution.safe[:, 0] == ~layout[:, 0])
+    
+    @pytest.mark.parametrize('seed', range(20))
+    def test_matches_brute_force(self, seed):
+        state = hidden_state(played_board(seed))
+        
+        for component in frontier_components(state):
+            if component.size <= 14:
+                assert solve_component(component).probabilities == approx(brute_force(component))
+    
+    @pytest.mark.parametrize('seed', range(20))
+    def test_sound(self, seed):
+        board = played_board(seed)
+        if board.failed:
+            return
+        
+        solution = FrontierSolver().solve(hidden_state(board))
+        
+        assert not np.any(solution.safe & board.mine_layout)
+        assert np.all(board.mine_layout[solution.mines])
+    
+    def test_components_independent(self):
+        board = played_board(3, size=(30, 30), mine_prob=0.15, selects=12)
+        components = frontier_components(hidden_state(board))
+        
+        cells = np.concatenate([component.cells for component in components])
+        assert len(cells) == len(np.unique(cells))
+        assert np.all(neighbors(board.open_layout & (board.proximity_matrix > 0)).flat[cells] != 0)
+    
+    @pytest.mark.parametrize('seed', range(20))
+    def test_linear_deductions_agree(self, seed):
+        state = hidden_state(played_board(seed, size=(12, 12)))
+        
+        for component in frontier_components(state):
+            if component.size > 30:
+                continue
+            
+            probabilities = solve_component(component).probabilities
+            for v, mine in deduce_component(component).items():
+                assert probabilities[v] == mine
+    
+    @pytest.mark.parametrize('seed', range(10))
+    def test_reduced_components(self, seed):
+        state = hidden_state(played_board(seed, size=(16, 16), selects=5))
+        
+        for component in frontier_components(state):
+            known = deduce_component(component)
+            reduced = reduce_component(component, known)
+            
+            cells = np.concatenate([component.cells[list(known)]] + [part.cells for part in reduced])
+            assert np.all(np.sort(cells) == component.cells)
+    
+    @pytest.mark.parametrize('seed', range(10))
+    def test_endgame_matches_brute_force(self, seed):
+        board = played_board(seed, size=(5, 5), mine_prob=0.25, selects=2)
+        if board.failed:
+            return
+        
+        solution = FrontierSolver().solve(hidden_state(board, mine_count=board.mines))
+        
+        assert solution.endgame
+        hidden = ~board.open_layout
+        assert solution.probabilities[hidden] == approx(brute_force_endgame(board)[hidden])
+
+
+class TestPatternTable:
+    
+    @pytest.mark.parametrize('seed', range(20))
+    def test_sound(self, seed):
+        board = played_board(seed, size=(12, 12))
+        if board.failed:
+            return
+        
+        safe, mines = PatternTable().deduce(hidden_state(board))
+        
+        assert not np.any(safe & board.mine_layout)
+        assert np.all(board.mine_layout[mines])
+    
+    def test_one_two_one(self):
+        # the same 1-2-1 as above: the local windows find both mines and the cell between them (the corners are only
+        # implied by numbers outside of their windows)
+        layout = np.array([[0, 0, 0],
+                           [1, 0, 0],
+                           [0, 0, 0],
+                           [1, 0, 0],
+                           [0, 0, 0]], dtype=bool)
+        board = SquareBoard(SquareGridState(layout.shape), lambda _: layout.copy(), Config)
+        for pos in np.ndindex(layout.shape):
+            if pos[1] > 0:
+                board.select(pos)
+        
+        safe, mines = PatternTable().deduce(hidden_state(board))
+        
+        assert np.all(mines == layout)
+        assert safe[2, 0] and not np.any(safe & layout)
+    
+    def test_mostly_hidden_window_fast(self):
+        # only the cells constrained together with the center are searched, not all 2^23 hidden cells
+        window = np.full((WINDOW, WINDOW), HIDDEN, dtype=np.int8)
+        window[0, 0], window[0, 1] = 1, 2
+        
+        start = time.perf_counter()
+        assert solve_window(window) == UNKNOWN
+        assert time.perf_counter() - start < 0.05
+    
+    def test_window_conclusions(self):
+        # open rows above the center: the 0 rules out the two hidden cells left of the center, so the 1 next to it
+        # (which also touches the center) needs the center to be a mine
+        window = np.full((WINDOW, WINDOW), HIDDEN, dtype=np.int8)
+        window[0] = 0
+        window[1] = [0, 1, 1, 1, 1]
+        assert solve_window(window) == MINE_CELL
+        
+        # a 0 next to the center makes it safe
+        window[1, 1] = 0
+        assert solve_window(window) == SAFE
+    
+    def test_counters(self):
+        patterns = PatternTable(maxsize=4)
+        state = hidden_state(played_board(0, size=(16, 16), selects=5))
+        
+        patterns.deduce(state)
+        first = patterns.stats
+        patterns.deduce(state)
+        
+        assert first.hits + first.misses > 0
+        assert patterns.stats.currsize <= 4
+        assert patterns.stats.hits + patterns.stats.misses == 2 * (first.hits + first.misses)
+    
+    def test_repeated_windows_hit(self):
+        patterns = PatternTable()
+        state = hidden_state(played_board(1, size=(16, 16), selects=5))
+        
+        patterns.deduce(state)
+        misses = patterns.stats.misses
+        patterns.deduce(state)
+        
+        assert patterns.stats.misses == misses
@@ -0,0 +1,46 @@
+import numpy as np
+import pytest
+
+from minesweeper.tessellations import hex_adjacency, hex_polygons, polygons_extent, torus_adjacency, \
+    triangle_adjacency, triangle_polygons
+
+
+def degrees(adjacency):
+    return np.asarray(adjacency.sum(axis=1)).ravel()
+
+
+@pytest.mark.parametrize('adjacency_of', [hex_adjacency, triangle_adjacency, torus_adjacency])
+@pytest.mark.parametrize('size', [(1, 1), (2, 3), (7, 6)])
+def test_symmetric_without_loops(adjacency_of, size):
+    adjacency = adjacency_of(size)
+    
+    assert adjacency.shape == (size[0] * size[1],) * 2
+    assert (adjacency != adjacency.T).nnz == 0
+    assert np.all(adjacency.diagonal() == 0)
+    assert np.all(adjacency.data == 1)
+
+
+def test_interior_degrees():
+    interior = (slice(2, -2), slice(2, -2))
+    
+    assert np.all(degrees(hex_adjacency((8, 8))).reshape(8, 8)[interior] == 6)
+    assert np.all(degrees(triangle_adjacency((8, 8))).reshape(8, 8)[interior] == 12)
+    assert np.all(degrees(torus_adjacency((8, 8))) == 8)
+
+
+def test_tiny_torus_counts_neighbors_once():
+    assert np.all(degrees(torus_adjacency((2, 2))) == 3)
+    assert np.all(degrees(torus_adjacency((3, 1))) == 2)
+
+
+@pytest.mark.parametrize('polygons_of', [hex_polygons, triangle_polygons])
+def test_adjacent_cells_touch(polygons_of):
+    size = (6, 5)
+    adjacency = (hex_adjacency if polygons_of is hex_polygons else triangle_adjacency)(size).tocoo()
+    polygons = polygons_of(size).reshape(size[0] * size[1], -1, 2)
+    
+    # adjacent cells share at least one vertex (an edge or a corner)
+    shared = np.array([np.min(np.linalg.norm(polygons[a][:, None] - polygons[b][None], axis=-1)) < 1e-9
+                       for a, b in zip(adjacency.row, adjacency.col)])
+    assert np.all(shared)
+    assert np.all(polygons_extent(polygons) > 0)
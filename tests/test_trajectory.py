@@ -0,0 +1,104 @@
+import os
+
+import numpy as np
+import pytest
+
+from minesweeper.actions import Action, ActionType
+from minesweeper.boards import SquareBoard, SquareGridState
+from minesweeper.corpus import BoardCorpus
+from minesweeper.replay import Replay
+from minesweeper.trajectory import STEP_DTYPE, TrajectoryReader, TrajectoryWriter
+
+
+class Config:
+    forgiveness = 100
+
+
+class TestTrajectory:
+    
+    def test_buffered(self, tmp_path):
+        writer = TrajectoryWriter(str(tmp_path), buffer_size=4)
+        file = tmp_path / 'trajectories.bin'
+        
+        for tick in range(3):
+            writer.record(0, Action.select((tick, 1)), tick, 1, 0)
+        assert not os.path.exists(file)
+        
+        writer.record(0, Action.flag((2, 2)), 3, 0, 0)
+        assert os.path.getsize(file) == 4 * STEP_DTYPE.itemsize
+        
+        writer.record(1, Action.superchord(), 0, 5, 1)
+        writer.close()
+        assert os.path.getsize(file) == 5 * STEP_DTYPE.itemsize
+    
+    def test_layouts_only_for_keyframes(self, tmp_path):
+        writer = TrajectoryWriter(str(tmp_path), keyframe_interval=4)
+        layouts = np.zeros((3, 3), dtype=bool), np.zeros((3, 3), dtype=bool)
+        calls = []
+        
+        writer.start_game(0, *layouts)
+        for tick in range(10):
+            writer.record(0, Action.select((1, 1)), tick, 0, 0, lambda: calls.append(tick) or layouts)
+        writer.close()
+        
+        assert calls == [3, 7]
+    
+    def test_read(self, tmp_path):
+        actions = [[Action.select((3, 4)), Action.flag((0, 1)), Action.chord((3, 4))],
+                   [],
+                   [Action.select((7, 7)), Action.superchord(), Action.surrender()]]
+        
+        with TrajectoryWriter(str(tmp_path), buffer_size=2) as writer:
+            for game, game_actions in enumerate(actions):
+                for tick, action in enumerate(game_actions):
+                    writer.record(game, action, tick, tick * 2, -1 if action.type == ActionType.SURRENDER else 0)
+        
+        reader = TrajectoryReader(str(tmp_path))
+        assert len(reader) == 6
+        
+        for game, game_actions in enumerate(actions):
+            assert [repr(action) for action in reader.actions(game)] == [repr(action) for action in game_actions]
+        
+        assert list(reader.game(2)['opened']) == [0, 2, 4]
+        assert list(reader.game(2)['outcome']) == [0, 0, -1]
+        assert len(reader.actions(0, stop=2)) == 2
+
+
+class TestReplay:
+    
+    @pytest.mark.parametrize('interval', [1, 3, 100])
+    def test_state_at_step(self, tmp_path, interval):
+        rng = np.random.default_rng(interval)
+        corpus = BoardCorpus(str(tmp_path))
+        writer = TrajectoryWriter(str(tmp_path), buffer_size=16, keyframe_interval=interval)
+        
+        snapshots = []
+        for game in range(3):
+            layout = rng.uniform(0., 1., (8, 10)) <= 0.15
+            board = SquareBoard(SquareGridState(layout.shape), lambda size: layout.copy(), Config)
+            writer.start_game(game, board.open_layout, board.flag_layout)
+            
+            snapshots.append([(board.open_layout.copy(), board.flag_layout.copy())])
+            for tick in range(20):
+                pos = tuple(int(coord) for coord in rng.integers(0, (8, 10)))
+                action = [Action.select(pos), Action.flag(pos), Action.chord(pos)][tick % 3]
+                opened = board.open_cells
+                board.apply(action)
+                writer.record(game, action, tick, board.open_cells - opened, 0,
+                              lambda: (board.open_layout, board.flag_layout))
+                snapshots[-1].append((board.open_layout.copy(), board.flag_layout.copy()))
+            
+            corpus.append(board.mine_layout, board.open_layout, board.flag_layout)
+        writer.close()
+        
+        replay = Replay(str(tmp_path))
+        for game in range(3):
+            assert replay.steps(game) == 20
+            for step in [0, 1, 7, 19, 20]:
+                state = replay.state(game, step)
+                open_layout, flag_layout = snapshots[game][step]
+                assert np.array_equal(state.flag_layout, flag_layout)
+                assert np.array_equal(state.openable_layout, ~open_layout & ~flag_layout)
+        
+        with pytest.raises(IndexError):
+            replay.state(0, 21)